@@ -0,0 +1,71 @@
+"""
+Benchmark: latencia por scrape con Chromium en frío vs. worker caliente.
+
+En frío: cada iteración lanza Chromium, abre contexto + página, carga el
+contenido y cierra todo (lo que hacían los scrapers antes).
+En caliente: un BrowserWorker ya iniciado entrega un contexto nuevo por
+iteración.
+
+Uso:
+    python scripts/bench_browser_worker.py --runs 10
+    python scripts/bench_browser_worker.py --url https://trends.google.com/trending?geo=MX
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from browser_worker import BrowserWorker
+
+SAMPLE_HTML = "<html><body>" + "".join(
+    f"<div class='mZ3RIc'>tendencia {i}</div><div class='qNpYPd'>{i}K+</div>" for i in range(25)
+) + "</body></html>"
+
+async def load(page, url):
+    if url:
+        await page.goto(url, wait_until='domcontentloaded', timeout=30000)
+    else:
+        await page.set_content(SAMPLE_HTML)
+    await page.evaluate("() => document.querySelectorAll('div.mZ3RIc').length")
+
+async def bench_cold(runs, url):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        worker = BrowserWorker()
+        await worker.start()
+        async with worker.new_page() as page:
+            await load(page, url)
+        await worker.close()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+async def bench_warm(runs, url):
+    timings = []
+    async with BrowserWorker() as worker:
+        for _ in range(runs):
+            start = time.perf_counter()
+            async with worker.new_page() as page:
+                await load(page, url)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+def report(label, timings):
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    print(f"{label:<8} n={len(timings):<3} media={statistics.mean(timings) * 1000:8.1f} ms  "
+          f"mediana={statistics.median(timings) * 1000:8.1f} ms  p95={p95 * 1000:8.1f} ms")
+    return statistics.median(timings)
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--url', default=None, help="URL real a cargar (por defecto HTML local, sin red)")
+    args = parser.parse_args()
+
+    cold = report("frío", await bench_cold(args.runs, args.url))
+    warm = report("caliente", await bench_warm(args.runs, args.url))
+    print(f"Aceleración (mediana): {cold / warm:.1f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+"""
+Benchmark: trend_momentum sobre meses de snapshots cada 5 minutos.
+
+Genera un histórico sintético (SQLite temporal, mismo esquema que
+trend_store) con --days días de snapshots de Google Trends cada
+--interval segundos en --geos países, con --trends tendencias por snapshot
+que suben, bajan y se reemplazan. Luego mide por país load_series()
+(SQLite -> arrays de observaciones) y momentum() (las métricas vectorizadas).
+
+Uso:
+    python scripts/bench_momentum.py
+    python scripts/bench_momentum.py --days 90 --geos 8 --trends 25
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from trend_store import TrendStore, SOURCE_GOOGLE_TRENDS
+from trend_momentum import load_series, momentum
+
+GEOS = ['MX', 'US', 'AR', 'BR', 'CO', 'ES', 'CL', 'PE', 'GB', 'FR', 'DE', 'IT']
+
+def populate(store, geos, days, interval, trends, seed=0):
+    """
+    Escribe el histórico sintético directo en las tablas (record_snapshot()
+    abre una transacción por snapshot; aquí va todo en una).
+    """
+    rng = np.random.default_rng(seed)
+    steps = int(days * 86400 // interval)
+    start = int(time.time()) - steps * interval
+    next_term = 0
+    observations = 0
+    with store.conn:
+        for geo in geos:
+            active = np.arange(next_term, next_term + trends)
+            next_term += trends
+            score = rng.gamma(2.0, 1.0, trends)
+            for step in range(steps):
+                scraped_at = start + step * interval
+                score *= rng.lognormal(0.0, 0.08, trends)
+                # Reescalar para que la caminata no se dispare en meses
+                score *= 2.0 / score.mean()
+                # Cada tanto entra un término nuevo en lugar del más flojo
+                if rng.random() < 0.15:
+                    weakest = int(np.argmin(score))
+                    active[weakest] = next_term
+                    next_term += 1
+                    score[weakest] = rng.gamma(2.0, 1.5)
+                order = np.argsort(-score)
+                cursor = store.conn.execute(
+                    'INSERT INTO snapshots (source, geo, timeframe, scraped_at, status, total_trends) VALUES (?, ?, ?, ?, ?, ?)',
+                    (SOURCE_GOOGLE_TRENDS, geo, '24h', scraped_at, 'success', trends)
+                )
+                snapshot_id = cursor.lastrowid
+                store.conn.executemany(
+                    'INSERT INTO observations (snapshot_id, term_id, observed_at, rank, volume) VALUES (?, ?, ?, ?, ?)',
+                    [(snapshot_id, int(active[i]) + 1, scraped_at, rank, int(score[i] * 1000))
+                     for rank, i in enumerate(order, 1)]
+                )
+                observations += trends
+        store.conn.executemany('INSERT OR IGNORE INTO terms (id, term) VALUES (?, ?)', [(i + 1, f"término {i}") for i in range(next_term)])
+    return steps, observations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=float, default=30)
+    parser.add_argument('--geos', type=int, default=4)
+    parser.add_argument('--trends', type=int, default=25, help="Tendencias por snapshot")
+    parser.add_argument('--interval', type=int, default=300, help="Segundos entre snapshots")
+    parser.add_argument('--window-hours', type=float, default=1.0)
+    args = parser.parse_args()
+
+    geos = GEOS[:args.geos]
+    with tempfile.TemporaryDirectory() as tmp:
+        with TrendStore(os.path.join(tmp, 'bench_history.db')) as store:
+            start = time.perf_counter()
+            steps, observations = populate(store, geos, args.days, args.interval, args.trends)
+            print(f"Histórico sintético: {len(geos)} países x {steps} snapshots, {observations} observaciones "
+                  f"({time.perf_counter() - start:.1f}s en generarlo)")
+            print(f"{'geo':<5} {'términos':>9} {'snapshots':>10} {'load ms':>9} {'momentum ms':>12} {'arrays MB':>10}")
+
+            total = time.perf_counter()
+            for geo in geos:
+                t0 = time.perf_counter()
+                series = load_series(store, SOURCE_GOOGLE_TRENDS, geo, timeframe='24h')
+                t1 = time.perf_counter()
+                momentum(series, args.window_hours)
+                t2 = time.perf_counter()
+                size_mb = sum(series[key].nbytes for key in ('row', 'column', 'rank', 'volume', 'times')) / 1e6
+                print(f"{geo:<5} {len(series['terms']):9d} {len(series['times']):10d} "
+                      f"{(t1 - t0) * 1000:9.0f} {(t2 - t1) * 1000:12.1f} {size_mb:10.1f}")
+            print(f"Total: {time.perf_counter() - total:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark: serialización de documentos grandes con muchos países/ventanas.
+
+Arma un documento con todas las combinaciones de GEO_SETTINGS x ventanas
+(cada una con --trends tendencias como las de xtrends, con su
+trend_time_mexico) y mide, para cada backend de json_codec disponible:
+dumps v1 (indent=2), dumps v2 (compacto), loads, y el costo y tamaño de
+los hermanos .gz/.br que escribe write_published().
+
+Uso:
+    python scripts/bench_serialization.py
+    python scripts/bench_serialization.py --trends 400 --runs 5
+"""
+
+import argparse
+import contextlib
+import io
+import statistics
+import time
+import json_codec
+from json_codec import BACKENDS, dumps, loads, compress
+from output_schema import to_v2
+from scrape_gt_trends import GEO_SETTINGS, WINDOW_ALIASES, build_result
+from scrape_tw_trends_2 import parse_twitter_trends_html
+from synthetic_pages import xtrends_page
+
+def multi_geo_document(trends_per_geo):
+    """
+    {"documents": [...]} con un documento por país/ventana.
+    """
+    with contextlib.redirect_stderr(io.StringIO()):
+        trends = parse_twitter_trends_html(xtrends_page(trends_per_geo), limit=trends_per_geo)['trends']
+    documents = [
+        build_result(geo, hours, trends, "Google Trends (sintético)", "success")
+        for geo in GEO_SETTINGS for hours in WINDOW_ALIASES.values()
+    ]
+    return {"documents": documents}
+
+def measure(fn, runs):
+    timings = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trends', type=int, default=40, help="Tendencias por país/ventana")
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    doc = multi_geo_document(args.trends)
+    # El v2 de un documento con varios países: cada uno por columnas
+    doc_v2 = {"documents": [to_v2(d) for d in doc["documents"]]}
+    print(f"{len(doc['documents'])} documentos x {args.trends} tendencias")
+    print(f"{'backend':<9} {'formato':<8} {'dumps ms':>9} {'loads ms':>9} {'bytes':>10}")
+
+    payloads = {}
+    for backend in BACKENDS:
+        for label, obj, indent in [("v1", doc, True), ("v2", doc_v2, False)]:
+            dump_ms, payload = measure(lambda: dumps(obj, indent=indent, backend=backend), args.runs)
+            load_ms, _ = measure(lambda: loads(payload, backend=backend), args.runs)
+            payloads[label] = payload
+            print(f"{backend:<9} {label:<8} {dump_ms:9.2f} {load_ms:9.2f} {len(payload):10d}")
+
+    print(f"\n{'formato':<8} {'comprimido':<11} {'ms':>9} {'bytes':>10} {'ratio':>7}")
+    formats = ['gz'] + (['br'] if json_codec.brotli is not None else [])
+    for label, payload in payloads.items():
+        for fmt in formats:
+            elapsed, compressed = measure(lambda: compress(payload, fmt), max(1, args.runs // 2))
+            print(f"{label:<8} {fmt:<11} {elapsed:9.2f} {len(compressed):10d} {len(payload) / len(compressed):6.1f}x")
+    print("(los documentos sintéticos repiten las mismas tendencias: la compresión real es menor)")
+    if json_codec.brotli is None:
+        print("(brotli no instalado: sin .br)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""
+Suite de benchmarks de los caminos calientes de extracción y normalización.
+
+Corre sobre páginas sintéticas de 40/400/4000 tendencias y, si existen,
+sobre los fixtures grabados (SCRAPER_FIXTURES_DIR). Para cada caso reporta
+percentiles de latencia (p50/p90/p99) y memoria pico (tracemalloc, en una
+corrida aparte para no inflar los tiempos).
+
+Casos:
+    gt_evaluate          EXTRACT_TRENDS_JS en Chromium (page.evaluate)
+    tw1_time_info_js     TREND_TIMES_JS en Chromium
+    tw1_json_ld          JSON-LD + tiempos visibles con BeautifulSoup
+    tw2_rows_<backend>   bucle de filas de xtrends por backend de parseo
+    normalize_tweet_count, extract_minutes_ago, extract_minutes_ago_from_text
+    gt_volume            textos de volumen de Google Trends -> cota inferior (volume_parser.py)
+    json_serialize       el resultado como lo publica el scraper (v1, backend de json_codec)
+    json_serialize_v2    el mismo resultado en el formato compacto v2
+    json_load_v1/v2      loads + read_columns() de un snapshot v1 / v2
+    trend_merge          ranking unificado de twitter-trending.com + xtrends (trend_merge.py)
+
+Los casos de navegador se omiten si Chromium no está disponible.
+
+Uso:
+    python scripts/bench_suite.py
+    python scripts/bench_suite.py --scales 40,400 --runs 30 --only tw2,normalize
+    python scripts/bench_suite.py --save-baseline benchmarks/baseline.json
+    python scripts/bench_suite.py --compare benchmarks/baseline.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+import scrape_tw_trends_2
+from fixture_replay import FixtureStore, DEFAULT_FIXTURES_DIR
+from json_codec import loads
+from output_schema import SCHEMA_V1, SCHEMA_V2, dump_snapshot, read_columns
+from scrape_gt_trends import EXTRACT_TRENDS_JS
+from scrape_tw_trends_1 import TREND_TIMES_JS, URL as TWITTER_TRENDING_URL
+from scrape_tw_trends_1 import parse_trending_html, build_trending_result, extract_minutes_ago
+from scrape_tw_trends_2 import URL as XTRENDS_URL
+from scrape_tw_trends_2 import parse_twitter_trends_html, normalize_tweet_count, extract_minutes_ago_from_text
+from trend_merge import merge_trends
+from volume_parser import volume_lower_bound
+from synthetic_pages import google_trends_page, twitter_trending_page, xtrends_page
+from synthetic_pages import xtrends_volume_text, relative_time, GOOGLE_VOLUMES
+
+DEFAULT_SCALES = [40, 400, 4000]
+DEFAULT_BASELINE = os.path.join('benchmarks', 'baseline.json')
+# Una diferencia menor a esto (ms) es ruido aunque en porcentaje parezca mucho
+NOISE_FLOOR_MS = 0.1
+
+def percentile(sorted_values, pct):
+    """
+    Percentil por rango más cercano sobre una lista ya ordenada.
+    """
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+def summarize(timings, peak_bytes):
+    ordered = sorted(timings)
+    return {
+        "runs": len(ordered),
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p90_ms": percentile(ordered, 90) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+        "peak_kb": peak_bytes / 1024 if peak_bytes is not None else None,
+    }
+
+def measure(fn, runs, warmup=3):
+    """
+    Tiempos de fn() (con los logs del scraper descartados) + memoria pico.
+    """
+    sink = io.StringIO()
+    with contextlib.redirect_stderr(sink):
+        for _ in range(warmup):
+            fn()
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+            sink.seek(0)
+            sink.truncate()
+
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return summarize(timings, peak)
+
+async def measure_async(fn, runs, warmup=1):
+    """
+    Igual que measure() para corrutinas (page.evaluate). La memoria pico
+    del lado del navegador no es visible con tracemalloc, así que no se reporta.
+    """
+    for _ in range(warmup):
+        await fn()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await fn()
+        timings.append(time.perf_counter() - start)
+    return summarize(timings, None)
+
+def fixture_pages(directory=None):
+    """
+    {nombre: html} de los fixtures grabados para twitter-trending.com y xtrends.
+    """
+    store = FixtureStore(directory or os.environ.get('SCRAPER_FIXTURES_DIR', DEFAULT_FIXTURES_DIR))
+    pages = {}
+    for name, url in [("twitter_trending", TWITTER_TRENDING_URL), ("xtrends", XTRENDS_URL)]:
+        fixture = store.load('GET', url)
+        if fixture:
+            pages[name] = fixture[1].decode('utf-8', errors='replace')
+    return pages
+
+def python_cases(scales, fixtures):
+    """
+    Lista de (caso, escala, función) para los caminos que no necesitan navegador.
+    """
+    cases = []
+    backends = ['html.parser']
+    try:
+        import lxml  # noqa: F401
+        backends.append('lxml')
+    except ImportError:
+        pass
+    if scrape_tw_trends_2.SelectolaxParser is not None:
+        backends.append('selectolax')
+
+    inputs = [(str(n), twitter_trending_page(n), xtrends_page(n), n) for n in scales]
+    if 'twitter_trending' in fixtures or 'xtrends' in fixtures:
+        inputs.append(("fixture", fixtures.get('twitter_trending'), fixtures.get('xtrends'), 40))
+
+    for scale, tw1_html, tw2_html, n in inputs:
+        if tw1_html:
+            def tw1_json_ld(html=tw1_html):
+                items, time_by_name = parse_trending_html(html)
+                return build_trending_result(items or [], time_by_name)
+            cases.append(("tw1_json_ld", scale, tw1_json_ld))
+
+        if tw2_html:
+            for backend in backends:
+                cases.append((f"tw2_rows_{backend}", scale, lambda html=tw2_html, b=backend: parse_twitter_trends_html(html, backend=b)))
+
+            with contextlib.redirect_stderr(io.StringIO()):
+                result = parse_twitter_trends_html(tw2_html, limit=max(n, 40))
+            cases.append(("json_serialize", scale, lambda data=result: dump_snapshot(data, SCHEMA_V1)))
+            cases.append(("json_serialize_v2", scale, lambda data=result: dump_snapshot(data, SCHEMA_V2)))
+            v1_text, v2_text = dump_snapshot(result, SCHEMA_V1), dump_snapshot(result, SCHEMA_V2)
+            cases.append(("json_load_v1", scale, lambda text=v1_text: read_columns(loads(text))))
+            cases.append(("json_load_v2", scale, lambda text=v2_text: read_columns(loads(text))))
+
+        if tw1_html and tw2_html:
+            with contextlib.redirect_stderr(io.StringIO()):
+                items, time_by_name = parse_trending_html(tw1_html)
+                tw1_trends = (build_trending_result(items or [], time_by_name) or {}).get('trends', [])
+                tw2_trends = parse_twitter_trends_html(tw2_html, limit=max(n, 40))['trends']
+            lists = {"twitter_trending_com": tw1_trends, "xtrends": tw2_trends}
+            cases.append(("trend_merge", scale, lambda l=lists: merge_trends(l)))
+
+        if scale != "fixture":
+            volumes = [xtrends_volume_text(i) for i in range(n)]
+            times = [relative_time(i) for i in range(n)]
+            cases.append(("normalize_tweet_count", scale, lambda v=volumes: [normalize_tweet_count(x) for x in v]))
+            gt_volumes = [GOOGLE_VOLUMES[i % len(GOOGLE_VOLUMES)] for i in range(n)]
+            cases.append(("gt_volume", scale, lambda v=gt_volumes: [volume_lower_bound(x) for x in v]))
+            cases.append(("extract_minutes_ago", scale, lambda t=times: [extract_minutes_ago(x) for x in t]))
+            cases.append(("extract_minutes_ago_from_text", scale, lambda t=times: [extract_minutes_ago_from_text(x) for x in t]))
+    return cases
+
+async def browser_results(scales, runs, selected):
+    """
+    Casos de page.evaluate. Retorna (resultados, motivo si se omitieron).
+    """
+    wanted = [name for name in ("gt_evaluate", "tw1_time_info_js") if selected(name)]
+    if not wanted:
+        return [], None
+    try:
+        from browser_worker import BrowserWorker
+        worker = BrowserWorker()
+        await worker.start()
+    except Exception as e:
+        return [], f"{type(e).__name__}: {str(e).splitlines()[0][:120]}"
+
+    results = []
+    try:
+        async with worker.new_page() as page:
+            for n in scales:
+                if "gt_evaluate" in wanted:
+                    await page.set_content(google_trends_page(n))
+                    stats = await measure_async(lambda: page.evaluate(EXTRACT_TRENDS_JS), runs)
+                    results.append(("gt_evaluate", str(n), stats))
+                if "tw1_time_info_js" in wanted:
+                    html = twitter_trending_page(n)
+                    await page.set_content(html)
+                    with contextlib.redirect_stderr(io.StringIO()):
+                        items, _ = parse_trending_html(html)
+                    names = [item['name'] for item in (items or [])[:40]]
+                    stats = await measure_async(lambda: page.evaluate(TREND_TIMES_JS, names), runs)
+                    results.append(("tw1_time_info_js", str(n), stats))
+    finally:
+        await worker.close()
+    return results, None
+
+def compare(results, baseline, threshold):
+    """
+    Diferencia de p50 contra la línea base. Retorna cuántas regresiones hubo.
+    """
+    previous = {(r['case'], r['scale']): r for r in baseline.get('results', [])}
+    regressions = 0
+    print(f"\nComparación contra la línea base ({baseline.get('created_at', '?')}, {baseline.get('machine', '?')}):")
+    for r in results:
+        before = previous.get((r['case'], r['scale']))
+        if not before:
+            print(f"  {r['case']:<30} {r['scale']:>8}  (nuevo)")
+            continue
+        delta = r['p50_ms'] - before['p50_ms']
+        ratio = delta / before['p50_ms'] if before['p50_ms'] else 0.0
+        flag = ""
+        if ratio > threshold and delta > NOISE_FLOOR_MS:
+            flag = "  REGRESIÓN"
+            regressions += 1
+        elif ratio < -threshold and -delta > NOISE_FLOOR_MS:
+            flag = "  mejora"
+        print(f"  {r['case']:<30} {r['scale']:>8}  {before['p50_ms']:9.3f} -> {r['p50_ms']:9.3f} ms  {ratio:+7.1%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', default=','.join(str(s) for s in DEFAULT_SCALES), help="Tendencias por página sintética")
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--only', default='', help="Prefijos de casos separados por coma (p.ej. tw2,normalize)")
+    parser.add_argument('--no-browser', action='store_true', help="Omitir los casos de page.evaluate")
+    parser.add_argument('--fixtures-dir', default=None)
+    parser.add_argument('--json', default=None, help="Guardar los resultados en este archivo")
+    parser.add_argument('--save-baseline', nargs='?', const=DEFAULT_BASELINE, default=None)
+    parser.add_argument('--compare', nargs='?', const=DEFAULT_BASELINE, default=None)
+    parser.add_argument('--threshold', type=float, default=0.15, help="Cambio relativo de p50 que cuenta como regresión")
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(',') if s.strip()]
+    prefixes = [p.strip() for p in args.only.split(',') if p.strip()]
+    selected = lambda name: not prefixes or any(name.startswith(p) for p in prefixes)
+
+    results = []
+    fixtures = fixture_pages(args.fixtures_dir)
+    for case, scale, fn in python_cases(scales, fixtures):
+        if selected(case):
+            with contextlib.redirect_stderr(io.StringIO()):
+                stats = measure(fn, args.runs)
+            results.append({"case": case, "scale": scale, **stats})
+
+    skipped = None
+    if not args.no_browser:
+        browser, skipped = asyncio.run(browser_results(scales, args.runs, selected))
+        results.extend({"case": case, "scale": scale, **stats} for case, scale, stats in browser)
+
+    print(f"{'caso':<30} {'escala':>8} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'pico KB':>10}")
+    for r in results:
+        peak = f"{r['peak_kb']:10.1f}" if r['peak_kb'] is not None else f"{'-':>10}"
+        print(f"{r['case']:<30} {r['scale']:>8} {r['p50_ms']:10.3f} {r['p90_ms']:10.3f} {r['p99_ms']:10.3f} {peak}")
+    if skipped:
+        print(f"\nCasos de navegador omitidos: {skipped}")
+    if not fixtures:
+        print("Sin fixtures grabados (SCRAPER_FIXTURES=record python scripts/fixture_replay.py)")
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "machine": f"{platform.node()} / {platform.python_implementation()} {platform.python_version()}",
+        "runs": args.runs,
+        "results": results,
+    }
+    for path in (args.json, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"Resultados guardados en {path}")
+
+    if args.compare:
+        if not os.path.exists(args.compare):
+            print(f"\nNo existe la línea base {args.compare} (créala con --save-baseline)")
+            return 0
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{regressions} regresiones de más de {args.threshold:.0%}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Benchmark: term_similarity con cientos de miles de términos distintos.
+
+Genera --terms términos sintéticos (combinaciones de palabras, más
+variantes: hashtag en camelCase, "Club X", "X vs Y", mayúsculas y acentos)
+en un SQLite temporal con el esquema de trend_store, mide el sync()
+incremental por tandas y luego la latencia de similar() (p50/p99) para
+--queries términos, conocidos y nuevos.
+
+Uso:
+    python scripts/bench_term_similarity.py
+    python scripts/bench_term_similarity.py --terms 300000 --queries 5000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from trend_store import TrendStore
+from term_similarity import TermIndex
+
+# Sílabas consonante + vocal (+ final opcional): ~1500 combinaciones, para
+# que los trigramas se repartan como en nombres reales
+SYLLABLES = [
+    c + v + end
+    for c in ['b', 'c', 'ch', 'd', 'f', 'g', 'j', 'l', 'll', 'm', 'n', 'ñ', 'p', 'r', 's', 't', 'v', 'z', 'br', 'tr']
+    for v in ['a', 'e', 'i', 'o', 'u', 'á', 'é']
+    for end in ['', 'n', 'r', 's', 'l', 'z']
+]
+
+def word(rng):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+def variant(rng, words):
+    kind = rng.random()
+    if kind < 0.25:
+        return '#' + ''.join(w.capitalize() for w in words)
+    if kind < 0.4:
+        return 'Club ' + ' '.join(words).title()
+    if kind < 0.55 and len(words) > 1:
+        return f"{words[0]} vs {words[1]}"
+    return ' '.join(words).upper() if kind < 0.7 else ' '.join(words)
+
+def generate(count, seed=0):
+    rng = random.Random(seed)
+    terms = set()
+    while len(terms) < count:
+        words = [word(rng) for _ in range(rng.randint(1, 3))]
+        terms.add(' '.join(words))
+        for _ in range(rng.randint(0, 3)):
+            terms.add(variant(rng, words))
+    return list(terms)[:count], rng
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--terms', type=int, default=200000)
+    parser.add_argument('--batch', type=int, default=50000, help="Términos nuevos por sync()")
+    parser.add_argument('--queries', type=int, default=2000)
+    args = parser.parse_args()
+
+    terms, rng = generate(args.terms)
+    with tempfile.TemporaryDirectory() as tmp:
+        with TrendStore(os.path.join(tmp, 'bench_history.db')) as store:
+            index = TermIndex(store)
+            print(f"{'términos':>9} {'sync s':>8} {'µs/término':>11}")
+            for start in range(0, len(terms), args.batch):
+                with store.conn:
+                    store.intern_terms(terms[start:start + args.batch])
+                t0 = time.perf_counter()
+                added = index.sync()
+                elapsed = time.perf_counter() - t0
+                print(f"{start + added:9d} {elapsed:8.1f} {elapsed / max(added, 1) * 1e6:11.0f}")
+
+            queries = rng.sample(terms, args.queries // 2) + [
+                variant(rng, [word(rng) for _ in range(2)]) for _ in range(args.queries - args.queries // 2)
+            ]
+            latencies, found = [], 0
+            for term in queries:
+                t0 = time.perf_counter()
+                matches = index.similar(term)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                found += bool(matches)
+            clusters = index.clusters(min_size=2)
+            print(f"similar(): p50 {percentile(latencies, 0.5):.3f} ms, p99 {percentile(latencies, 0.99):.3f} ms "
+                  f"({found}/{len(queries)} con coincidencias)")
+            print(f"Grupos de 2+ variantes: {len(clusters)}, el más grande con {clusters[0]['size'] if clusters else 0}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark: extracción de tiempos relativos en twitter-trending.com.
+
+Compara el recorrido anterior (querySelectorAll('*') + textContent en cada
+elemento) contra TREND_TIMES_JS, que solo recorre las filas de tendencias.
+Carga la página con page.set_content(), así que no necesita red.
+
+Uso:
+    python scripts/bench_tw1_time_extraction.py --html fixtures/twitter_trending_com.html
+    python scripts/bench_tw1_time_extraction.py --trends 400 --runs 20
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import time
+from browser_worker import BrowserWorker
+from scrape_tw_trends_1 import TREND_TIMES_JS
+from synthetic_pages import twitter_trending_page
+
+LEGACY_TIME_INFO_JS = """
+    () => {
+        const timeElements = Array.from(document.querySelectorAll('*'))
+            .filter(el => {
+                const text = el.textContent || '';
+                return text.includes('ago') || text.includes('minutes') || text.includes('hours');
+            })
+            .map(el => el.textContent.trim())
+            .filter(text => text.length < 50);
+        return timeElements;
+    }
+"""
+
+def names_from_html(html):
+    """
+    Nombres de tendencia desde el JSON-LD de la página (igual que el scraper).
+    """
+    match = re.search(r'<script[^>]*application/ld\+json[^>]*>(.*?)</script>', html, re.S)
+    if not match:
+        return []
+    data = json.loads(match.group(1))
+    return [item.get('name', '').strip() for item in data.get('itemListElement', [])[:40] if item.get('name')]
+
+async def time_evaluate(page, script, arg, runs):
+    timings = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = await page.evaluate(script, arg) if arg is not None else await page.evaluate(script)
+        timings.append(time.perf_counter() - start)
+    return timings, result
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--html', default=None, help="Copia guardada de la página (si no, se genera una sintética)")
+    parser.add_argument('--trends', type=int, default=40, help="Tendencias de la página sintética")
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.html:
+        with open(args.html, encoding='utf-8') as f:
+            html = f.read()
+    else:
+        html = twitter_trending_page(args.trends)
+    names = names_from_html(html)
+
+    async with BrowserWorker() as worker:
+        async with worker.new_page() as page:
+            await page.set_content(html)
+            node_count = await page.evaluate("() => document.getElementsByTagName('*').length")
+            print(f"Página: {len(html)} bytes, {node_count} elementos, {len(names)} tendencias")
+
+            legacy, legacy_result = await time_evaluate(page, LEGACY_TIME_INFO_JS, None, args.runs)
+            targeted, targeted_result = await time_evaluate(page, TREND_TIMES_JS, names, args.runs)
+
+    print(f"querySelectorAll('*'): mediana {statistics.median(legacy) * 1000:8.2f} ms  ({len(legacy_result)} textos sin dueño)")
+    print(f"TREND_TIMES_JS       : mediana {statistics.median(targeted) * 1000:8.2f} ms  ({len(targeted_result)} pares nombre/tiempo)")
+    print(f"Aceleración: {statistics.median(legacy) / statistics.median(targeted):.1f}x")
+    for pair in targeted_result[:3]:
+        print(f"  {pair['name']!r} -> {pair['time']!r}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
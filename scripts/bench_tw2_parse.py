@@ -0,0 +1,144 @@
+"""
+Benchmark: parseo del HTML de xtrends.
+
+"anterior" reproduce el bucle original (html.parser, árbol completo,
+get_text por fila) sin contar las pausas; además se reporta cuánto dormía
+en promedio el bucle anterior entre filas. "nuevo" usa
+parse_twitter_trends_html() con cada backend disponible, y "streaming"
+alimenta XtrendsStreamParser por chunks (como stream_twitter_trends()).
+
+Uso:
+    python scripts/bench_tw2_parse.py --html fixtures/xtrends_mexico.html
+    python scripts/bench_tw2_parse.py --trends 400 --runs 20
+"""
+
+import argparse
+import codecs
+import contextlib
+import io
+import re
+import statistics
+import time
+from bs4 import BeautifulSoup
+import scrape_tw_trends_2
+from scrape_tw_trends_2 import normalize_tweet_count, parse_twitter_trends_html
+from scrape_tw_trends_2 import XtrendsStreamParser, iter_trends_from_rows
+from synthetic_pages import xtrends_page
+
+def legacy_parse(html, limit=40):
+    """
+    Bucle de filas tal como estaba antes (sin time.sleep).
+    Retorna (tendencias, filas que habrían dormido).
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    tbody = soup.find('table', {'id': 'twitter-trends'}).find('tbody', {'id': 'copyData'})
+    rows = tbody.find_all('tr')
+    trends = []
+    sleeps = 0
+    for idx, row in enumerate(rows):
+        if idx % 5 == 0 and idx > 0:
+            sleeps += 1
+        if row.find('ins', {'class': 'adsbygoogle'}):
+            continue
+        tweet_link = row.find('a', {'class': 'tweet'})
+        if not tweet_link:
+            continue
+        name = tweet_link.text.strip()
+        count = tweet_link.get('tweetcount', tweet_link.get('tweetc', '0'))
+        row_text = row.get_text(separator=' ')
+        match = re.search(r'(\d+)\s+minutes?\s+ago', row_text, re.IGNORECASE)
+        minutes = int(match.group(1)) if match else None
+        if not match and ('hour' in row_text.lower() or 'day' in row_text.lower()):
+            minutes = None
+        volume = normalize_tweet_count(count)
+        if volume == 1000:
+            volume = -1
+        trends.append((int(tweet_link.get('rank', len(trends) + 1)), name, volume, minutes))
+        if len(trends) >= limit:
+            break
+    return trends, sleeps
+
+def new_parse(html, backend):
+    result = parse_twitter_trends_html(html, backend=backend)
+    return [(t['rank'], t['term'], t['tweet_volume'], t['minutes_since_update']) for t in result['trends']]
+
+def stream_parse(data, chunk_size=8192):
+    """
+    Igual que stream_twitter_trends() pero leyendo de bytes en memoria.
+    Retorna (tendencias, bytes leídos, segundos hasta la primera tendencia).
+    """
+    parser = XtrendsStreamParser()
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    consumed = 0
+    start = time.perf_counter()
+
+    def rows():
+        nonlocal consumed
+        for offset in range(0, len(data), chunk_size):
+            chunk = data[offset:offset + chunk_size]
+            consumed += len(chunk)
+            parser.feed(decoder.decode(chunk))
+            yield from parser.pop_rows()
+            if parser.done:
+                return
+        parser.close()
+        yield from parser.pop_rows()
+
+    trends = []
+    first = None
+    for t in iter_trends_from_rows(rows()):
+        if first is None:
+            first = time.perf_counter() - start
+        trends.append((t['rank'], t['term'], t['tweet_volume'], t['minutes_since_update']))
+    return trends, consumed, first
+
+def measure(fn, runs):
+    timings = []
+    result = None
+    for _ in range(runs):
+        with contextlib.redirect_stderr(io.StringIO()):
+            start = time.perf_counter()
+            result = fn()
+            timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--html', default=None, help="Copia guardada de xtrends (si no, se genera una sintética)")
+    parser.add_argument('--trends', type=int, default=40, help="Tendencias de la página sintética")
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.html:
+        with open(args.html, encoding='utf-8') as f:
+            html = f.read()
+    else:
+        html = xtrends_page(args.trends)
+    print(f"Página: {len(html)} bytes")
+
+    legacy_time, (legacy_trends, sleeps) = measure(lambda: legacy_parse(html), args.runs)
+    # Cada pausa era uniform(0.1, 0.5): 0.3 s en promedio
+    print(f"anterior (html.parser)   : {legacy_time * 1000:8.2f} ms  + ~{sleeps * 0.3:.1f} s de pausas")
+
+    backends = ['html.parser']
+    try:
+        import lxml  # noqa: F401
+        backends.append('lxml')
+    except ImportError:
+        pass
+    if scrape_tw_trends_2.SelectolaxParser is not None:
+        backends.append('selectolax')
+
+    for backend in backends:
+        elapsed, trends = measure(lambda: new_parse(html, backend), args.runs)
+        same = "idéntico" if trends == legacy_trends else "DIFERENTE"
+        print(f"nuevo ({backend:<11})     : {elapsed * 1000:8.2f} ms  {legacy_time / elapsed:5.1f}x  resultado {same}")
+
+    data = html.encode('utf-8')
+    elapsed, (trends, consumed, first) = measure(lambda: stream_parse(data), args.runs)
+    same = "idéntico" if trends == legacy_trends else "DIFERENTE"
+    print(f"streaming (chunks 8 KB)  : {elapsed * 1000:8.2f} ms  {legacy_time / elapsed:5.1f}x  resultado {same}")
+    print(f"  primera tendencia a {first * 1000:.2f} ms, leídos {consumed} de {len(data)} bytes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import asyncio
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
+from fixture_replay import install_fixtures
+from scrape_log import get_logger
+
+log = get_logger(__name__)
+
+# Argumentos de lanzamiento comunes para todos los scrapers (unión de los que
+# antes usaba cada script por separado).
+CHROMIUM_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    '--disable-dev-shm-usage',
+    '--no-sandbox',
+    '--disable-setuid-sandbox'
+]
+
+class BrowserWorker:
+    """
+    Mantiene un Chromium "caliente" de larga duración y entrega contextos
+    aislados (cookies, caché y storage propios) a cada scraper.
+
+    Uso:
+        worker = BrowserWorker()
+        await worker.start()
+        async with worker.new_page(locale='es-MX') as page:
+            await page.goto(url)
+        await worker.close()
+    """
+
+    def __init__(self, headless=True, args=None):
+        self.headless = headless
+        self.args = list(args) if args is not None else list(CHROMIUM_ARGS)
+        self._playwright = None
+        self._browser = None
+        self._lock = asyncio.Lock()
+        self.contexts_served = 0
+
+    @property
+    def is_running(self):
+        return self._browser is not None and self._browser.is_connected()
+
+    async def start(self):
+        """
+        Lanza Chromium si no está corriendo. Es seguro llamarlo varias veces.
+        """
+        async with self._lock:
+            if self.is_running:
+                return self
+
+            # Si el navegador murió, liberar el driver anterior antes de relanzar
+            if self._playwright is not None:
+                await self._stop_playwright()
+
+            log.info("Lanzando navegador Chromium (worker)...")
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(
+                headless=self.headless,
+                args=self.args
+            )
+            return self
+
+    async def close(self):
+        """
+        Cierra el navegador y el driver de Playwright.
+        """
+        async with self._lock:
+            await self._stop_playwright()
+
+    async def _stop_playwright(self):
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+    @asynccontextmanager
+    async def new_context(self, init_script=None, **context_options):
+        """
+        Entrega un contexto nuevo y aislado; se cierra al salir del bloque.
+        Acepta las mismas opciones que browser.new_context().
+        Con SCRAPER_FIXTURES activo, el contexto graba o sirve fixtures.
+        """
+        await self.start()
+        context = await self._browser.new_context(**context_options)
+        self.contexts_served += 1
+        try:
+            await install_fixtures(context)
+            if init_script:
+                await context.add_init_script(init_script)
+            yield context
+        finally:
+            try:
+                await context.close()
+            except Exception:
+                pass
+
+    @asynccontextmanager
+    async def new_page(self, init_script=None, **context_options):
+        """
+        Atajo: contexto aislado + una página lista para navegar.
+        """
+        async with self.new_context(init_script=init_script, **context_options) as context:
+            page = await context.new_page()
+            yield page
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+_shared_worker = None
+
+def get_shared_worker():
+    """
+    Retorna el worker compartido del proceso (se crea la primera vez).
+    Lo usan los scrapers cuando se ejecutan dentro de un proceso de larga
+    duración, para no relanzar Chromium en cada corrida.
+    """
+    global _shared_worker
+    if _shared_worker is None:
+        _shared_worker = BrowserWorker()
+    return _shared_worker
+
+@asynccontextmanager
+async def browser_session(worker=None):
+    """
+    Entrega un worker listo para usar. Si no se pasa uno, lanza un Chromium
+    temporal (arranque en frío) y lo cierra al terminar, igual que antes.
+    """
+    if worker is not None:
+        await worker.start()
+        yield worker
+        return
+
+    cold_worker = BrowserWorker()
+    await cold_worker.start()
+    try:
+        yield cold_worker
+    finally:
+        await cold_worker.close()
@@ -0,0 +1,95 @@
+"""
+Verificación de publish_snapshot() sobre un histórico temporal.
+
+Casos (cada uno en un directorio nuevo, sin red ni scrapers):
+    same_success      success [a,b] -> success [a,b]: el segundo es un latido
+                      "unchanged" y el JSON no se reescribe
+    fallback_recover  success [a,b] -> fallback -> success [a,b]: el tercero
+                      reescribe el JSON aunque la lista sea la del primero, y
+                      el fallback no deja validadores viejos para la petición
+                      condicional
+
+Sale con código 1 si algún caso falla.
+
+Uso:
+    python scripts/check_publish_snapshot.py
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+from output_schema import load_snapshot
+from snapshot_output import conditional_headers, publish_snapshot
+from trend_store import SOURCE_XTRENDS
+
+START = datetime(2025, 11, 2, 12, 0, tzinfo=timezone.utc)
+
+def document(status, terms, step):
+    data = {
+        "scraping_time": {"timestamp_iso": (START + timedelta(minutes=5 * step)).isoformat()},
+        "source": SOURCE_XTRENDS,
+        "status": status,
+        "total_trends": len(terms),
+        "trends": [{"rank": rank, "term": term} for rank, term in enumerate(terms, 1)],
+    }
+    if status == 'success':
+        data["http"] = {"status_code": 200, "etag": '"lista-ab"', "last_modified": None}
+    return data
+
+def publish_all(tmp, documents, first_step=0):
+    output_file = os.path.join(tmp, 'twitter_trends_data.json')
+    store_path = os.path.join(tmp, 'trends_history.db')
+    written = [
+        publish_snapshot(document(*doc, step), output_file, SOURCE_XTRENDS, store_path=store_path)
+        for step, doc in enumerate(documents, first_step)
+    ]
+    published = load_snapshot(output_file)
+    return written, published, conditional_headers(SOURCE_XTRENDS, store_path=store_path)
+
+def check_same_success(tmp):
+    written, _, _ = publish_all(tmp, [('success', ['a', 'b']), ('success', ['a', 'b'])])
+    errors = []
+    if written != [True, False]:
+        errors.append(f"escrituras {written}, se esperaba [True, False]")
+    return errors
+
+def check_fallback_recover(tmp):
+    written, _, headers = publish_all(tmp, [('success', ['a', 'b']), ('fallback', ['ex1', 'ex2'])])
+    errors = []
+    if headers:
+        errors.append(f"el fallback dejó validadores de la lista anterior: {headers}")
+    recovered, published, _ = publish_all(tmp, [('success', ['a', 'b'])], first_step=2)
+    written += recovered
+    if written != [True, True, True]:
+        errors.append(f"escrituras {written}, se esperaba [True, True, True]")
+    terms = [trend['term'] for trend in published.get('trends', [])]
+    if published.get('status') != 'success' or terms != ['a', 'b']:
+        errors.append(f"quedó publicado {published.get('status')} {terms}")
+    return errors
+
+CASES = {
+    "same_success": check_same_success,
+    "fallback_recover": check_fallback_recover,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+    # Sin métricas: solo interesa lo que queda publicado
+    os.environ['SCRAPER_METRICS_NDJSON'] = ''
+    os.environ.pop('TRENDS_DB_DISABLED', None)
+
+    failed = 0
+    for name, check in CASES.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            errors = check(tmp)
+        print(f"{'ok  ' if not errors else 'FALLA'} {name}")
+        for error in errors:
+            print(f"      {error}")
+        failed += bool(errors)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
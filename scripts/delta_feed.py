@@ -0,0 +1,113 @@
+"""
+Feed incremental entre snapshots consecutivos para los dashboards.
+
+Junto a cada JSON publicado (p.ej. twitter_trends_data.json) se escribe
+twitter_trends_data.delta.json con los últimos cambios:
+
+    {"source": "xtrends", "geo": "MX", "timeframe": "", "seq": 1762119276,
+     "deltas": [{"seq": 1762119276, "prev_seq": 1762118076,
+                 "header": {...},                       # tiempos, total, status
+                 "inserted": [{trend completo}, ...],
+                 "removed": ["término", ...],
+                 "reranked": [["término", rank_anterior, rank_nuevo], ...],
+                 "volumes": [{"term": "...", "tweet_volume": ..., ...}, ...]}]}
+
+seq es el epoch del snapshot (crece con cada publicación) y el documento
+completo lo lleva en "feed_seq". Un cliente con feed_seq = N aplica, en
+orden, los deltas cuya cadena empieza en prev_seq = N; si la cadena no
+llega hasta su N (se atrasó más de DELTA_HISTORY publicaciones, o hubo un
+fallback entre medio) vuelve a pedir el documento completo.
+
+El estado anterior sale del histórico (último snapshot "success" de la
+fuente/país/ventana), así que sin histórico (TRENDS_DB_DISABLED) no hay feed.
+"""
+
+import os
+from json_codec import dumps, loads, write_published
+from trend_store import trend_row
+
+# Deltas que se conservan en el feed
+DELTA_HISTORY = 24
+
+# Campos de volumen de cada fuente (Twitter: tweet_volume*, Google: volume*)
+VOLUME_KEYS = ('tweet_volume', 'tweet_volume_text', 'volume', 'volume_text')
+
+# Campos del documento que cambian en cada publicación aunque la lista no
+HEADER_KEYS = (
+    'scraping_time', 'data_source_updated_time', 'timestamp', 'timestamp_mexico',
+    'timestamp_local', 'total_trends', 'status', 'source',
+)
+
+def delta_path(output_file):
+    """
+    'twitter_trends_data.json' -> 'twitter_trends_data.delta.json'
+    """
+    base, ext = os.path.splitext(output_file)
+    return f"{base}.delta{ext or '.json'}"
+
+def compute_delta(previous_trends, trends):
+    """
+    Cambios de previous_trends (filas del histórico: rank, term, volume,
+    volume_text) a trends (las tendencias del documento nuevo).
+    """
+    before = {}
+    for row in previous_trends:
+        before.setdefault(row['term'], row)
+
+    inserted, reranked, volumes = [], [], []
+    current_terms = set()
+    for trend in trends:
+        rank, term, volume, volume_text, _ = trend_row(trend)
+        if not term or term in current_terms:
+            continue
+        current_terms.add(term)
+        old = before.get(term)
+        if old is None:
+            inserted.append(trend)
+            continue
+        if old['rank'] != rank:
+            reranked.append([term, old['rank'], rank])
+        if old['volume'] != volume or old['volume_text'] != volume_text:
+            volumes.append({"term": term, **{key: trend[key] for key in VOLUME_KEYS if key in trend}})
+
+    removed = [term for term in before if term not in current_terms]
+    return {"inserted": inserted, "removed": removed, "reranked": reranked, "volumes": volumes}
+
+def build_delta(data, previous, seq):
+    """
+    Delta completo (con seq/prev_seq y encabezado) del documento data
+    respecto del snapshot previous del histórico.
+    """
+    return {
+        "seq": seq,
+        "prev_seq": previous['scraped_at'],
+        "header": {key: data[key] for key in HEADER_KEYS if key in data},
+        **compute_delta(previous['trends'], data.get('trends', [])),
+    }
+
+def read_feed(path):
+    try:
+        with open(path, 'rb') as f:
+            return loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+def write_delta_feed(data, output_file, source, geo, timeframe, previous, seq):
+    """
+    Agrega el delta al feed de output_file (o lo reinicia si la cadena se
+    cortó) y lo escribe junto al JSON. Sin snapshot anterior con el cual
+    comparar (primer snapshot, o un fallback) el feed queda vacío en seq:
+    los clientes que ya tienen ese documento no piden nada más, y los demás
+    piden el completo. Retorna los bytes del feed.
+    """
+    path = delta_path(output_file)
+    deltas = []
+    if previous is not None:
+        delta = build_delta(data, previous, seq)
+        feed = read_feed(path)
+        if feed and feed.get('seq') == delta['prev_seq']:
+            deltas = feed.get('deltas', [])
+        deltas = (deltas + [delta])[-DELTA_HISTORY:]
+
+    payload = dumps({"source": source, "geo": geo, "timeframe": timeframe, "seq": seq, "deltas": deltas})
+    return write_published(path, payload)[path]
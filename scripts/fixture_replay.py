@@ -0,0 +1,300 @@
+"""
+Grabación y replay de respuestas HTTP para correr los scrapers sin red.
+
+SCRAPER_FIXTURES=record   guarda cada respuesta (Playwright y requests) en
+                          SCRAPER_FIXTURES_DIR (por defecto fixtures/)
+SCRAPER_FIXTURES=replay   las sirve desde ahí; lo que no esté grabado se
+                          aborta, así que nunca sale nada a la red
+SCRAPER_FIXTURES_LATENCY_MS="50-200" agrega latencia simulada en replay
+
+Cada respuesta queda en <clave>.json (url, status, headers) + <clave>.body,
+donde la clave es un hash de método + URL (+ cuerpo en POST). Los
+parámetros que cambian en cada carga (_reqid, zx, ...) no entran en la
+clave, y si aun así no hay coincidencia exacta se usa la última respuesta
+grabada para el mismo método + ruta.
+
+Uso:
+    SCRAPER_FIXTURES=record python scripts/fixture_replay.py
+    SCRAPER_FIXTURES=replay SCRAPER_FIXTURES_LATENCY_MS=100 python scripts/fixture_replay.py
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import os
+import random
+import sys
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from scrape_log import get_logger
+
+log = get_logger(__name__)
+
+DEFAULT_FIXTURES_DIR = 'fixtures'
+
+MODE_RECORD = 'record'
+MODE_REPLAY = 'replay'
+
+# Parámetros de query que cambian en cada carga sin cambiar la respuesta
+VOLATILE_PARAMS = {'_reqid', 'zx', '_', 'cb', 'f.sid'}
+
+# El cuerpo se guarda ya decodificado, así que estos headers ya no aplican
+DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+def fixtures_mode():
+    """
+    'record', 'replay' o None (SCRAPER_FIXTURES).
+    """
+    mode = os.environ.get('SCRAPER_FIXTURES', '').strip().lower()
+    if mode in (MODE_RECORD, MODE_REPLAY):
+        return mode
+    if mode:
+        log.warning(f"⚠ SCRAPER_FIXTURES inválido: '{mode}'")
+    return None
+
+def latency_range():
+    """
+    Rango (min, max) en segundos de SCRAPER_FIXTURES_LATENCY_MS ("100" o "50-200").
+    """
+    raw = os.environ.get('SCRAPER_FIXTURES_LATENCY_MS', '0').strip()
+    try:
+        if '-' in raw:
+            low, high = (float(part) for part in raw.split('-', 1))
+        else:
+            low = high = float(raw)
+    except ValueError:
+        log.warning(f"⚠ SCRAPER_FIXTURES_LATENCY_MS inválido: '{raw}'")
+        return 0.0, 0.0
+    low, high = max(0.0, low) / 1000, max(0.0, high) / 1000
+    return min(low, high), max(low, high)
+
+def replay_latency():
+    low, high = latency_range()
+    return random.uniform(low, high) if high > 0 else 0.0
+
+def stable_url(url):
+    """
+    URL sin fragmento y sin parámetros volátiles, con la query ordenada.
+    """
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in VOLATILE_PARAMS)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))
+
+def path_key(method, url):
+    parts = urlsplit(url)
+    return f"{method.upper()} {parts.scheme}://{parts.netloc}{parts.path}"
+
+def fixture_key(method, url, body=None):
+    digest = hashlib.sha1(f"{method.upper()} {stable_url(url)}".encode('utf-8'))
+    if body and method.upper() != 'GET':
+        digest.update(body if isinstance(body, bytes) else str(body).encode('utf-8'))
+    return digest.hexdigest()[:24]
+
+class FixtureStore:
+    """
+    Directorio de respuestas grabadas.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.environ.get('SCRAPER_FIXTURES_DIR', DEFAULT_FIXTURES_DIR)
+        self._by_path = None
+        self.hits = 0
+        self.misses = 0
+
+    def save(self, method, url, status, headers, body, request_body=None):
+        os.makedirs(self.directory, exist_ok=True)
+        key = fixture_key(method, url, request_body)
+        meta = {
+            "method": method.upper(),
+            "url": url,
+            "path_key": path_key(method, url),
+            "status": status,
+            "headers": {k: v for k, v in headers.items() if k.lower() not in DROPPED_HEADERS},
+            "recorded_at": time.time(),
+        }
+        with open(os.path.join(self.directory, f"{key}.body"), 'wb') as f:
+            f.write(body or b'')
+        with open(os.path.join(self.directory, f"{key}.json"), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        self._by_path = None
+        return key
+
+    def _path_index(self):
+        """
+        {método + ruta: clave más reciente}, para URLs con query distinta.
+        """
+        if self._by_path is None:
+            latest = {}
+            if os.path.isdir(self.directory):
+                for name in os.listdir(self.directory):
+                    if not name.endswith('.json'):
+                        continue
+                    try:
+                        with open(os.path.join(self.directory, name), encoding='utf-8') as f:
+                            meta = json.load(f)
+                    except (OSError, ValueError):
+                        continue
+                    current = latest.get(meta.get('path_key'))
+                    if current is None or meta.get('recorded_at', 0) > current[0]:
+                        latest[meta.get('path_key')] = (meta.get('recorded_at', 0), name[:-5])
+            self._by_path = {path: key for path, (_, key) in latest.items()}
+        return self._by_path
+
+    def load(self, method, url, request_body=None):
+        """
+        Retorna (meta, body) o None si no hay nada grabado para la petición.
+        """
+        key = fixture_key(method, url, request_body)
+        if not os.path.exists(os.path.join(self.directory, f"{key}.json")):
+            key = self._path_index().get(path_key(method, url))
+        if key is None:
+            self.misses += 1
+            return None
+        with open(os.path.join(self.directory, f"{key}.json"), encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(os.path.join(self.directory, f"{key}.body"), 'rb') as f:
+            body = f.read()
+        self.hits += 1
+        return meta, body
+
+_store = None
+
+def get_fixture_store():
+    global _store
+    directory = os.environ.get('SCRAPER_FIXTURES_DIR', DEFAULT_FIXTURES_DIR)
+    if _store is None or _store.directory != directory:
+        _store = FixtureStore(directory)
+    return _store
+
+
+class FixtureAdapter(HTTPAdapter):
+    """
+    Adaptador de requests que graba o sirve fixtures según el modo.
+    """
+
+    def __init__(self, mode, store=None, **kwargs):
+        super().__init__(**kwargs)
+        self.mode = mode
+        self.store = store or get_fixture_store()
+
+    def send(self, request, **kwargs):
+        if self.mode == MODE_REPLAY:
+            fixture = self.store.load(request.method, request.url, request.body)
+            delay = replay_latency()
+            if delay:
+                time.sleep(delay)
+            if fixture is None:
+                raise requests.exceptions.ConnectionError(f"Sin fixture para {request.method} {request.url}", request=request)
+            return self.build_fixture_response(request, *fixture)
+
+        response = super().send(request, **kwargs)
+        body = response.content
+        self.store.save(request.method, request.url, response.status_code, response.headers, body, request.body)
+        return response
+
+    def build_fixture_response(self, request, meta, body):
+        response = requests.Response()
+        response.status_code = meta['status']
+        response.headers = CaseInsensitiveDict(meta['headers'])
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        response.reason = 'OK' if meta['status'] < 400 else 'Fixture'
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        return response
+
+def http_client(session=None):
+    """
+    Lo que los scrapers usan para hacer GET: la sesión recibida (o el módulo
+    requests) y, con SCRAPER_FIXTURES activo, una sesión con FixtureAdapter.
+    """
+    mode = fixtures_mode()
+    if mode is None:
+        return session or requests
+    session = session or requests.Session()
+    adapter = FixtureAdapter(mode)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+async def install_fixtures(context, store=None, mode=None):
+    """
+    Engancha el modo de fixtures en un BrowserContext. En replay, las rutas
+    de página (p.ej. ResourceBlocker) se evalúan primero y lo que dejan
+    pasar con route.fallback() llega aquí.
+    """
+    mode = mode or fixtures_mode()
+    if mode is None:
+        return None
+    store = store or get_fixture_store()
+
+    if mode == MODE_REPLAY:
+        async def handle_route(route):
+            request = route.request
+            fixture = store.load(request.method, request.url, request.post_data_buffer)
+            delay = replay_latency()
+            if delay:
+                await asyncio.sleep(delay)
+            if fixture is None:
+                await route.abort('internetdisconnected')
+                return
+            meta, body = fixture
+            await route.fulfill(status=meta['status'], headers=meta['headers'], body=body)
+
+        await context.route('**/*', handle_route)
+        return store
+
+    async def on_response(response):
+        request = response.request
+        try:
+            body = await response.body()
+        except Exception:
+            # Redirecciones y respuestas sin cuerpo
+            return
+        headers = await response.all_headers()
+        store.save(request.method, response.url, response.status, headers, body, request.post_data_buffer)
+        # La navegación original pudo redirigir: grabar también la URL pedida
+        previous = request.redirected_from
+        while previous is not None:
+            store.save(previous.method, previous.url, response.status, headers, body, previous.post_data_buffer)
+            previous = previous.redirected_from
+
+    context.on('response', on_response)
+    return store
+
+async def run_scrapers():
+    """
+    Corre los tres scrapers de punta a punta (sin publicar) y mide cada uno.
+    """
+    from scrape_gt_trends import scrape_google_trends_mexico
+    from scrape_tw_trends_1 import scrape_twitter_trending_mexico
+    from scrape_tw_trends_2 import scrape_twitter_trends_mexico
+
+    results = {}
+    for name, run in [
+        ('google_trends', scrape_google_trends_mexico),
+        ('twitter_trending_com', lambda: scrape_twitter_trending_mexico(conditional=False)),
+        ('xtrends', lambda: asyncio.to_thread(scrape_twitter_trends_mexico, False, False)),
+    ]:
+        start = time.perf_counter()
+        data = await run()
+        results[name] = (data, time.perf_counter() - start)
+    return results
+
+if __name__ == "__main__":
+    mode = fixtures_mode()
+    if mode is None:
+        sys.exit("Define SCRAPER_FIXTURES=record o SCRAPER_FIXTURES=replay")
+
+    results = asyncio.run(run_scrapers())
+    store = get_fixture_store()
+    log.info(f"========== FIXTURES ({mode}) en {store.directory} ==========")
+    for name, (data, seconds) in results.items():
+        log.info(f"{name:<22} {seconds:6.2f}s  {data['status']}, {data['total_trends']} tendencias")
+    if mode == MODE_REPLAY:
+        (log.warning if store.misses else log.info)(f"Fixtures servidos: {store.hits}, sin grabar: {store.misses}")
@@ -0,0 +1,145 @@
+"""
+Serialización de los JSON publicados y escritura atómica con hermanos
+precomprimidos.
+
+Backend más rápido disponible: orjson > msgspec > json (stdlib). Los tres
+producen UTF-8 sin escapar (como ensure_ascii=False) e indentación de 2
+espacios cuando se pide, así que el archivo es el mismo con cualquiera.
+SCRAPER_JSON_BACKEND=json fuerza la librería estándar.
+
+write_published() deja junto al JSON un .gz y un .br (si está instalado
+brotli) para que un servidor estático sirva bytes ya comprimidos. Cada
+archivo se escribe aparte y se renombra, así que nunca se lee uno a medias.
+SCRAPER_PRECOMPRESS elige los formatos (por defecto "gz,br"; '' para no
+comprimir).
+
+Uso:
+    payload = dumps(data, indent=True)
+    write_published('twitter_trends_data.json', payload)
+"""
+
+import gzip
+import json
+import os
+from scrape_log import get_logger
+
+# Backends opcionales, igual que los parsers HTML de scrape_tw_trends_2
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+log = get_logger(__name__)
+
+BACKENDS = [name for name, module in [("orjson", orjson), ("msgspec", msgspec), ("json", json)] if module is not None]
+DEFAULT_BACKEND = BACKENDS[0]
+
+DEFAULT_PRECOMPRESS = 'gz,br'
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+def json_backend():
+    """
+    Backend en uso: SCRAPER_JSON_BACKEND si está disponible, o el más rápido.
+    """
+    wanted = os.environ.get('SCRAPER_JSON_BACKEND', '').strip().lower()
+    if not wanted:
+        return DEFAULT_BACKEND
+    if wanted not in BACKENDS:
+        log.warning(f"⚠ SCRAPER_JSON_BACKEND '{wanted}' no disponible, se usa {DEFAULT_BACKEND}")
+        return DEFAULT_BACKEND
+    return wanted
+
+def dumps(obj, indent=False, backend=None):
+    """
+    obj -> bytes UTF-8. indent=True usa 2 espacios (el formato v1 de siempre).
+    Si el backend rápido no puede con el objeto (p.ej. enteros de más de
+    64 bits), cae a la librería estándar.
+    """
+    backend = backend or json_backend()
+    try:
+        if backend == "orjson":
+            option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+            return orjson.dumps(obj, option=option)
+        if backend == "msgspec":
+            encoded = msgspec.json.encode(obj)
+            return msgspec.json.format(encoded, indent=2) if indent else encoded
+    except (TypeError, ValueError, OverflowError):
+        pass
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def loads(data, backend=None):
+    """
+    bytes o str -> objeto.
+    """
+    backend = backend or json_backend()
+    if backend == "orjson":
+        return orjson.loads(data)
+    if backend == "msgspec":
+        return msgspec.json.decode(data)
+    return json.loads(data)
+
+def precompress_formats():
+    """
+    Formatos pedidos en SCRAPER_PRECOMPRESS que se pueden producir aquí.
+    """
+    raw = os.environ.get('SCRAPER_PRECOMPRESS', DEFAULT_PRECOMPRESS)
+    formats = [f.strip().lower().lstrip('.') for f in raw.split(',') if f.strip()]
+    if 'br' in formats and brotli is None:
+        formats.remove('br')
+    return [f for f in formats if f in ('gz', 'br')]
+
+def compress(payload, fmt):
+    if fmt == 'gz':
+        # mtime=0: el mismo JSON produce siempre el mismo .gz
+        return gzip.compress(payload, compresslevel=GZIP_LEVEL, mtime=0)
+    return brotli.compress(payload, quality=BROTLI_QUALITY)
+
+def decompress(payload, fmt):
+    if fmt == 'gz':
+        return gzip.decompress(payload)
+    return brotli.decompress(payload)
+
+def write_atomic(path, payload):
+    """
+    Escribe en path.tmp y renombra: quien lea path ve el archivo viejo o el
+    nuevo completo, nunca uno a medias.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+    return len(payload)
+
+def write_published(path, payload, formats=None):
+    """
+    Escribe el JSON y sus hermanos comprimidos (path.gz, path.br). Los
+    comprimidos van primero y el JSON al final; un hermano de un formato que
+    ya no se produce se borra para que no sirva datos viejos.
+    Retorna {ruta: bytes escritos}.
+    """
+    formats = precompress_formats() if formats is None else formats
+    written = {}
+    for fmt in ('gz', 'br'):
+        sibling = f"{path}.{fmt}"
+        if fmt in formats:
+            written[sibling] = write_atomic(sibling, compress(payload, fmt))
+        elif os.path.exists(sibling):
+            os.remove(sibling)
+    written[path] = write_atomic(path, payload)
+    return written
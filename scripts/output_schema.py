@@ -0,0 +1,215 @@
+"""
+Formatos de los JSON publicados.
+
+v1 (por defecto) es el formato histórico que leen los dashboards: cada
+tiempo es un bloque {timestamp_iso, day, month, year, hour, minute} y cada
+tendencia repite su propio trend_time_mexico. Se escribe con indent=2.
+
+v2 (opt-in con SCRAPER_OUTPUT_SCHEMA=2) guarda lo mismo en forma compacta:
+- los tiempos son epoch en segundos más un solo campo "tz"
+- las tendencias van por columnas: {"rank": [...], "term": [...], ...}
+  y trend_time_mexico es una columna de epochs
+- se escribe sin indentación
+
+    {"schema": 2, "tz": "America/Mexico_City", "scraped_at": 1762119276,
+     "source_updated_at": 1762118976, "source_minutes_ago": 5, ...,
+     "trends": {"rank": [1, 2], "term": ["a", "b"], "trend_time_mexico": [...]}}
+
+read_snapshot() devuelve siempre un documento v1 y read_columns() uno v2,
+sin importar con qué versión se escribió el archivo. Los tiempos vuelven
+con precisión de segundos, y una clave que faltaba en algunas tendencias
+vuelve como null en ellas.
+
+Uso:
+    SCRAPER_OUTPUT_SCHEMA=2 python scripts/run_all.py
+    data = load_snapshot('twitter_trends_data.json')     # v1 o v2 -> v1
+    columns = load_columns('twitter_trends_data.json')   # v1 o v2 -> v2
+"""
+
+import os
+from datetime import datetime
+import pytz
+from json_codec import dumps, loads
+from scrape_log import get_logger
+from trend_store import iso_to_epoch
+
+log = get_logger(__name__)
+
+SCHEMA_V1 = 1
+SCHEMA_V2 = 2
+
+DEFAULT_TZ = 'America/Mexico_City'
+
+# Descripciones fijas de los bloques de tiempo de Twitter: en v2 solo se
+# guardan si el scraper puso otra
+TIME_DESCRIPTIONS = {
+    "scraping_time": "Hora en la que se ejecutó el scraping",
+    "data_source_updated_time": "Hora en la que la fuente actualizó los datos por última vez",
+}
+
+# Columnas de tendencias que son bloques de tiempo en v1
+TREND_TIME_COLUMNS = ('trend_time_mexico',)
+
+def output_schema_version():
+    """
+    1 o 2 según SCRAPER_OUTPUT_SCHEMA (acepta "2" o "v2").
+    """
+    raw = os.environ.get('SCRAPER_OUTPUT_SCHEMA', '').strip().lower().lstrip('v')
+    if not raw:
+        return SCHEMA_V1
+    if raw in ('1', '2'):
+        return int(raw)
+    log.warning(f"⚠ SCRAPER_OUTPUT_SCHEMA inválido: '{raw}', se usa v1")
+    return SCHEMA_V1
+
+def is_v2(doc):
+    return isinstance(doc, dict) and doc.get('schema') == SCHEMA_V2
+
+def time_block(epoch, tz_name, **extra):
+    """
+    Bloque de tiempo v1 para un epoch, en la zona horaria indicada.
+    """
+    if epoch is None:
+        return None
+    moment = datetime.fromtimestamp(epoch, pytz.timezone(tz_name))
+    return {
+        "timestamp_iso": moment.isoformat(),
+        "day": moment.day,
+        "month": moment.month,
+        "year": moment.year,
+        "hour": moment.hour,
+        "minute": moment.minute,
+        **extra,
+    }
+
+def block_epoch(block):
+    if isinstance(block, dict):
+        return iso_to_epoch(block.get('timestamp_iso'))
+    return iso_to_epoch(block)
+
+def trends_to_columns(trends):
+    """
+    [{rank, term, ...}, ...] -> {"rank": [...], "term": [...], ...}
+    """
+    keys = []
+    for trend in trends:
+        for key in trend:
+            if key not in keys:
+                keys.append(key)
+    columns = {}
+    for key in keys:
+        values = [trend.get(key) for trend in trends]
+        if key in TREND_TIME_COLUMNS:
+            values = [block_epoch(value) for value in values]
+        columns[key] = values
+    return columns
+
+def columns_to_trends(columns, tz_name=DEFAULT_TZ):
+    """
+    Inverso de trends_to_columns(): reconstruye la lista de tendencias v1.
+    """
+    if not columns:
+        return []
+    decoded = {}
+    for key, values in columns.items():
+        if key in TREND_TIME_COLUMNS:
+            values = [time_block(value, tz_name) for value in values]
+        decoded[key] = values
+    length = max(len(values) for values in decoded.values())
+    return [{key: values[i] if i < len(values) else None for key, values in decoded.items()} for i in range(length)]
+
+def to_v2(data, tz_name=DEFAULT_TZ):
+    """
+    Documento v1 (el dict que arma cada scraper) -> v2. Si ya es v2 lo
+    retorna tal cual.
+    """
+    if is_v2(data):
+        return data
+    doc = {"schema": SCHEMA_V2, "tz": tz_name}
+    descriptions = {}
+    for key, value in data.items():
+        if key == 'trends':
+            doc['trends'] = trends_to_columns(value or [])
+        elif key in ('scraping_time', 'timestamp_mexico'):
+            doc['scraped_at'] = block_epoch(value)
+        elif key == 'data_source_updated_time':
+            doc['source_updated_at'] = block_epoch(value)
+            doc['source_minutes_ago'] = (value or {}).get('minutes_ago')
+        elif key == 'timestamp_local':
+            doc['local_tz'] = (value or {}).get('timezone')
+        elif key == 'timestamp':
+            # Google Trends: la misma hora que timestamp_mexico, sin zona
+            doc.setdefault('scraped_at', block_epoch(value))
+        else:
+            doc[key] = value
+        default_description = TIME_DESCRIPTIONS.get(key)
+        if default_description and isinstance(value, dict) and value.get('description', default_description) != default_description:
+            descriptions[key] = value['description']
+    if descriptions:
+        doc['descriptions'] = descriptions
+    return doc
+
+def from_v2(doc):
+    """
+    Documento v2 -> v1, con las mismas claves que escribía el scraper.
+    Si ya es v1 lo retorna tal cual.
+    """
+    if not is_v2(doc):
+        return doc
+    tz_name = doc.get('tz') or DEFAULT_TZ
+    descriptions = doc.get('descriptions') or {}
+    scraped_at = doc.get('scraped_at')
+    data = {}
+
+    if doc.get('local_tz'):
+        # Google Trends: timestamp sin zona (hora del servidor), México y local
+        data['timestamp'] = datetime.fromtimestamp(scraped_at).isoformat() if scraped_at is not None else None
+        data['timestamp_mexico'] = time_block(scraped_at, tz_name)
+        data['timestamp_local'] = time_block(scraped_at, doc['local_tz'], timezone=doc['local_tz'])
+    else:
+        data['scraping_time'] = time_block(
+            scraped_at, tz_name,
+            description=descriptions.get('scraping_time', TIME_DESCRIPTIONS['scraping_time'])
+        )
+        if 'source_updated_at' in doc:
+            data['data_source_updated_time'] = time_block(
+                doc['source_updated_at'], tz_name,
+                minutes_ago=doc.get('source_minutes_ago'),
+                description=descriptions.get('data_source_updated_time', TIME_DESCRIPTIONS['data_source_updated_time'])
+            )
+
+    for key, value in doc.items():
+        if key in ('schema', 'tz', 'scraped_at', 'source_updated_at', 'source_minutes_ago', 'local_tz', 'descriptions'):
+            continue
+        data[key] = columns_to_trends(value, tz_name) if key == 'trends' else value
+    return data
+
+def read_snapshot(doc):
+    """
+    Cualquier versión -> v1.
+    """
+    return from_v2(doc)
+
+def read_columns(doc):
+    """
+    Cualquier versión -> v2 (columnas), para análisis sobre muchos snapshots.
+    """
+    return to_v2(doc)
+
+def dump_snapshot(data, schema=None):
+    """
+    Bytes JSON del documento en la versión pedida (por defecto la de
+    SCRAPER_OUTPUT_SCHEMA), con el backend de json_codec.
+    """
+    schema = schema or output_schema_version()
+    if schema == SCHEMA_V2:
+        return dumps(to_v2(data))
+    return dumps(data, indent=True)
+
+def load_snapshot(path):
+    with open(path, 'rb') as f:
+        return read_snapshot(loads(f.read()))
+
+def load_columns(path):
+    with open(path, 'rb') as f:
+        return read_columns(loads(f.read()))
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import random
+import time
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from scrape_log import get_logger
+
+log = get_logger(__name__)
+
+# Esperas guiadas por condiciones: terminan en cuanto la página está lista y
+# solo llegan al límite (deadline) si la condición nunca se cumple.
+
+async def wait_for_selector_count(page, selector, min_count, timeout_ms=15000):
+    """
+    Espera hasta que haya al menos min_count elementos que coincidan con
+    selector. Retorna cuántos había al terminar (aunque se agote el tiempo).
+    """
+    start = time.perf_counter()
+    try:
+        await page.wait_for_function(
+            "([selector, minCount]) => document.querySelectorAll(selector).length >= minCount",
+            arg=[selector, min_count],
+            timeout=timeout_ms
+        )
+    except PlaywrightTimeoutError:
+        log.warning(f"⚠ Tiempo agotado esperando {min_count}x '{selector}' ({timeout_ms} ms)")
+    count = await page.locator(selector).count()
+    log.debug("Listo: %dx '%s' en %.2fs", count, selector, time.perf_counter() - start)
+    return count
+
+async def wait_for_json_ld(page, timeout_ms=20000):
+    """
+    Espera a que exista el <script type="application/ld+json">. Sobrevive a
+    las recargas que hace Cloudflare al resolver su desafío.
+    """
+    start = time.perf_counter()
+    try:
+        await page.wait_for_selector('script[type="application/ld+json"]', state='attached', timeout=timeout_ms)
+    except PlaywrightTimeoutError:
+        log.warning(f"⚠ Tiempo agotado esperando JSON-LD ({timeout_ms} ms)")
+        return False
+    log.debug("JSON-LD presente en %.2fs", time.perf_counter() - start)
+    return True
+
+async def wait_for_network_idle(page, timeout_ms=5000):
+    """
+    Espera a que la red quede inactiva, con límite. Retorna False si no se logró.
+    """
+    try:
+        await page.wait_for_load_state('networkidle', timeout=timeout_ms)
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+def politeness_delay_range():
+    """
+    Rango (min, max) en segundos de la pausa de cortesía antes de cada
+    navegación, desde SCRAPER_POLITENESS_DELAY ("1-3", "2" o "0").
+    Por defecto no hay pausa.
+    """
+    raw = os.environ.get("SCRAPER_POLITENESS_DELAY", "0").strip()
+    try:
+        if "-" in raw:
+            low, high = (float(part) for part in raw.split("-", 1))
+        else:
+            low = high = float(raw)
+    except ValueError:
+        log.warning(f"⚠ SCRAPER_POLITENESS_DELAY inválido: '{raw}'")
+        return 0.0, 0.0
+    low, high = max(0.0, low), max(0.0, high)
+    return min(low, high), max(low, high)
+
+async def politeness_delay():
+    """
+    Pausa de cortesía opcional (configurada aparte de las esperas de carga).
+    """
+    low, high = politeness_delay_range()
+    if high <= 0:
+        return 0.0
+    delay = random.uniform(low, high)
+    await asyncio.sleep(delay)
+    return delay
@@ -0,0 +1,180 @@
+from fnmatch import fnmatch
+from urllib.parse import urlsplit
+import os
+from scrape_log import get_logger
+
+log = get_logger(__name__)
+
+# Hosts de anuncios, analítica y tracking que nunca aportan datos de tendencias
+TRACKER_HOSTS = [
+    "doubleclick.net",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googletagservices.com",
+    "adservice.google.com",
+    "facebook.net",
+    "connect.facebook.net",
+    "hotjar.com",
+    "scorecardresearch.com",
+    "quantserve.com",
+    "adnxs.com",
+    "amazon-adsystem.com",
+    "criteo.com",
+    "criteo.net",
+    "taboola.com",
+    "outbrain.com",
+    "pubmatic.com",
+    "rubiconproject.com",
+    "cloudflareinsights.com",
+    "clarity.ms",
+]
+
+# Tamaño típico por tipo de recurso: los bloqueados nunca se descargan, así que
+# el ahorro en bytes es una estimación.
+TYPICAL_BYTES = {
+    "image": 25_000,
+    "media": 250_000,
+    "font": 35_000,
+    "stylesheet": 20_000,
+    "script": 40_000,
+    "xhr": 3_000,
+    "fetch": 3_000,
+    "other": 5_000,
+}
+
+def host_matches(host, pattern):
+    """
+    'example.com' coincide con example.com y sus subdominios; también se
+    aceptan comodines estilo fnmatch ('ads.*.com').
+    """
+    if not host:
+        return False
+    host = host.lower()
+    pattern = pattern.lower()
+    if any(c in pattern for c in "*?["):
+        return fnmatch(host, pattern)
+    return host == pattern or host.endswith("." + pattern)
+
+class BlockRules:
+    """
+    Reglas de permitir/bloquear por tipo de recurso de Playwright
+    (image, font, media, stylesheet, script, xhr, ...) y por host.
+
+    Precedencia: allow_hosts > block_hosts > allow_types > block_types.
+    El documento principal nunca se bloquea.
+    """
+
+    def __init__(self, block_types=(), block_hosts=(), allow_types=(), allow_hosts=()):
+        self.block_types = frozenset(block_types)
+        self.block_hosts = tuple(block_hosts)
+        self.allow_types = frozenset(allow_types)
+        self.allow_hosts = tuple(allow_hosts)
+
+    def extended(self, block_types=(), block_hosts=(), allow_types=(), allow_hosts=()):
+        """
+        Copia de las reglas con entradas adicionales.
+        """
+        return BlockRules(
+            self.block_types | set(block_types),
+            self.block_hosts + tuple(block_hosts),
+            self.allow_types | set(allow_types),
+            self.allow_hosts + tuple(allow_hosts),
+        )
+
+    def should_block(self, resource_type, host):
+        if resource_type == "document":
+            return False
+        if any(host_matches(host, p) for p in self.allow_hosts):
+            return False
+        if any(host_matches(host, p) for p in self.block_hosts):
+            return True
+        if resource_type in self.allow_types:
+            return False
+        return resource_type in self.block_types
+
+# Google Trends arma la lista con JavaScript: se necesitan sus scripts y XHR.
+# Las hojas de estilo se dejan pasar para no alterar el render perezoso.
+GOOGLE_TRENDS_RULES = BlockRules(
+    block_types={"image", "media", "font"},
+    block_hosts=TRACKER_HOSTS,
+)
+
+# twitter-trending.com: solo interesa el HTML/JSON-LD, pero los scripts se
+# permiten porque el desafío de Cloudflare depende de ellos.
+TWITTER_TRENDING_RULES = BlockRules(
+    block_types={"image", "media", "font", "stylesheet"},
+    block_hosts=TRACKER_HOSTS,
+    allow_hosts=["challenges.cloudflare.com"],
+)
+
+def blocking_enabled():
+    """
+    SCRAPER_BLOCK_RESOURCES=0 desactiva el bloqueo (útil para depurar).
+    """
+    return os.environ.get("SCRAPER_BLOCK_RESOURCES", "1").strip().lower() not in ("0", "false", "no")
+
+class ResourceBlocker:
+    """
+    Intercepta las peticiones de una página o contexto con page.route() y
+    aborta las que las reglas bloquean. Lleva la cuenta de peticiones y bytes
+    descargados y ahorrados para el reporte de cada corrida.
+
+    Las peticiones permitidas siguen con route.fallback(), así otros
+    handlers registrados (p.ej. replay de fixtures) también pueden atenderlas.
+    """
+
+    def __init__(self, rules, enabled=None):
+        self.rules = rules
+        self.enabled = blocking_enabled() if enabled is None else enabled
+        self.requests_allowed = 0
+        self.requests_blocked = 0
+        self.blocked_by_type = {}
+        self.bytes_downloaded = 0
+        self.bytes_saved_estimate = 0
+
+    async def install(self, target):
+        """
+        Registra el handler en una Page o BrowserContext de Playwright.
+        """
+        target.on("requestfinished", self._on_request_finished)
+        if self.enabled:
+            await target.route("**/*", self._handle_route)
+        return self
+
+    async def _handle_route(self, route):
+        request = route.request
+        resource_type = request.resource_type
+        if self.rules.should_block(resource_type, urlsplit(request.url).hostname):
+            self.requests_blocked += 1
+            self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + 1
+            self.bytes_saved_estimate += TYPICAL_BYTES.get(resource_type, TYPICAL_BYTES["other"])
+            await route.abort("blockedbyclient")
+        else:
+            await route.fallback()
+
+    async def _on_request_finished(self, request):
+        self.requests_allowed += 1
+        try:
+            sizes = await request.sizes()
+            self.bytes_downloaded += sizes.get("responseBodySize", 0) + sizes.get("responseHeadersSize", 0)
+        except Exception:
+            pass
+
+    def summary(self):
+        return {
+            "blocking_enabled": self.enabled,
+            "requests_allowed": self.requests_allowed,
+            "requests_blocked": self.requests_blocked,
+            "blocked_by_type": dict(self.blocked_by_type),
+            "bytes_downloaded": self.bytes_downloaded,
+            "bytes_saved_estimate": self.bytes_saved_estimate,
+        }
+
+    def log_summary(self, label):
+        log.info(
+            f"[{label}] Red: {self.requests_allowed} peticiones descargadas "
+            f"({self.bytes_downloaded / 1024:.0f} KB), {self.requests_blocked} bloqueadas "
+            f"(~{self.bytes_saved_estimate / 1024:.0f} KB ahorrados)"
+        )
@@ -0,0 +1,358 @@
+"""
+Estadísticas por término en ventanas móviles (24h y 7d), actualizadas con
+cada snapshot en lugar de recalcularse sobre todo el histórico.
+
+Por fuente/país/ventana de la fuente y por período se guarda, en el mismo
+SQLite que trend_store:
+
+    rolling_buckets   un bloque por término y hora (24h) o por 6 horas (7d):
+                      segundos en el top 10, mejor rank, volumen pico,
+                      primera y última vez visto
+    rolling_terms     el agregado de los bloques vigentes de cada término más
+                      su rank actual, el anterior y el cambio entre ambos
+
+Cada snapshot toca solo los bloques de sus tendencias y los bloques que
+salen de la ventana (que se borran), y reagrega los términos afectados a
+partir de sus bloques (24 o 28 como máximo): el costo no depende de cuánto
+histórico haya. Leer los que más suben ahora es una consulta por índice
+sobre rolling_terms.
+
+El tiempo desde el snapshot anterior se le acredita a la lista anterior,
+que es la que estuvo vigente en ese intervalo (repartido entre los bloques
+que cruza); un hueco mayor que MAX_GAP_SECONDS no se acredita a nadie. Un
+latido "unchanged" suma ese tiempo a la lista vigente sin tocar los ranks. La ventana tiene la granularidad de sus bloques: "24h" son
+entre 24 y 25 horas.
+
+Uso:
+    python scripts/rolling_stats.py --source xtrends --geo MX --period 24h
+    python scripts/rolling_stats.py --source google_trends --timeframe 24h --rebuild
+
+    with TrendStore() as store:
+        top_movers(store, SOURCE_XTRENDS, 'MX', period='24h', limit=10)
+"""
+
+import argparse
+import sys
+from trend_store import TrendStore, trend_row, epoch_to_iso, SOURCE_XTRENDS
+
+# período -> (segundos de la ventana, segundos por bloque)
+PERIODS = {
+    '24h': (24 * 3600, 3600),
+    '7d': (7 * 24 * 3600, 6 * 3600),
+}
+TOP_N = 10
+# Un hueco mayor (corridas que fallaron) no cuenta como tiempo en el top:
+# se descarta entero
+MAX_GAP_SECONDS = 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rolling_state (
+    source TEXT NOT NULL,
+    geo TEXT NOT NULL,
+    timeframe TEXT NOT NULL DEFAULT '',
+    last_snapshot_at INTEGER,
+    PRIMARY KEY (source, geo, timeframe)
+);
+
+CREATE TABLE IF NOT EXISTS rolling_buckets (
+    source TEXT NOT NULL,
+    geo TEXT NOT NULL,
+    timeframe TEXT NOT NULL DEFAULT '',
+    period TEXT NOT NULL,
+    term_id INTEGER NOT NULL REFERENCES terms (id),
+    bucket_start INTEGER NOT NULL,
+    top_seconds INTEGER NOT NULL DEFAULT 0,
+    peak_rank INTEGER,
+    peak_volume INTEGER,
+    first_seen INTEGER,
+    last_seen INTEGER,
+    PRIMARY KEY (source, geo, timeframe, period, term_id, bucket_start)
+);
+
+CREATE INDEX IF NOT EXISTS idx_rolling_buckets_expiry
+    ON rolling_buckets (source, geo, timeframe, period, bucket_start);
+
+CREATE TABLE IF NOT EXISTS rolling_terms (
+    source TEXT NOT NULL,
+    geo TEXT NOT NULL,
+    timeframe TEXT NOT NULL DEFAULT '',
+    period TEXT NOT NULL,
+    term_id INTEGER NOT NULL REFERENCES terms (id),
+    top_seconds INTEGER NOT NULL DEFAULT 0,
+    peak_rank INTEGER,
+    peak_volume INTEGER,
+    first_seen INTEGER,
+    last_seen INTEGER,
+    rank INTEGER,
+    previous_rank INTEGER,
+    rank_change INTEGER,
+    PRIMARY KEY (source, geo, timeframe, period, term_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_rolling_terms_rank
+    ON rolling_terms (source, geo, timeframe, period, rank);
+
+CREATE INDEX IF NOT EXISTS idx_rolling_terms_movers
+    ON rolling_terms (source, geo, timeframe, period, rank_change);
+"""
+
+KEY = 'source = ? AND geo = ? AND timeframe = ? AND period = ?'
+
+def ensure_schema(store):
+    if not getattr(store, '_rolling_schema', False):
+        store.conn.executescript(SCHEMA)
+        store._rolling_schema = True
+
+def known_volume(volume):
+    return volume if isinstance(volume, (int, float)) and volume > 0 else None
+
+def split_interval(start, end, bucket):
+    """
+    [(inicio del bloque, segundos)] del intervalo [start, end) repartido
+    entre los bloques que cruza.
+    """
+    parts = []
+    while start < end:
+        bucket_start = start - start % bucket
+        stop = min(end, bucket_start + bucket)
+        parts.append((bucket_start, stop - start))
+        start = stop
+    return parts
+
+def record_rolling(store, source, geo, timeframe, scraped_at, trends=None):
+    """
+    Agrega un snapshot a las ventanas. trends=None es un latido sin cambios
+    (la lista vigente sigue igual). Los snapshots que no son más nuevos que
+    el último agregado se ignoran. Retorna cuántos términos se reagregaron.
+    """
+    ensure_schema(store)
+    conn = store.conn
+    timeframe = timeframe or ''
+    with conn:
+        state = conn.execute(
+            'SELECT last_snapshot_at FROM rolling_state WHERE source = ? AND geo = ? AND timeframe = ?',
+            (source, geo, timeframe)
+        ).fetchone()
+        last = state['last_snapshot_at'] if state else None
+        if last is not None and scraped_at <= last:
+            return 0
+        # El intervalo desde el snapshot anterior, o ninguno si fue un hueco
+        credited = last is not None and scraped_at - last <= MAX_GAP_SECONDS
+
+        if trends is not None:
+            rows = [trend_row(t) for t in trends]
+            rows = [(rank, term, known_volume(volume)) for rank, term, volume, _, _ in rows if term and rank is not None]
+            ids = store.intern_terms([term for _, term, _ in rows])
+            current = {}
+            for rank, term, volume in rows:
+                current.setdefault(ids[term], (rank, volume))
+
+        touched = 0
+        for period, (length, bucket) in PERIODS.items():
+            key = (source, geo, timeframe, period)
+            previous = {
+                row['term_id']: row['rank']
+                for row in conn.execute(f'SELECT term_id, rank FROM rolling_terms WHERE {KEY} AND rank IS NOT NULL', key)
+            }
+            listed = current if trends is not None else {term_id: (rank, None) for term_id, rank in previous.items()}
+
+            # El tiempo en el top es de la lista que estuvo vigente hasta ahora
+            in_top = [term_id for term_id, rank in previous.items() if rank <= TOP_N] if credited else []
+            bucket_start = scraped_at - scraped_at % bucket
+            conn.executemany(
+                'INSERT INTO rolling_buckets (source, geo, timeframe, period, term_id, bucket_start, '
+                'top_seconds, peak_rank, peak_volume, first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (source, geo, timeframe, period, term_id, bucket_start) DO UPDATE SET '
+                'top_seconds = top_seconds + excluded.top_seconds, '
+                'peak_rank = MIN(COALESCE(peak_rank, excluded.peak_rank), COALESCE(excluded.peak_rank, peak_rank)), '
+                'peak_volume = MAX(COALESCE(peak_volume, excluded.peak_volume), COALESCE(excluded.peak_volume, peak_volume)), '
+                'first_seen = COALESCE(first_seen, excluded.first_seen), '
+                'last_seen = MAX(COALESCE(last_seen, excluded.last_seen), COALESCE(excluded.last_seen, last_seen))',
+                [(*key, term_id, start, seconds, None, None, None, None)
+                 for start, seconds in (split_interval(last, scraped_at, bucket) if in_top else [])
+                 for term_id in in_top]
+                + [(*key, term_id, bucket_start, 0, rank, volume, scraped_at, scraped_at)
+                   for term_id, (rank, volume) in listed.items()]
+            )
+
+            # Bloques que ya quedaron enteros fuera de la ventana
+            cutoff = scraped_at - length - bucket
+            expired = [row['term_id'] for row in conn.execute(
+                f'SELECT DISTINCT term_id FROM rolling_buckets WHERE {KEY} AND bucket_start <= ?', (*key, cutoff)
+            )]
+            if expired:
+                conn.execute(f'DELETE FROM rolling_buckets WHERE {KEY} AND bucket_start <= ?', (*key, cutoff))
+
+            affected = list(set(listed) | set(in_top) | set(expired))
+            touched += len(affected)
+            for start in range(0, len(affected), 500):
+                chunk = affected[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                conn.execute(
+                    'INSERT INTO rolling_terms (source, geo, timeframe, period, term_id, top_seconds, peak_rank, peak_volume, first_seen, last_seen) '
+                    'SELECT source, geo, timeframe, period, term_id, SUM(top_seconds), MIN(peak_rank), MAX(peak_volume), MIN(first_seen), MAX(last_seen) '
+                    f'FROM rolling_buckets WHERE {KEY} AND term_id IN ({placeholders}) GROUP BY term_id '
+                    'ON CONFLICT (source, geo, timeframe, period, term_id) DO UPDATE SET '
+                    'top_seconds = excluded.top_seconds, peak_rank = excluded.peak_rank, peak_volume = excluded.peak_volume, '
+                    'first_seen = excluded.first_seen, last_seen = excluded.last_seen',
+                    (*key, *chunk)
+                )
+                # Términos sin bloques en la ventana: fuera
+                conn.execute(
+                    f'DELETE FROM rolling_terms WHERE {KEY} AND term_id IN ({placeholders}) AND term_id NOT IN '
+                    f'(SELECT term_id FROM rolling_buckets WHERE {KEY} AND term_id IN ({placeholders}))',
+                    (*key, *chunk, *key, *chunk)
+                )
+
+            if trends is None:
+                continue
+            # Ranks: los que salieron de la lista guardan el último que tuvieron
+            floor = max([rank for rank, _ in current.values()] or [0]) + 1
+            conn.executemany(
+                f'UPDATE rolling_terms SET rank = NULL, previous_rank = ?, rank_change = NULL WHERE {KEY} AND term_id = ?',
+                [(rank, *key, term_id) for term_id, rank in previous.items() if term_id not in current]
+            )
+            conn.executemany(
+                f'UPDATE rolling_terms SET rank = ?, previous_rank = ?, rank_change = ? WHERE {KEY} AND term_id = ?',
+                [(rank, previous.get(term_id), previous.get(term_id, floor) - rank, *key, term_id)
+                 for term_id, (rank, _) in current.items()]
+            )
+
+        conn.execute(
+            'INSERT INTO rolling_state (source, geo, timeframe, last_snapshot_at) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (source, geo, timeframe) DO UPDATE SET last_snapshot_at = excluded.last_snapshot_at',
+            (source, geo, timeframe, scraped_at)
+        )
+    return touched
+
+def stats_row(row):
+    stats = dict(row)
+    stats['minutes_in_top'] = round(stats.pop('top_seconds') / 60, 1)
+    stats['first_seen'] = epoch_to_iso(stats['first_seen'])
+    stats['last_seen'] = epoch_to_iso(stats['last_seen'])
+    return stats
+
+STATS_COLUMNS = (
+    't.term, r.rank, r.previous_rank, r.rank_change, r.top_seconds, r.peak_rank, r.peak_volume, r.first_seen, r.last_seen'
+)
+
+def top_movers(store, source, geo='MX', timeframe='', period='24h', limit=10):
+    """
+    Los que más posiciones ganaron en el último snapshot (los que entraron a
+    la lista cuentan desde el fondo), con sus estadísticas de la ventana.
+    """
+    ensure_schema(store)
+    rows = store.conn.execute(
+        f'SELECT {STATS_COLUMNS} FROM rolling_terms r JOIN terms t ON t.id = r.term_id '
+        f'WHERE r.source = ? AND r.geo = ? AND r.timeframe = ? AND r.period = ? AND r.rank_change IS NOT NULL '
+        'ORDER BY r.rank_change DESC, r.rank LIMIT ?',
+        (source, geo, timeframe or '', period, limit)
+    )
+    return [stats_row(row) for row in rows]
+
+def window_stats(store, source, geo='MX', timeframe='', period='24h', limit=None):
+    """
+    Todos los términos de la ventana, por tiempo en el top 10.
+    """
+    ensure_schema(store)
+    rows = store.conn.execute(
+        f'SELECT {STATS_COLUMNS} FROM rolling_terms r JOIN terms t ON t.id = r.term_id '
+        'WHERE r.source = ? AND r.geo = ? AND r.timeframe = ? AND r.period = ? '
+        'ORDER BY r.top_seconds DESC, r.peak_rank LIMIT ?',
+        (source, geo, timeframe or '', period, -1 if limit is None else limit)
+    )
+    return [stats_row(row) for row in rows]
+
+def term_stats(store, source, term, geo='MX', timeframe='', period='24h'):
+    ensure_schema(store)
+    term_id = store.term_id(term)
+    if term_id is None:
+        return None
+    row = store.conn.execute(
+        f'SELECT {STATS_COLUMNS} FROM rolling_terms r JOIN terms t ON t.id = r.term_id '
+        'WHERE r.source = ? AND r.geo = ? AND r.timeframe = ? AND r.period = ? AND r.term_id = ?',
+        (source, geo, timeframe or '', period, term_id)
+    ).fetchone()
+    return stats_row(row) if row else None
+
+def refresh_peak_volumes(store, source):
+    """
+    Vuelve a sacar de las observaciones el volumen pico de los bloques y
+    términos de una fuente (después de renormalizar sus volúmenes), sin
+    tocar el resto de las estadísticas.
+    """
+    ensure_schema(store)
+    with store.conn:
+        for period, (_, bucket) in PERIODS.items():
+            store.conn.execute(
+                'UPDATE rolling_buckets SET peak_volume = (SELECT MAX(o.volume) FROM snapshots s '
+                'JOIN observations o ON o.snapshot_id = s.id WHERE s.source = rolling_buckets.source '
+                'AND s.geo = rolling_buckets.geo AND s.timeframe = rolling_buckets.timeframe '
+                "AND s.status = 'success' AND s.scraped_at >= rolling_buckets.bucket_start "
+                'AND s.scraped_at < rolling_buckets.bucket_start + ? AND o.term_id = rolling_buckets.term_id AND o.volume > 0) '
+                'WHERE source = ? AND period = ?',
+                (bucket, source, period)
+            )
+        store.conn.execute(
+            'UPDATE rolling_terms SET peak_volume = (SELECT MAX(b.peak_volume) FROM rolling_buckets b '
+            'WHERE b.source = rolling_terms.source AND b.geo = rolling_terms.geo AND b.timeframe = rolling_terms.timeframe '
+            'AND b.period = rolling_terms.period AND b.term_id = rolling_terms.term_id) WHERE source = ?',
+            (source,)
+        )
+
+def rebuild(store, source, geo='MX', timeframe=''):
+    """
+    Borra y vuelve a armar las ventanas de una fuente/país reproduciendo el
+    histórico (para activar esto sobre un histórico que ya existía).
+    """
+    ensure_schema(store)
+    timeframe = timeframe or ''
+    longest = max(length + bucket for length, bucket in PERIODS.values())
+    with store.conn:
+        for table in ('rolling_buckets', 'rolling_terms'):
+            store.conn.execute(f'DELETE FROM {table} WHERE source = ? AND geo = ? AND timeframe = ?', (source, geo, timeframe))
+        store.conn.execute('DELETE FROM rolling_state WHERE source = ? AND geo = ? AND timeframe = ?', (source, geo, timeframe))
+
+    latest = store.conn.execute(
+        'SELECT MAX(scraped_at) AS last FROM snapshots WHERE source = ? AND geo = ? AND timeframe = ?', (source, geo, timeframe)
+    ).fetchone()['last']
+    if latest is None:
+        return 0
+    count = 0
+    for snapshot in store.snapshots(source, geo, since=latest - longest, timeframe=timeframe):
+        if snapshot['status'] == 'success':
+            trends = [dict(row) for row in store.conn.execute(
+                'SELECT o.rank, t.term, o.volume FROM observations o JOIN terms t ON t.id = o.term_id WHERE o.snapshot_id = ?',
+                (snapshot['id'],)
+            )]
+            record_rolling(store, source, geo, timeframe, snapshot['scraped_at'], trends)
+        elif snapshot['status'] == 'unchanged':
+            record_rolling(store, source, geo, timeframe, snapshot['scraped_at'])
+        else:
+            continue
+        count += 1
+    return count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default=None, help="Histórico (por defecto TRENDS_DB_PATH o trends_history.db)")
+    parser.add_argument('--source', default=SOURCE_XTRENDS)
+    parser.add_argument('--geo', default='MX')
+    parser.add_argument('--timeframe', default='', help="Ventana de Google Trends (p.ej. 24h)")
+    parser.add_argument('--period', default='24h', choices=sorted(PERIODS))
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--rebuild', action='store_true', help="Rearmar las ventanas desde el histórico")
+    args = parser.parse_args()
+
+    with TrendStore(args.db) as store:
+        if args.rebuild:
+            count = rebuild(store, args.source, args.geo, args.timeframe)
+            print(f"[v0] {count} snapshots reproducidos", file=sys.stderr)
+        print(f"[v0] Los que más suben ({args.source}/{args.geo}, {args.period}):", file=sys.stderr)
+        for stats in top_movers(store, args.source, args.geo, args.timeframe, args.period, args.top):
+            print(f"[v0]   {stats['rank_change']:+4d}  #{stats['rank']:<3} {stats['term']:<32} "
+                  f"{stats['minutes_in_top']:7.1f} min en top {TOP_N}, pico #{stats['peak_rank']}", file=sys.stderr)
+        print(f"[v0] Más tiempo en el top {TOP_N}:", file=sys.stderr)
+        for stats in window_stats(store, args.source, args.geo, args.timeframe, args.period, args.top):
+            print(f"[v0]   {stats['minutes_in_top']:7.1f} min  {stats['term']:<32} pico #{stats['peak_rank']}, "
+                  f"desde {stats['first_seen']}", file=sys.stderr)
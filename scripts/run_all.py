@@ -0,0 +1,173 @@
+"""
+Corre Google Trends, twitter-trending.com y xtrends a la vez en un solo
+event loop, compartiendo un BrowserWorker. El tiempo total se acerca al de
+la fuente más lenta en lugar de la suma de las tres. Al final escribe
+merged_trends.json con el ranking unificado por país (trend_merge.py).
+
+Uso:
+    python scripts/run_all.py
+    python scripts/run_all.py --sources twitter_trending,xtrends
+    python scripts/run_all.py --geos MX,US --windows 4h,24h
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from browser_worker import BrowserWorker
+from scrape_gt_trends import scrape_google_trends, output_path, window_label, DEFAULT_CONCURRENCY
+from scrape_tw_trends_1 import scrape_twitter_trending_mexico
+from scrape_tw_trends_1 import OUTPUT_FILE as TWITTER_TRENDING_OUTPUT
+from scrape_tw_trends_2 import scrape_twitter_trends_mexico_async
+from scrape_tw_trends_2 import OUTPUT_FILE as XTRENDS_OUTPUT
+from json_codec import dumps, write_published
+from output_schema import load_snapshot
+from scrape_log import get_logger, flush_debug
+from snapshot_output import publish_snapshot, STATUS_UNCHANGED
+from trend_merge import merged_document, DEFAULT_OUTPUT as MERGED_OUTPUT
+from trend_store import SOURCE_GOOGLE_TRENDS, SOURCE_TWITTER_TRENDING, SOURCE_XTRENDS
+
+log = get_logger(__name__)
+
+SOURCES = [SOURCE_GOOGLE_TRENDS, SOURCE_TWITTER_TRENDING, SOURCE_XTRENDS]
+
+async def timed(source, coro):
+    """
+    Ejecuta el scraper de una fuente y mide cuánto tardó. Un error en una
+    fuente no cancela a las demás: se reporta y el resultado queda en None.
+    """
+    start = time.perf_counter()
+    try:
+        result = await coro
+    except Exception as e:
+        log.error(f"[{source}] Error: {type(e).__name__}: {e}")
+        flush_debug(f"{source}: {type(e).__name__}")
+        result = None
+    return source, result, time.perf_counter() - start
+
+async def run_all(sources=None, geos=('MX',), windows=('24h',), concurrency=DEFAULT_CONCURRENCY, worker=None):
+    """
+    Retorna {fuente: (resultado, segundos)}. Google Trends entrega una lista
+    de documentos (uno por país/ventana); las fuentes de Twitter, un dict.
+    El navegador se lanza solo cuando alguna fuente lo necesita.
+    """
+    sources = list(sources or SOURCES)
+    own_worker = worker is None
+    worker = worker or BrowserWorker()
+
+    jobs = []
+    if SOURCE_GOOGLE_TRENDS in sources:
+        jobs.append(timed(SOURCE_GOOGLE_TRENDS, scrape_google_trends(list(geos), list(windows), concurrency, worker)))
+    if SOURCE_TWITTER_TRENDING in sources:
+        jobs.append(timed(SOURCE_TWITTER_TRENDING, scrape_twitter_trending_mexico(worker)))
+    if SOURCE_XTRENDS in sources:
+        jobs.append(timed(SOURCE_XTRENDS, scrape_twitter_trends_mexico_async()))
+
+    try:
+        finished = await asyncio.gather(*jobs)
+    finally:
+        if own_worker:
+            await worker.close()
+
+    return {source: (result, elapsed) for source, result, elapsed in finished}
+
+def publish_all(results):
+    """
+    Publica cada resultado en su JSON + histórico. Retorna los archivos escritos.
+    """
+    written = []
+    for source, (result, _) in results.items():
+        if result is None:
+            continue
+        if source == SOURCE_GOOGLE_TRENDS:
+            for data in result:
+                output_file = output_path(data["geo_code"], data["hours"])
+                if publish_snapshot(data, output_file, source, data["geo_code"], window_label(data["hours"])):
+                    written.append(output_file)
+        else:
+            output_file = TWITTER_TRENDING_OUTPUT if source == SOURCE_TWITTER_TRENDING else XTRENDS_OUTPUT
+            if publish_snapshot(result, output_file, source, 'MX'):
+                written.append(output_file)
+    return written
+
+def current_document(data, output_file):
+    """
+    El documento vigente de una fuente: el de esta corrida o, si no cambió
+    (304 o la misma lista), el que ya estaba publicado.
+    """
+    if data.get('status') != STATUS_UNCHANGED:
+        return data
+    try:
+        return load_snapshot(output_file)
+    except (OSError, ValueError):
+        return None
+
+def merge_results(results, output_file=MERGED_OUTPUT):
+    """
+    Ranking unificado por país (trend_merge.py) de lo que trajo la corrida.
+    De Google Trends entra una ventana por país, la primera pedida.
+    Retorna el archivo escrito, o None si no había nada que unir.
+    """
+    documents = []
+    for source, (result, _) in results.items():
+        if result is None:
+            continue
+        if source == SOURCE_GOOGLE_TRENDS:
+            geos = set()
+            for data in result:
+                if data["geo_code"] not in geos:
+                    geos.add(data["geo_code"])
+                    documents.append((source, data["geo_code"], current_document(data, output_path(data["geo_code"], data["hours"]))))
+        else:
+            output = TWITTER_TRENDING_OUTPUT if source == SOURCE_TWITTER_TRENDING else XTRENDS_OUTPUT
+            documents.append((source, 'MX', current_document(result, output)))
+
+    doc = merged_document(documents)
+    if not doc['geos']:
+        return None
+    write_published(output_file, dumps(doc, indent=True))
+    return output_file
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sources', default=','.join(SOURCES), help=f"Fuentes separadas por coma: {', '.join(SOURCES)}")
+    parser.add_argument('--geos', default='MX', help="Países para Google Trends")
+    parser.add_argument('--windows', default='24h', help="Ventanas para Google Trends")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument('--merge-output', default=MERGED_OUTPUT, help="Ranking unificado por país ('' para no escribirlo)")
+    args = parser.parse_args()
+
+    sources = [s.strip() for s in args.sources.split(',') if s.strip()]
+    unknown = [s for s in sources if s not in SOURCES]
+    if unknown:
+        parser.error(f"Fuentes desconocidas: {', '.join(unknown)}")
+
+    start = time.perf_counter()
+    results = asyncio.run(run_all(
+        sources,
+        geos=[g.strip().upper() for g in args.geos.split(',') if g.strip()],
+        windows=[w.strip() for w in args.windows.split(',') if w.strip()],
+        concurrency=args.concurrency
+    ))
+    elapsed = time.perf_counter() - start
+
+    written = publish_all(results)
+    merged = merge_results(results, args.merge_output) if args.merge_output else None
+
+    log.info("========== RUN_ALL COMPLETADO ==========")
+    for source, (result, seconds) in results.items():
+        if result is None:
+            status = "error"
+        elif isinstance(result, list):
+            status = ", ".join(f"{d['geo_code']}/{window_label(d['hours'])}: {d['status']}" for d in result)
+        else:
+            status = result['status']
+        (log.warning if result is None else log.info)(f"{source:<22} {seconds:6.1f}s  {status}")
+    total_sequential = sum(seconds for _, seconds in results.values())
+    log.info(f"Total {elapsed:.1f}s (en secuencia habría sido ~{total_sequential:.1f}s)")
+    log.info(f"Archivos escritos: {', '.join(written) or 'ninguno (sin cambios)'}")
+    if merged:
+        log.info(f"Ranking unificado: {merged}")
+
+    if results and all(result is None for result, _ in results.values()):
+        sys.exit(1)
@@ -0,0 +1,218 @@
+"""
+Métricas estructuradas por etapa de cada corrida de scraping.
+
+Cada scraper abre spans (goto, render_wait, evaluate, parse, ...) con su
+duración y atributos (bytes, peticiones, nodos del DOM, tendencias). El
+resumen compacto viaja en el JSON publicado bajo "timing", y
+publish_snapshot() lo exporta junto con sus propias etapas (write, delta,
+store, rolling, terms):
+
+SCRAPER_METRICS_NDJSON     archivo NDJSON, una línea por span + una por
+                           corrida (por defecto scrape_metrics.ndjson,
+                           '' para desactivar)
+SCRAPER_METRICS_NDJSON_MAX_BYTES
+                           tamaño a partir del cual el NDJSON rota a
+                           <archivo>.1 (se pisa el anterior) antes de
+                           agregar la corrida; por defecto 10 MB, 0 = sin
+                           rotación
+SCRAPER_METRICS_PROM_DIR   directorio para archivos .prom estilo
+                           node_exporter textfile (desactivado por defecto)
+
+Uso:
+    metrics = RunMetrics(SOURCE_XTRENDS)
+    with metrics.span('fetch') as span:
+        response = requests.get(url)
+        span['bytes'] = len(response.content)
+    result = metrics.attach(result)
+"""
+
+import json
+import os
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from scrape_log import get_logger
+
+log = get_logger(__name__)
+
+DEFAULT_NDJSON_PATH = 'scrape_metrics.ndjson'
+DEFAULT_NDJSON_MAX_BYTES = 10 * 1024 * 1024
+
+# Atributos que se suman entre etapas para el total de la corrida
+SUMMED_ATTRS = ('bytes', 'written_bytes', 'requests', 'requests_blocked')
+
+class RunMetrics:
+    """
+    Spans de una corrida. Los spans no se anidan: cada etapa se mide una
+    vez, en el orden en que ocurre.
+    """
+
+    def __init__(self, source, geo='MX', timeframe='', run_id=None, started_at=None):
+        self.source = source
+        self.geo = geo
+        self.timeframe = timeframe
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.started_at = started_at or time.time()
+        # Los offsets se miden desde el inicio de la corrida, aunque estos
+        # spans se abran después (p.ej. al publicar)
+        self._t0 = time.perf_counter() - (time.time() - self.started_at)
+        self.spans = []
+        self.attrs = {}
+
+    @classmethod
+    def resume(cls, timing, source, geo='MX', timeframe=''):
+        """
+        Continúa la corrida de un result["timing"] ya armado (mismo run_id y
+        mismo origen para los offsets). Sin timing, abre una corrida nueva.
+        """
+        if not timing:
+            return cls(source, geo, timeframe)
+        started_at = datetime.fromisoformat(timing['started_at']).timestamp()
+        return cls(source, geo, timeframe, run_id=timing.get('run_id'), started_at=started_at)
+
+    @contextmanager
+    def span(self, stage, **attrs):
+        """
+        Mide una etapa. El dict entregado acepta atributos extra (bytes,
+        trends, dom_nodes...) mientras la etapa corre.
+        """
+        record = {"stage": stage, **attrs}
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException as e:
+            record["error"] = type(e).__name__
+            raise
+        finally:
+            record["offset_ms"] = round((start - self._t0) * 1000, 1)
+            record["ms"] = round((time.perf_counter() - start) * 1000, 1)
+            self.spans.append(record)
+
+    def add(self, stage, ms, **attrs):
+        """
+        Registra una etapa medida por fuera que acaba de terminar (p.ej. el
+        arranque compartido del navegador).
+        """
+        offset = max(0.0, (time.perf_counter() - self._t0) * 1000 - ms)
+        self.spans.append({"stage": stage, **attrs, "offset_ms": round(offset, 1), "ms": round(ms, 1)})
+
+    def set(self, **attrs):
+        """
+        Atributos de la corrida completa (p.ej. el tráfico que contó el
+        ResourceBlocker, que no pertenece a una sola etapa).
+        """
+        self.attrs.update(attrs)
+
+    def summary(self):
+        return {
+            "run_id": self.run_id,
+            "started_at": datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(),
+            "total_ms": round((time.perf_counter() - self._t0) * 1000, 1),
+            **self.attrs,
+            "stages": list(self.spans),
+        }
+
+    def attach(self, result):
+        """
+        Deja el resumen en result["timing"] y retorna el mismo result.
+        """
+        result["timing"] = self.summary()
+        return result
+
+def run_totals(timing):
+    """
+    bytes/peticiones de la corrida: suma de las etapas más los atributos
+    de la corrida completa.
+    """
+    totals = {}
+    for record in timing.get('stages', []) + [timing]:
+        for key in SUMMED_ATTRS:
+            if isinstance(record.get(key), (int, float)) and not isinstance(record.get(key), bool):
+                totals[key] = totals.get(key, 0) + record[key]
+    return totals
+
+def ndjson_path():
+    return os.environ.get('SCRAPER_METRICS_NDJSON', DEFAULT_NDJSON_PATH).strip()
+
+def ndjson_max_bytes():
+    try:
+        return int(os.environ.get('SCRAPER_METRICS_NDJSON_MAX_BYTES', DEFAULT_NDJSON_MAX_BYTES))
+    except ValueError:
+        return DEFAULT_NDJSON_MAX_BYTES
+
+def rotate_ndjson(path):
+    """
+    Bajo el daemon el NDJSON solo crece: pasado ndjson_max_bytes() se mueve
+    a path.1 (reemplazando la rotación anterior) y se empieza uno nuevo.
+    """
+    max_bytes = ndjson_max_bytes()
+    if max_bytes <= 0:
+        return
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return
+    if size >= max_bytes:
+        os.replace(path, f"{path}.1")
+
+def prom_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+def prom_text(timing, source, geo, timeframe, status, trends):
+    """
+    Última corrida en formato de texto de Prometheus (gauges).
+    """
+    base = f'source="{prom_label(source)}",geo="{prom_label(geo)}",timeframe="{prom_label(timeframe)}"'
+    totals = run_totals(timing)
+    lines = [
+        "# HELP trends_scrape_stage_seconds Duración de cada etapa en la última corrida",
+        "# TYPE trends_scrape_stage_seconds gauge",
+    ]
+    for span in timing.get('stages', []):
+        lines.append(f'trends_scrape_stage_seconds{{{base},stage="{prom_label(span["stage"])}"}} {span["ms"] / 1000:.4f}')
+    gauges = [
+        ("trends_scrape_duration_seconds", "Duración total de la última corrida", round(timing.get('total_ms', 0) / 1000, 4)),
+        ("trends_scrape_trends", "Tendencias publicadas en la última corrida", trends),
+        ("trends_scrape_bytes", "Bytes transferidos en la última corrida", totals.get('bytes', 0)),
+        ("trends_scrape_requests", "Peticiones de red en la última corrida", totals.get('requests', 0)),
+        ("trends_scrape_success", "1 si la última corrida terminó en success o unchanged", int(status in ('success', 'unchanged'))),
+        ("trends_scrape_last_run_timestamp_seconds", "Fin de la última corrida (epoch)", int(time.time())),
+    ]
+    for name, help_text, value in gauges:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name}{{{base}}} {value}"]
+    return "\n".join(lines) + "\n"
+
+def export_run(timing, source, geo='MX', timeframe='', status='', trends=0):
+    """
+    Escribe la corrida en NDJSON y/o en el .prom de la fuente. Nunca lanza:
+    las métricas no deben tumbar la publicación.
+    """
+    if not timing:
+        return
+    common = {"run_id": timing.get('run_id'), "source": source, "geo": geo, "timeframe": timeframe}
+    try:
+        path = ndjson_path()
+        if path:
+            rotate_ndjson(path)
+            with open(path, 'a', encoding='utf-8') as f:
+                for span in timing.get('stages', []):
+                    f.write(json.dumps({"type": "span", **common, **span}, ensure_ascii=False) + "\n")
+                run = {key: value for key, value in timing.items() if key != 'stages'}
+                f.write(json.dumps({
+                    "type": "run", **common, **run, "status": status, "trends": trends,
+                    **run_totals(timing)
+                }, ensure_ascii=False) + "\n")
+
+        prom_dir = os.environ.get('SCRAPER_METRICS_PROM_DIR', '').strip()
+        if prom_dir:
+            os.makedirs(prom_dir, exist_ok=True)
+            name = re.sub(r'[^A-Za-z0-9_]+', '_', f"trends_{source}_{geo}_{timeframe}".strip('_'))
+            target = os.path.join(prom_dir, f"{name}.prom")
+            # El collector de textfile lee *.prom: escribir aparte y renombrar
+            with open(f"{target}.tmp", 'w', encoding='utf-8') as f:
+                f.write(prom_text(timing, source, geo, timeframe, status, trends))
+            os.replace(f"{target}.tmp", target)
+    except OSError as e:
+        log.warning(f"⚠ No se pudieron exportar las métricas: {e}")
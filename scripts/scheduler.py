@@ -0,0 +1,258 @@
+"""
+Daemon local: corre cada fuente en su propio intervalo (con jitter) dentro
+de un solo proceso que mantiene caliente el intérprete, las sesiones HTTP y
+Chromium entre corridas. Reemplaza los cron de GitHub Actions cuando se
+tiene una máquina propia: cada tick ya no paga pip install, descarga de
+Chromium ni arranque de Python.
+
+Una fuente nunca se vuelve a lanzar mientras su corrida anterior sigue en
+curso; si una corrida se pasa de su intervalo, la siguiente arranca al
+terminar y se cuenta como "overrun". El estado (próxima corrida, duración
+de la última, fallas) se escribe en --state-file después de cada corrida.
+
+Uso:
+    python scripts/scheduler.py
+    python scripts/scheduler.py --interval google_trends=300 --interval xtrends=1200 --jitter 0.1
+    python scripts/scheduler.py --sources xtrends --state-file /tmp/scheduler_state.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import time
+from datetime import datetime, timezone
+import requests
+from browser_worker import BrowserWorker
+from scrape_gt_trends import scrape_google_trends, DEFAULT_CONCURRENCY
+from scrape_tw_trends_1 import scrape_twitter_trending_mexico
+import scrape_tw_trends_2
+from scrape_tw_trends_2 import scrape_twitter_trends_mexico_async
+from run_all import SOURCES, publish_all
+from scrape_log import get_logger, flush_debug
+from trend_store import SOURCE_GOOGLE_TRENDS, SOURCE_TWITTER_TRENDING, SOURCE_XTRENDS
+
+log = get_logger(__name__)
+
+# Mismos intervalos que los cron de los workflows (segundos)
+DEFAULT_INTERVALS = {
+    SOURCE_GOOGLE_TRENDS: 300,
+    SOURCE_TWITTER_TRENDING: 1200,
+    SOURCE_XTRENDS: 1200,
+}
+DEFAULT_JITTER = 0.1
+DEFAULT_STATE_FILE = 'scheduler_state.json'
+
+def epoch_iso(value):
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value, timezone.utc).isoformat()
+
+class SourceJob:
+    """
+    Estado de una fuente dentro del daemon.
+    """
+
+    def __init__(self, source, interval, jitter=DEFAULT_JITTER):
+        self.source = source
+        self.interval = interval
+        self.jitter = jitter
+        self.running = False
+        self.next_run = time.time()
+        self.last_started = None
+        self.last_duration = None
+        self.last_status = None
+        self.last_written = []
+        self.runs = 0
+        self.failures = 0
+        self.overruns = 0
+
+    def schedule_next(self, started):
+        """
+        Próxima corrida = inicio + intervalo ± jitter. Si la corrida ya se
+        pasó de ese momento, la siguiente arranca de inmediato.
+        """
+        spread = self.interval * self.jitter
+        self.next_run = started + self.interval + random.uniform(-spread, spread)
+        now = time.time()
+        if self.next_run < now:
+            self.overruns += 1
+            self.next_run = now
+
+    def state(self):
+        return {
+            "interval": self.interval,
+            "running": self.running,
+            "next_run": epoch_iso(self.next_run),
+            "last_started": epoch_iso(self.last_started),
+            "last_duration": round(self.last_duration, 3) if self.last_duration is not None else None,
+            "last_status": self.last_status,
+            "last_written": self.last_written,
+            "runs": self.runs,
+            "failures": self.failures,
+            "overruns": self.overruns,
+        }
+
+class Scheduler:
+    """
+    Uso:
+        scheduler = Scheduler({'xtrends': 1200})
+        await scheduler.run()      # hasta scheduler.stop()
+    """
+
+    def __init__(self, intervals=None, jitter=DEFAULT_JITTER, geos=('MX',), windows=('24h',),
+                 concurrency=DEFAULT_CONCURRENCY, state_file=DEFAULT_STATE_FILE):
+        intervals = intervals or DEFAULT_INTERVALS
+        self.jobs = {source: SourceJob(source, interval, jitter) for source, interval in intervals.items()}
+        self.geos = list(geos)
+        self.windows = list(windows)
+        self.concurrency = concurrency
+        self.state_file = state_file
+        self.started_at = None
+        self.worker = BrowserWorker()
+        self.http_session = None
+        self.aiohttp_session = None
+        self._stop = asyncio.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    async def scrape(self, source):
+        """
+        Una corrida de la fuente con los recursos compartidos del daemon.
+        """
+        if source == SOURCE_GOOGLE_TRENDS:
+            return await scrape_google_trends(self.geos, self.windows, self.concurrency, self.worker)
+        if source == SOURCE_TWITTER_TRENDING:
+            return await scrape_twitter_trending_mexico(self.worker, http_session=self.http_session)
+        return await scrape_twitter_trends_mexico_async(session=self.aiohttp_session)
+
+    def status(self):
+        return {
+            "pid": os.getpid(),
+            "started_at": epoch_iso(self.started_at),
+            "updated_at": epoch_iso(time.time()),
+            "sources": {source: job.state() for source, job in self.jobs.items()},
+        }
+
+    def write_state(self):
+        if not self.state_file:
+            return
+        # Escritura atómica: quien lea el archivo nunca ve un JSON a medias
+        tmp_path = f"{self.state_file}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.status(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.state_file)
+
+    async def run_job(self, job):
+        """
+        Bucle de una fuente. Como cada corrida se espera antes de programar
+        la siguiente, dos corridas de la misma fuente nunca se solapan.
+        """
+        while not self._stop.is_set():
+            delay = job.next_run - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=delay)
+                    return
+                except asyncio.TimeoutError:
+                    pass
+
+            job.running = True
+            job.last_started = time.time()
+            start = time.perf_counter()
+            try:
+                result = await self.scrape(job.source)
+                job.last_written = await asyncio.to_thread(publish_all, {job.source: (result, 0)})
+                if isinstance(result, list):
+                    job.last_status = ", ".join(sorted({d['status'] for d in result}))
+                else:
+                    job.last_status = result['status']
+            except Exception as e:
+                job.failures += 1
+                job.last_status = f"error: {type(e).__name__}: {e}"
+                job.last_written = []
+                log.error(f"[scheduler] {job.source}: {type(e).__name__}: {e}")
+                flush_debug(f"{job.source}: {type(e).__name__}")
+            finally:
+                job.running = False
+                job.runs += 1
+                job.last_duration = time.perf_counter() - start
+
+            job.schedule_next(job.last_started)
+            log.info(f"[scheduler] {job.source}: {job.last_status} en {job.last_duration:.1f}s, "
+                     f"próxima {epoch_iso(job.next_run)}")
+            self.write_state()
+
+    async def run(self):
+        self.started_at = time.time()
+        self.http_session = requests.Session()
+        if scrape_tw_trends_2.aiohttp is not None:
+            self.aiohttp_session = scrape_tw_trends_2.aiohttp.ClientSession(
+                timeout=scrape_tw_trends_2.aiohttp.ClientTimeout(total=15)
+            )
+        log.info(f"[scheduler] Iniciado: {', '.join(f'{s}/{j.interval}s' for s, j in self.jobs.items())}")
+        self.write_state()
+        try:
+            await asyncio.gather(*(self.run_job(job) for job in self.jobs.values()))
+        finally:
+            if self.aiohttp_session is not None:
+                await self.aiohttp_session.close()
+            self.http_session.close()
+            await self.worker.close()
+            self.write_state()
+            log.info("[scheduler] Detenido")
+
+def parse_intervals(values, sources):
+    """
+    ["google_trends=300", ...] -> {fuente: segundos} para las fuentes pedidas.
+    """
+    intervals = {source: DEFAULT_INTERVALS[source] for source in sources}
+    for value in values or []:
+        source, _, seconds = value.partition('=')
+        source = source.strip()
+        if source not in DEFAULT_INTERVALS or not seconds:
+            raise ValueError(f"Intervalo inválido: '{value}' (usa fuente=segundos)")
+        if source in intervals:
+            intervals[source] = max(1.0, float(seconds))
+    return intervals
+
+async def main(args):
+    sources = [s.strip() for s in args.sources.split(',') if s.strip()]
+    scheduler = Scheduler(
+        parse_intervals(args.interval, sources),
+        jitter=args.jitter,
+        geos=[g.strip().upper() for g in args.geos.split(',') if g.strip()],
+        windows=[w.strip() for w in args.windows.split(',') if w.strip()],
+        concurrency=args.concurrency,
+        state_file=args.state_file
+    )
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, scheduler.stop)
+        except NotImplementedError:
+            pass
+    await scheduler.run()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sources', default=','.join(SOURCES), help=f"Fuentes separadas por coma: {', '.join(SOURCES)}")
+    parser.add_argument('--interval', action='append', help="fuente=segundos (se puede repetir)")
+    parser.add_argument('--jitter', type=float, default=DEFAULT_JITTER, help="Fracción del intervalo (0.1 = ±10%%)")
+    parser.add_argument('--geos', default='MX', help="Países para Google Trends")
+    parser.add_argument('--windows', default='24h', help="Ventanas para Google Trends")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument('--state-file', default=DEFAULT_STATE_FILE, help="JSON con el estado del daemon ('' para no escribirlo)")
+    args = parser.parse_args()
+
+    unknown = [s for s in args.sources.split(',') if s.strip() and s.strip() not in SOURCES]
+    if unknown:
+        parser.error(f"Fuentes desconocidas: {', '.join(unknown)}")
+
+    try:
+        asyncio.run(main(args))
+    except ValueError as e:
+        parser.error(str(e))
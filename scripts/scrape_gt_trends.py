@@ -1,10 +1,134 @@
-import json
+import argparse
 import asyncio
 from datetime import datetime, timedelta
 import pytz
-from playwright.async_api import async_playwright
-import random
 import time
+from browser_worker import browser_session
+from request_blocking import ResourceBlocker, GOOGLE_TRENDS_RULES
+from page_waits import wait_for_selector_count, wait_for_network_idle, politeness_delay
+from run_metrics import RunMetrics
+from snapshot_output import publish_snapshot
+from scrape_log import get_logger, finish_run
+from trend_store import SOURCE_GOOGLE_TRENDS
+from volume_parser import volume_lower_bound
+
+log = get_logger(__name__)
+
+# Código de país -> (nombre, zona horaria principal)
+GEO_SETTINGS = {
+    "MX": ("México", "America/Mexico_City"),
+    "US": ("Estados Unidos", "America/New_York"),
+    "CA": ("Canadá", "America/Toronto"),
+    "AR": ("Argentina", "America/Argentina/Buenos_Aires"),
+    "BR": ("Brasil", "America/Sao_Paulo"),
+    "CL": ("Chile", "America/Santiago"),
+    "CO": ("Colombia", "America/Bogota"),
+    "PE": ("Perú", "America/Lima"),
+    "VE": ("Venezuela", "America/Caracas"),
+    "EC": ("Ecuador", "America/Guayaquil"),
+    "GT": ("Guatemala", "America/Guatemala"),
+    "CR": ("Costa Rica", "America/Costa_Rica"),
+    "DO": ("República Dominicana", "America/Santo_Domingo"),
+    "UY": ("Uruguay", "America/Montevideo"),
+    "ES": ("España", "Europe/Madrid"),
+    "GB": ("Reino Unido", "Europe/London"),
+    "FR": ("Francia", "Europe/Paris"),
+    "DE": ("Alemania", "Europe/Berlin"),
+    "IT": ("Italia", "Europe/Rome"),
+    "PT": ("Portugal", "Europe/Lisbon"),
+    "NL": ("Países Bajos", "Europe/Amsterdam"),
+    "TR": ("Turquía", "Europe/Istanbul"),
+    "NG": ("Nigeria", "Africa/Lagos"),
+    "ZA": ("Sudáfrica", "Africa/Johannesburg"),
+    "EG": ("Egipto", "Africa/Cairo"),
+    "SA": ("Arabia Saudita", "Asia/Riyadh"),
+    "IN": ("India", "Asia/Kolkata"),
+    "ID": ("Indonesia", "Asia/Jakarta"),
+    "PH": ("Filipinas", "Asia/Manila"),
+    "JP": ("Japón", "Asia/Tokyo"),
+    "KR": ("Corea del Sur", "Asia/Seoul"),
+    "AU": ("Australia", "Australia/Sydney"),
+}
+
+# Ventanas soportadas por trends.google.com/trending (parámetro hours)
+TIMEFRAMES = {
+    4: "Últimas 4 horas",
+    24: "Últimas 24 horas",
+    48: "Últimas 48 horas",
+    168: "Últimos 7 días",
+}
+
+WINDOW_ALIASES = {"4h": 4, "24h": 24, "48h": 48, "7d": 168}
+
+# Páginas abiertas a la vez dentro del mismo navegador
+DEFAULT_CONCURRENCY = 4
+
+# La página se considera renderizada cuando hay al menos este número de
+# tendencias (el mismo umbral que separa "success" de "fallback").
+READY_MIN_TRENDS = 6
+READY_TIMEOUT_MS = 15000
+
+EXTRACT_TRENDS_JS = '''
+    () => {
+        let trends = [];
+
+        // Buscar DIVs con clase mZ3RIc (nombres de tendencias)
+        const trendNames = document.querySelectorAll('div.mZ3RIc');
+        console.log(`[v0] Elementos con clase mZ3RIc encontrados: ${trendNames.length}`);
+
+        // Buscar DIVs con clase qNpYPd (volúmenes)
+        const volumeElements = document.querySelectorAll('div.qNpYPd');
+        console.log(`[v0] Elementos con clase qNpYPd encontrados: ${volumeElements.length}`);
+
+        // Extraer tendencias emparejando nombres y volúmenes
+        for (let i = 0; i < Math.min(trendNames.length, volumeElements.length) && trends.length < 25; i++) {
+            const name = trendNames[i]?.textContent?.trim();
+            const volumeText = volumeElements[i]?.textContent?.trim();
+
+            // Validar que tenemos datos válidos
+            if (!name || name.length < 2 || name.includes('Explorar')) continue;
+            if (!volumeText || volumeText.length < 1) continue;
+
+            // El volumen numérico se calcula en Python (volume_parser.py)
+            trends.push({
+                rank: trends.length + 1,
+                term: name,
+                volume_text: volumeText
+            });
+        }
+
+        console.log(`[v0] Total tendencias extraídas: ${trends.length}`);
+        return trends;
+    }
+'''
+
+def gt_trend(rank, term, volume_text):
+    """
+    Tendencia de Google Trends con "volume" = cota inferior exacta del
+    texto ("200K+" -> 200000, "2 M+" -> 2000000; None si no trae número).
+    """
+    return {
+        "rank": rank,
+        "term": term,
+        "volume": volume_lower_bound(volume_text),
+        "volume_text": volume_text
+    }
+
+def get_local_trend_time(timezone_name):
+    """
+    Retorna la hora actual en la zona horaria indicada con formato estructurado.
+    """
+    local_tz = pytz.timezone(timezone_name)
+    now = datetime.now(local_tz)
+    return {
+        "timestamp_iso": now.isoformat(),
+        "day": now.day,
+        "month": now.month,
+        "year": now.year,
+        "hour": now.hour,
+        "minute": now.minute,
+        "timezone": timezone_name
+    }
 
 def get_mexico_trend_time():
     """
@@ -21,141 +145,177 @@ def get_mexico_trend_time():
         "minute": now.minute
     }
 
-async def scrape_google_trends_mexico():
+def parse_window(window):
     """
-    Extrae tendencias de Google Trends México usando Playwright
+    Convierte '4h', '24h', '48h', '7d' (o un número de horas) a horas.
     """
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context(
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        )
-        page = await context.new_page()
-        
-        url = 'https://trends.google.com/trending?geo=MX&hours=24'
-        
-        print("[v0] Navegando a Google Trends México...")
-        print(f"[v0] URL: {url}")
-        
-        delay_before_nav = random.uniform(1, 3)
-        await asyncio.sleep(delay_before_nav)
-        
+    if isinstance(window, int):
+        hours = window
+    else:
+        window = str(window).strip().lower()
+        hours = WINDOW_ALIASES.get(window)
+        if hours is None:
+            hours = int(window.rstrip('h'))
+    if hours not in TIMEFRAMES:
+        raise ValueError(f"Ventana no soportada: {window} (usar {', '.join(WINDOW_ALIASES)})")
+    return hours
+
+def window_label(hours):
+    """
+    Etiqueta corta de la ventana ('24h', '7d') para nombres de archivo.
+    """
+    for label, value in WINDOW_ALIASES.items():
+        if value == hours:
+            return label
+    return f"{hours}h"
+
+def build_result(geo, hours, trends, source, status, error=None):
+    """
+    Arma el documento de salida de una combinación país/ventana.
+    """
+    country, timezone_name = GEO_SETTINGS.get(geo, (geo, 'UTC'))
+    result = {
+        "timestamp": datetime.now().isoformat(),
+        "timestamp_mexico": get_mexico_trend_time(),
+        "timestamp_local": get_local_trend_time(timezone_name),
+        "country": country,
+        "geo_code": geo,
+        "timeframe": TIMEFRAMES[hours],
+        "hours": hours,
+        "total_trends": len(trends),
+        "trends": trends,
+        "source": source,
+        "status": status
+    }
+    if error is not None:
+        result["error"] = error
+    return result
+
+def fallback_trends(geo):
+    """
+    Los datos de ejemplo solo tienen sentido para México; otros países quedan vacíos.
+    """
+    return generate_example_trends() if geo == "MX" else []
+
+async def scrape_google_trends_geo(session, geo="MX", hours=24, block_rules=GOOGLE_TRENDS_RULES, metrics=None):
+    """
+    Extrae las tendencias de un país y una ventana en una página nueva del
+    worker recibido. La página vive en su propio contexto aislado.
+    Imágenes, fuentes y trackers se bloquean según block_rules.
+    El resultado lleva en "timing" la duración de cada etapa.
+    """
+    country, timezone_name = GEO_SETTINGS.get(geo, (geo, 'UTC'))
+    url = f'https://trends.google.com/trending?geo={geo}&hours={hours}'
+    label = f"{geo}/{window_label(hours)}"
+    metrics = metrics or RunMetrics(SOURCE_GOOGLE_TRENDS, geo, window_label(hours))
+    start = time.perf_counter()
+
+    async with session.new_page(
+        user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+        timezone_id=timezone_name
+    ) as page:
+
+        metrics.add('new_page', (time.perf_counter() - start) * 1000)
+        blocker = await ResourceBlocker(block_rules).install(page)
+
+        log.info(f"Navegando a Google Trends {country} ({TIMEFRAMES[hours]})...")
+        log.debug("URL: %s", url)
+
+        with metrics.span('delay'):
+            await politeness_delay()
+
         try:
-            await page.goto(url, wait_until='domcontentloaded', timeout=30000)
-            
-            print("[v0] DOM cargado. Esperando a que JavaScript renderice...")
-            
-            delay_after_load = random.uniform(2, 5)
-            await asyncio.sleep(delay_after_load)
-            
-            print("[v0] Extrayendo tendencias del DOM...")
-            
-            trends_data = await page.evaluate('''
-                () => {
-                    let trends = [];
-                    
-                    // Buscar DIVs con clase mZ3RIc (nombres de tendencias)
-                    const trendNames = document.querySelectorAll('div.mZ3RIc');
-                    console.log(`[v0] Elementos con clase mZ3RIc encontrados: ${trendNames.length}`);
-                    
-                    // Buscar DIVs con clase qNpYPd (volúmenes)
-                    const volumeElements = document.querySelectorAll('div.qNpYPd');
-                    console.log(`[v0] Elementos con clase qNpYPd encontrados: ${volumeElements.length}`);
-                    
-                    // Extraer tendencias emparejando nombres y volúmenes
-                    for (let i = 0; i < Math.min(trendNames.length, volumeElements.length) && trends.length < 25; i++) {
-                        const name = trendNames[i]?.textContent?.trim();
-                        const volumeText = volumeElements[i]?.textContent?.trim();
-                        
-                        // Validar que tenemos datos válidos
-                        if (!name || name.length < 2 || name.includes('Explorar')) continue;
-                        if (!volumeText || volumeText.length < 1) continue;
-                        
-                        // Normalizar volumen a escala 0-100
-                        let volume = 50;
-                        
-                        if (volumeText.includes('200') || volumeText.includes('200K')) {
-                            volume = 100;
-                        } else if (volumeText.includes('50') || volumeText.includes('50K')) {
-                            volume = 80;
-                        } else if (volumeText.includes('20') || volumeText.includes('20K')) {
-                            volume = 60;
-                        } else if (volumeText.includes('10') || volumeText.includes('10K')) {
-                            volume = 40;
-                        } else if (volumeText.includes('5') || volumeText.includes('5K')) {
-                            volume = 20;
-                        }
-                        
-                        trends.push({
-                            rank: trends.length + 1,
-                            term: name,
-                            volume: volume,
-                            volume_text: volumeText
-                        });
-                    }
-                    
-                    console.log(`[v0] Total tendencias extraídas: ${trends.length}`);
-                    return trends;
-                }
-            ''')
-            
-            print(f"[v0] Tendencias extraídas: {len(trends_data)}")
-            
+            with metrics.span('goto') as span:
+                response = await page.goto(url, wait_until='domcontentloaded', timeout=30000)
+                span['status'] = response.status if response else None
+
+            log.debug("[%s] DOM cargado. Esperando a que JavaScript renderice...", label)
+
+            with metrics.span('render_wait') as span:
+                rendered = await wait_for_selector_count(page, 'div.mZ3RIc', READY_MIN_TRENDS, READY_TIMEOUT_MS)
+                span['rendered'] = rendered
+            if rendered < READY_MIN_TRENDS:
+                # Países/ventanas con pocas tendencias: dar una última oportunidad a la red
+                with metrics.span('network_idle'):
+                    await wait_for_network_idle(page, 5000)
+
+            log.debug("[%s] Extrayendo tendencias del DOM...", label)
+
+            with metrics.span('evaluate') as span:
+                trends_data = [gt_trend(t['rank'], t['term'], t['volume_text']) for t in await page.evaluate(EXTRACT_TRENDS_JS)]
+                span['trends'] = len(trends_data)
+                span['dom_nodes'] = await page.evaluate("() => document.getElementsByTagName('*').length")
+
+            log.info(f"[{label}] Tendencias extraídas: {len(trends_data)}")
+
             if trends_data and len(trends_data) > 0:
-                print(f"[v0] Top 5 tendencias:")
+                log.info("Top 5 tendencias:")
                 for t in trends_data[:5]:
-                    print(f"  {t['rank']}. {t['term']} (volumen: {t.get('volume_text', t.get('volume'))})")
-            
-            await browser.close()
-            
-            mexico_time = get_mexico_trend_time()
-            
-            result = {
-                "timestamp": datetime.now().isoformat(),
-                "timestamp_mexico": mexico_time,
-                "country": "México",
-                "geo_code": "MX",
-                "timeframe": "Últimas 24 horas",
-                "total_trends": len(trends_data),
-                "trends": trends_data if len(trends_data) > 5 else generate_example_trends(),
-                "source": "Google Trends (Scraping Real)",
-                "status": "success" if len(trends_data) > 5 else "fallback"
-            }
-            
-            return result
-            
+                    log.info(f"  {t['rank']}. {t['term']} (volumen: {t.get('volume_text', t.get('volume'))})")
+
+            if len(trends_data) > 5:
+                result = build_result(geo, hours, trends_data, "Google Trends (Scraping Real)", "success")
+            else:
+                result = build_result(geo, hours, fallback_trends(geo), "Google Trends (Scraping Real)", "fallback")
+
         except asyncio.TimeoutError as e:
-            print(f"[v0] Timeout: {e}")
-            await browser.close()
-            mexico_time = get_mexico_trend_time()
-            return {
-                "timestamp": datetime.now().isoformat(),
-                "timestamp_mexico": mexico_time,
-                "country": "México",
-                "geo_code": "MX",
-                "timeframe": "Últimas 24 horas",
-                "total_trends": 20,
-                "trends": generate_example_trends(),
-                "source": "Google Trends",
-                "status": "fallback",
-                "error": str(e)
-            }
+            log.error(f"[{label}] Timeout: {e}")
+            result = build_result(geo, hours, fallback_trends(geo), "Google Trends", "fallback", error=str(e))
         except Exception as e:
-            print(f"[v0] Error: {type(e).__name__}: {e}")
-            await browser.close()
-            mexico_time = get_mexico_trend_time()
-            return {
-                "timestamp": datetime.now().isoformat(),
-                "timestamp_mexico": mexico_time,
-                "country": "México",
-                "geo_code": "MX",
-                "timeframe": "Últimas 24 horas",
-                "total_trends": 20,
-                "trends": generate_example_trends(),
-                "source": "Google Trends",
-                "status": "fallback",
-                "error": str(e)
-            }
+            log.error(f"[{label}] Error: {type(e).__name__}: {e}")
+            result = build_result(geo, hours, fallback_trends(geo), "Google Trends", "fallback", error=str(e))
+
+        blocker.log_summary(label)
+        result["network"] = blocker.summary()
+        metrics.set(
+            requests=blocker.requests_allowed,
+            requests_blocked=blocker.requests_blocked,
+            bytes=blocker.bytes_downloaded
+        )
+        return metrics.attach(result)
+
+async def scrape_google_trends(geos, windows, concurrency=DEFAULT_CONCURRENCY, worker=None):
+    """
+    Extrae varias combinaciones país/ventana en paralelo dentro de un solo
+    navegador. Como máximo `concurrency` páginas están abiertas a la vez.
+    Retorna un documento por cada (geo, ventana), en el orden pedido.
+    """
+    hours_list = [parse_window(w) for w in windows]
+    jobs = [(geo.upper(), hours) for geo in geos for hours in hours_list]
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    log.info(f"{len(jobs)} combinaciones país/ventana, concurrencia {concurrency}")
+
+    start = time.perf_counter()
+    async with browser_session(worker) as session:
+        # Arranque (o reuso) del navegador, compartido por todas las combinaciones
+        launch_ms = (time.perf_counter() - start) * 1000
+
+        async def run_job(geo, hours):
+            async with semaphore:
+                metrics = RunMetrics(SOURCE_GOOGLE_TRENDS, geo, window_label(hours))
+                metrics.add('browser_start', launch_ms, shared=True)
+                try:
+                    return await scrape_google_trends_geo(session, geo, hours, metrics=metrics)
+                except Exception as e:
+                    # Un país que falla (p.ej. al abrir la página) no tumba al resto
+                    log.error(f"[{geo}/{window_label(hours)}] Error: {type(e).__name__}: {e}")
+                    return metrics.attach(build_result(geo, hours, fallback_trends(geo), "Google Trends", "fallback", error=str(e)))
+
+        results = await asyncio.gather(*(run_job(geo, hours) for geo, hours in jobs))
+
+    finish_run(log, [data['status'] for data in results], "Google Trends")
+    return results
+
+async def scrape_google_trends_mexico(worker=None):
+    """
+    Extrae tendencias de Google Trends México usando Playwright.
+    Si se pasa un BrowserWorker, reutiliza su Chromium en lugar de lanzar uno.
+    """
+    async with browser_session(worker) as session:
+        result = await scrape_google_trends_geo(session, "MX", 24)
+    finish_run(log, [result['status']], "Google Trends")
+    return result
 
 def generate_example_trends():
     """Datos de ejemplo si el scraping falla"""
@@ -171,22 +331,36 @@ def generate_example_trends():
         {"name": "hellas verona - inter", "volume": "10K+"},
         {"name": "hector terrenes", "volume": "20K+"},
     ]
-    
-    return [
-        {
-            "rank": i + 1,
-            "term": item["name"],
-            "volume": 100 if "200K" in item["volume"] else 80 if "50K" in item["volume"] else 60 if "20K" in item["volume"] else 40,
-            "volume_text": item["volume"]
-        }
-        for i, item in enumerate(examples)
-    ]
+
+    return [gt_trend(i + 1, item["name"], item["volume"]) for i, item in enumerate(examples)]
+
+def output_path(geo, hours):
+    """
+    trends_data.json para México/24h (archivo histórico del dashboard);
+    trends_data_<GEO>_<ventana>.json para el resto.
+    """
+    if geo == "MX" and hours == 24:
+        return 'trends_data.json'
+    return f'trends_data_{geo}_{window_label(hours)}.json'
 
 if __name__ == "__main__":
-    data = asyncio.run(scrape_google_trends_mexico())
-    
-    with open('trends_data.json', 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    
-    print("\n[v0] Datos guardados en trends_data.json")
-    print(json.dumps(data, ensure_ascii=False, indent=2))
+    parser = argparse.ArgumentParser(description="Scraper de Google Trends (trending now)")
+    parser.add_argument('--geos', default='MX', help="Códigos de país separados por coma, o 'all'")
+    parser.add_argument('--windows', default='24h', help="Ventanas separadas por coma: 4h,24h,48h,7d")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY)
+    args = parser.parse_args()
+
+    geos = list(GEO_SETTINGS) if args.geos.strip().lower() == 'all' else [g.strip().upper() for g in args.geos.split(',') if g.strip()]
+    windows = [w.strip() for w in args.windows.split(',') if w.strip()]
+
+    start = time.perf_counter()
+    results = asyncio.run(scrape_google_trends(geos, windows, concurrency=args.concurrency))
+    elapsed = time.perf_counter() - start
+
+    for data in results:
+        output_file = output_path(data["geo_code"], data["hours"])
+        written = publish_snapshot(data, output_file, SOURCE_GOOGLE_TRENDS, data["geo_code"], window_label(data["hours"]))
+        target = output_file if written else "sin cambios"
+        log.info(f"{data['geo_code']}/{window_label(data['hours'])}: {data['status']}, {data['total_trends']} tendencias -> {target}")
+
+    log.info(f"{len(results)} documentos en {elapsed:.1f}s")
@@ -0,0 +1,199 @@
+"""
+Logging de los scrapers: niveles, salida a stderr y un buffer circular de
+registros de depuración.
+
+SCRAPER_LOG_LEVEL    nivel que se muestra en consola (DEBUG, INFO, WARNING;
+                     por defecto INFO)
+SCRAPER_LOG_BUFFER   cuántos registros DEBUG guardar en memoria (por defecto
+                     500, 0 para desactivar)
+
+Los log.debug() por tendencia no se formatean ni se escriben: quedan en el
+buffer y solo se vuelcan a consola con flush_debug() cuando una corrida
+falla o cae en fallback. Guardar uno cuesta un append (sin LogRecord ni
+formateo); con SCRAPER_LOG_BUFFER=0 y nivel INFO se descarta sin más.
+
+Uso:
+    log = get_logger(__name__)
+    log.debug("Fila %d: Saltando anuncio", idx)     # argumentos, no f-strings
+    log.info(f"Tendencias extraídas: {len(trends)}")
+    flush_debug("xtrends terminó en error", log)
+"""
+
+import logging
+import os
+import sys
+import time
+from collections import deque
+from datetime import datetime
+
+ROOT_LOGGER = 'trends'
+DEFAULT_LEVEL = 'INFO'
+DEFAULT_BUFFER_SIZE = 500
+
+# Estados con los que una corrida se considera sana
+OK_STATUSES = ('success', 'unchanged')
+
+CONSOLE_FORMAT = '[v0] %(message)s'
+
+# Estado del proceso: se configura una sola vez, en el primer get_logger()
+_console = None
+_buffer = None
+
+# Los registros no necesitan PID ni nombre de proceso
+logging.logProcesses = False
+logging.logMultiprocessing = False
+
+class StderrHandler(logging.StreamHandler):
+    """
+    StreamHandler que resuelve sys.stderr en cada escritura, así
+    contextlib.redirect_stderr() también silencia los logs.
+    """
+
+    def __init__(self):
+        super().__init__(sys.stderr)
+
+    @property
+    def stream(self):
+        return sys.stderr
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+class DebugRingBuffer:
+    """
+    Últimos registros DEBUG que la consola no muestra, como tuplas
+    (epoch, logger, mensaje, args). No se crea un LogRecord ni se formatea
+    nada hasta el volcado: el costo es un append a un deque acotado.
+    """
+
+    def __init__(self, capacity):
+        self.records = deque(maxlen=capacity)
+
+    def drain(self, name=None):
+        """
+        Saca los registros del logger name (y sus hijos), o todos.
+        """
+        if name is None:
+            drained = list(self.records)
+            self.records.clear()
+            return drained
+        drained, kept = [], []
+        for record in self.records:
+            if record[1] == name or record[1].startswith(f"{name}."):
+                drained.append(record)
+            else:
+                kept.append(record)
+        self.records.clear()
+        self.records.extend(kept)
+        return drained
+
+class ScraperLogger(logging.Logger):
+    """
+    Logger de los scrapers: mientras la consola no muestre DEBUG, debug()
+    va directo al buffer circular en lugar de pasar por los handlers.
+    """
+
+    def debug(self, msg, *args, **kwargs):
+        if _buffer is not None:
+            # deque.append es atómico: seguro desde hilos (asyncio.to_thread)
+            _buffer.records.append((time.time(), self.name, msg, args))
+        elif self.isEnabledFor(logging.DEBUG):
+            self._log(logging.DEBUG, msg, args, **kwargs)
+
+def format_record(record):
+    created, name, msg, args = record
+    try:
+        message = msg % args if args else str(msg)
+    except (TypeError, ValueError):
+        message = f"{msg} {args}"
+    clock = datetime.fromtimestamp(created).strftime('%H:%M:%S.%f')[:-3]
+    return f"[v0] [debug {clock} {name}] {message}"
+
+def parse_level(value):
+    level = logging.getLevelName(str(value).strip().upper())
+    if not isinstance(level, int):
+        print(f"[v0] ⚠ SCRAPER_LOG_LEVEL inválido: '{value}', se usa {DEFAULT_LEVEL}", file=sys.stderr)
+        return logging.getLevelName(DEFAULT_LEVEL)
+    return level
+
+def setup_logging(level=None, buffer_size=None):
+    """
+    (Re)configura el logger raíz de los scrapers. Sin argumentos toma
+    SCRAPER_LOG_LEVEL y SCRAPER_LOG_BUFFER.
+    """
+    global _console, _buffer
+    level = parse_level(level if level is not None else os.environ.get('SCRAPER_LOG_LEVEL', DEFAULT_LEVEL))
+    if buffer_size is None:
+        try:
+            buffer_size = int(os.environ.get('SCRAPER_LOG_BUFFER', DEFAULT_BUFFER_SIZE))
+        except ValueError:
+            buffer_size = DEFAULT_BUFFER_SIZE
+
+    root = logging.getLogger(ROOT_LOGGER)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.propagate = False
+
+    _console = StderrHandler()
+    _console.setLevel(level)
+    _console.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+    root.addHandler(_console)
+
+    # Con la consola en DEBUG todo se muestra y el buffer no hace falta
+    _buffer = DebugRingBuffer(buffer_size) if buffer_size > 0 and level > logging.DEBUG else None
+    root.setLevel(level)
+    return root
+
+def get_logger(name):
+    """
+    Logger hijo de 'trends' (el nombre del módulo, sin el prefijo __main__).
+    """
+    if _console is None:
+        setup_logging()
+    if name == '__main__':
+        name = os.path.splitext(os.path.basename(sys.argv[0] or 'main'))[0] or 'main'
+    # Solo los loggers de 'trends' usan ScraperLogger; el resto del proceso
+    # (asyncio, urllib3...) sigue con la clase por defecto
+    manager = logging.Logger.manager
+    previous = manager.loggerClass
+    manager.setLoggerClass(ScraperLogger)
+    try:
+        return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+    finally:
+        manager.loggerClass = previous
+
+def flush_debug(reason, logger=None):
+    """
+    Vuelca a consola los registros guardados (solo los de logger, si se
+    pasa) precedidos de una línea con el motivo. Retorna cuántos volcó.
+    """
+    if _buffer is None:
+        return 0
+    records = _buffer.drain(logger.name if logger is not None else None)
+    if not records:
+        return 0
+    stream = sys.stderr
+    stream.write(f"[v0] ---- {len(records)} registros de depuración ({reason}) ----\n")
+    for record in records:
+        stream.write(format_record(record) + "\n")
+    stream.flush()
+    return len(records)
+
+def discard_debug(logger=None):
+    """
+    Descarta los registros guardados de una corrida que terminó bien.
+    """
+    if _buffer is not None:
+        _buffer.drain(logger.name if logger is not None else None)
+
+def finish_run(logger, statuses, label):
+    """
+    Cierre de una corrida: si algún estado no es sano (error, fallback,
+    example_data) vuelca la depuración del logger; si no, la descarta.
+    """
+    failed = sorted({status for status in statuses if status not in OK_STATUSES})
+    if failed:
+        return flush_debug(f"{label}: {', '.join(failed)}", logger)
+    discard_debug(logger)
+    return 0
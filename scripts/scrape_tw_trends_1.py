@@ -1,11 +1,90 @@
 import asyncio
-from playwright.async_api import async_playwright
 import json
 import re
 from datetime import datetime, timedelta
 import pytz
-import random
-import sys
+import time
+from contextlib import nullcontext
+import requests
+from bs4 import BeautifulSoup
+from browser_worker import browser_session
+from request_blocking import ResourceBlocker, TWITTER_TRENDING_RULES
+from page_waits import wait_for_json_ld, politeness_delay
+from fixture_replay import http_client
+from run_metrics import RunMetrics
+from snapshot_output import publish_snapshot, conditional_headers, response_validators, build_unchanged_result
+from scrape_log import get_logger, finish_run, flush_debug
+from trend_store import SOURCE_TWITTER_TRENDING
+
+log = get_logger(__name__)
+
+# Extrae pares (nombre, tiempo relativo) recorriendo solo las filas de
+# tendencias. Cada fila es el ancestro más alto del link de la tendencia que
+# no contiene el link de otra tendencia; dentro de ella solo se visitan nodos
+# de texto, así que el costo es lineal en el tamaño de las filas (nunca se lee
+# textContent de contenedores grandes). Si la página
+# no tiene links de búsqueda, recorre una vez los nodos de texto del body y
+# asigna cada tiempo al último nombre de tendencia visto.
+TREND_TIMES_JS = """
+    (names) => {
+        const wanted = new Set(names.map(n => n.trim()));
+        const timePattern = /(\\d+\\s+(minute|hour|day)s?\\s+ago|just now)/i;
+        const linkSelector = 'a[href*="search?q="]';
+        const pairs = [];
+        const seen = new Set();
+
+        const firstTimeIn = (root) => {
+            const walker = document.createTreeWalker(root, NodeFilter.SHOW_TEXT);
+            for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+                const text = node.nodeValue.trim();
+                if (text && text.length < 50 && timePattern.test(text)) return text;
+            }
+            return null;
+        };
+
+        // Cuántos links de tendencia cuelgan de cada ancestro (O(links × profundidad))
+        const links = Array.from(document.querySelectorAll(linkSelector));
+        const linkCount = new Map();
+        for (const link of links) {
+            for (let el = link.parentElement; el && el !== document.body; el = el.parentElement) {
+                linkCount.set(el, (linkCount.get(el) || 0) + 1);
+            }
+        }
+
+        for (const link of links) {
+            const name = (link.textContent || '').trim();
+            if (!wanted.has(name) || seen.has(name)) continue;
+
+            let row = link;
+            while (row.parentElement && linkCount.get(row.parentElement) === 1) {
+                row = row.parentElement;
+            }
+
+            const time = firstTimeIn(row);
+            if (time) {
+                pairs.push({name: name, time: time});
+                seen.add(name);
+            }
+        }
+
+        if (pairs.length > 0) return pairs;
+
+        let current = null;
+        const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+        for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+            const text = node.nodeValue.trim();
+            if (!text) continue;
+            if (wanted.has(text)) {
+                current = text;
+            } else if (current && !seen.has(current) && text.length < 50 && timePattern.test(text)) {
+                pairs.push({name: current, time: text});
+                seen.add(current);
+                current = null;
+            }
+        }
+        return pairs;
+    }
+"""
 
 def extract_minutes_ago(time_text):
     """
@@ -16,31 +95,31 @@ def extract_minutes_ago(time_text):
         return None
     
     time_text = time_text.strip().lower()
-    print(f"[v0] Analizando tiempo: '{time_text}'", file=sys.stderr)
+    log.debug("Analizando tiempo: '%s'", time_text)
     
     # Buscar "X minutes ago"
     match = re.search(r'(\d+)\s+minutes?\s+ago', time_text)
     if match:
         minutes = int(match.group(1))
-        print(f"[v0]   ✓ Es reciente: {minutes} minutos", file=sys.stderr)
+        log.debug("  ✓ Es reciente: %d minutos", minutes)
         return minutes
     
     # Si dice "hour" o "hours", no es reciente (>60 minutos)
     if 'hour' in time_text:
-        print(f"[v0]   ✗ Es viejo: {time_text}", file=sys.stderr)
+        log.debug("  ✗ Es viejo: %s", time_text)
         return None
     
     # Si dice "day" o "days", descartarlo
     if 'day' in time_text:
-        print(f"[v0]   ✗ Es muy viejo: {time_text}", file=sys.stderr)
+        log.debug("  ✗ Es muy viejo: %s", time_text)
         return None
     
     # Si dice "just now" o "now", contar como 0 minutos
     if 'just now' in time_text or 'now' == time_text:
-        print(f"[v0]   ✓ Es ahora mismo: 0 minutos", file=sys.stderr)
+        log.debug("  ✓ Es ahora mismo: 0 minutos")
         return 0
     
-    print(f"[v0]   ? Formato desconocido: {time_text}", file=sys.stderr)
+    log.debug("  ? Formato desconocido: %s", time_text)
     return None
 
 def extract_minutes_from_datetime(date_string):
@@ -57,10 +136,10 @@ def extract_minutes_from_datetime(date_string):
         time_diff = now - created_time
         minutes_ago = int(time_diff.total_seconds() / 60)
         
-        print(f"[v0] Tiempo desde creación: {minutes_ago} minutos", file=sys.stderr)
+        log.debug("Tiempo desde creación: %d minutos", minutes_ago)
         return minutes_ago
     except Exception as e:
-        print(f"[v0] Error parseando fecha: {e}", file=sys.stderr)
+        log.warning(f"Error parseando fecha: {e}")
         return None
 
 def get_trend_time_from_creation(date_created_str):
@@ -81,7 +160,7 @@ def get_trend_time_from_creation(date_created_str):
             "minute": created_time_mexico.minute
         }
     except Exception as e:
-        print(f"[v0] Error parseando fecha: {e}", file=sys.stderr)
+        log.warning(f"Error parseando fecha: {e}")
         mexico_tz = pytz.timezone('America/Mexico_City')
         now = datetime.now(mexico_tz)
         return {
@@ -93,251 +172,455 @@ def get_trend_time_from_creation(date_created_str):
             "minute": now.minute
         }
 
-async def scrape_twitter_trending_mexico():
+URL = 'https://www.twitter-trending.com/mexico/en'
+OUTPUT_FILE = 'twitter_trending_com_data.json'
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+TIME_PATTERN = re.compile(r'(\d+\s+(minute|hour|day)s?\s+ago|just now)', re.IGNORECASE)
+
+def iter_json_ld_nodes(data):
     """
-    Extrae tendencias de https://www.twitter-trending.com/mexico/en
-    Usa Playwright para bypassear protección Cloudflare.
+    Nodos (dicts) de un bloque JSON-LD: el bloque puede ser un objeto, un
+    array de objetos o un objeto con "@graph". Lo que no es dict se ignora.
+    """
+    if isinstance(data, list):
+        for entry in data:
+            yield from iter_json_ld_nodes(entry)
+    elif isinstance(data, dict):
+        yield data
+        if '@graph' in data:
+            yield from iter_json_ld_nodes(data['@graph'])
+
+def find_item_list(blocks):
     """
-    url = 'https://www.twitter-trending.com/mexico/en'
+    Primer ItemList entre los bloques JSON-LD ya parseados, o None.
+    """
+    for block in blocks:
+        for node in iter_json_ld_nodes(block):
+            if node.get('@type') == 'ItemList':
+                return node
+    return None
+
+def get_json_ld_items(json_ld_data):
+    """
+    Valida el JSON-LD (ItemList) y retorna su itemListElement, o None.
+    """
+    if not json_ld_data:
+        log.error("ERROR: No se encontró JSON-LD")
+        return None
     
-    print("[v0] ========== INICIANDO SCRAPING TWITTER-TRENDING.COM ==========", file=sys.stderr)
-    print(f"[v0] URL: {url}", file=sys.stderr)
+    log.info(f"✓ JSON-LD encontrado. Tipo: {json_ld_data.get('@type')}")
+    
+    if json_ld_data.get('@type') != 'ItemList':
+        log.error(f"ERROR: Tipo incorrecto: {json_ld_data.get('@type')}")
+        return None
     
-    async with async_playwright() as p:
+    items = json_ld_data.get('itemListElement', [])
+    if not isinstance(items, list):
+        log.error("ERROR: itemListElement no es una lista")
+        return None
+    items = [item for item in items if isinstance(item, dict)]
+    log.info(f"Total de tendencias en JSON-LD: {len(items)}")
+    
+    if not items:
+        log.error("ERROR: itemListElement vacío")
+        return None
+    
+    return items
+
+def extract_trend_times_from_soup(soup, names):
+    """
+    Versión en Python de TREND_TIMES_JS para el HTML descargado por HTTP.
+    Retorna {nombre: tiempo relativo} buscando solo dentro de la fila de cada
+    tendencia.
+    """
+    wanted = {name.strip() for name in names}
+    body = soup.body or soup
+    times = {}
+    
+    links = body.select('a[href*="search?q="]')
+    link_count = {}
+    for link in links:
+        for el in link.parents:
+            if el is body:
+                break
+            link_count[id(el)] = link_count.get(id(el), 0) + 1
+    
+    for link in links:
+        name = link.get_text().strip()
+        if name not in wanted or name in times:
+            continue
+        
+        row = link
+        while row.parent is not None and link_count.get(id(row.parent)) == 1:
+            row = row.parent
+        
+        for text in row.find_all(string=True):
+            text = text.strip()
+            if text and len(text) < 50 and TIME_PATTERN.search(text):
+                times[name] = text
+                break
+    
+    if times:
+        return times
+    
+    current = None
+    for text in body.find_all(string=True):
+        text = text.strip()
+        if not text:
+            continue
+        if text in wanted:
+            current = text
+        elif current and current not in times and len(text) < 50 and TIME_PATTERN.search(text):
+            times[current] = text
+            current = None
+    return times
+
+def fetch_trending_http(url=URL, extra_headers=None, http_session=None, metrics=None):
+    """
+    Intento ligero: GET simple + parseo del JSON-LD sin navegador.
+    Retorna (status_code, items o None, {nombre: tiempo}, validadores HTTP).
+    Con extra_headers condicionales un 304 se retorna sin parsear nada.
+    Con http_session (requests.Session) reutiliza sus conexiones abiertas.
+    Si se pasa metrics, mide las etapas "http_fetch" y "parse".
+    """
+    headers = {
+        'User-Agent': USER_AGENT,
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'es-MX,es;q=0.9,en;q=0.8',
+        **(extra_headers or {}),
+    }
+    
+    log.info("Intentando descarga HTTP directa (sin navegador)...")
+    with metrics.span('http_fetch', requests=1) if metrics else nullcontext({}) as span:
+        response = http_client(http_session).get(url, headers=headers, timeout=15)
+        span['status'] = response.status_code
+        span['bytes'] = len(response.content)
+    log.info(f"HTTP status code: {response.status_code}")
+    http = response_validators(response)
+    
+    if response.status_code != 200:
+        return response.status_code, None, {}, http
+    
+    with metrics.span('parse') if metrics else nullcontext({}) as span:
+        items, time_by_name = parse_trending_html(response.text)
+        span['trends'] = len(items or [])
+    return response.status_code, items, time_by_name, http
+
+def parse_trending_html(html):
+    """
+    JSON-LD (ItemList) + tiempos visibles de una página ya descargada.
+    Retorna (items o None, {nombre: tiempo}).
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    blocks = []
+    for script in soup.find_all('script', {'type': 'application/ld+json'}):
         try:
-            print("[v0] Lanzando navegador Chromium...", file=sys.stderr)
-            browser = await p.chromium.launch(
-                headless=True,
-                args=[
-                    '--disable-blink-features=AutomationControlled',
-                    '--disable-dev-shm-usage',
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox'
-                ]
-            )
-            
-            context = await browser.new_context(
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                viewport={'width': 1920, 'height': 1080},
-                locale='es-MX',
-                timezone_id='America/Mexico_City'
-            )
+            blocks.append(json.loads(script.string or ''))
+        except json.JSONDecodeError:
+            continue
+    
+    items = get_json_ld_items(find_item_list(blocks))
+    if not items:
+        return None, {}
+    
+    trend_names = [item.get('name', '').strip() for item in items[:40] if item.get('name')]
+    return items, extract_trend_times_from_soup(soup, trend_names)
+
+def build_trending_result(items, time_by_name):
+    """
+    Convierte los items del JSON-LD (más los tiempos visibles por nombre) al
+    formato de salida. Retorna None si no quedó ninguna tendencia.
+    """
+    trends_list = []
+    scraping_time_mexico = datetime.now(pytz.timezone('America/Mexico_City'))
+    oldest_trend_minutes = None
+    
+    for idx, item in enumerate(items[:40]):
+        if item.get('@type') != 'ListItem':
+            continue
             
+        position = item.get('position', idx + 1)
+        name = item.get('name', '').strip()
+        tweet_count = item.get('Tweet Count', 0)
+        url_trend = item.get('url', '')
+        date_created = item.get('dateCreated', '')
+        
+        if not name:
+            continue
+        
+        # Convertir volumen exacto de 1000 a -1
+        if tweet_count == 1000:
+            tweet_count = -1
+        
+        # Calcular minutos desde creación
+        minutes_since_creation = extract_minutes_from_datetime(date_created)
+        
+        # También intentar extraer del HTML visible (fila de esta misma tendencia)
+        if name in time_by_name:
+            minutes_from_html = extract_minutes_ago(time_by_name[name])
+            if minutes_from_html is not None:
+                minutes_since_creation = minutes_from_html
+        
+        # Guardar el mayor número de minutos (tendencia más antigua)
+        if minutes_since_creation is not None:
+            if oldest_trend_minutes is None or minutes_since_creation > oldest_trend_minutes:
+                oldest_trend_minutes = minutes_since_creation
+        
+        trend_time = get_trend_time_from_creation(date_created) if date_created else {
+            "timestamp_iso": scraping_time_mexico.isoformat(),
+            "day": scraping_time_mexico.day,
+            "month": scraping_time_mexico.month,
+            "year": scraping_time_mexico.year,
+            "hour": scraping_time_mexico.hour,
+            "minute": scraping_time_mexico.minute,
+        }
+        
+        trend_data = {
+            "rank": position,
+            "term": name,
+            "tweet_volume": tweet_count,
+            "minutes_since_creation": minutes_since_creation,
+            "trend_time_mexico": trend_time,
+            "url": url_trend
+        }
+        
+        trends_list.append(trend_data)
+        
+        if idx < 5:
+            log.info(f"#{position}: {name} ({tweet_count} tweets, {minutes_since_creation} min)")
+    
+    log.info(f"✓ {len(trends_list)} tendencias extraídas correctamente")
+    
+    if len(trends_list) == 0:
+        log.error("ERROR: No se extrajo ninguna tendencia")
+        return None
+    
+    # Calcular cuándo se actualizaron los datos por última vez
+    first_trend_minutes = trends_list[0]['minutes_since_creation'] if trends_list and trends_list[0].get('minutes_since_creation') is not None else None
+    
+    if first_trend_minutes is not None:
+        data_updated_time = scraping_time_mexico - timedelta(minutes=first_trend_minutes)
+    else:
+        data_updated_time = scraping_time_mexico
+    
+    result = {
+        "scraping_time": {
+            "timestamp_iso": scraping_time_mexico.isoformat(),
+            "day": scraping_time_mexico.day,
+            "month": scraping_time_mexico.month,
+            "year": scraping_time_mexico.year,
+            "hour": scraping_time_mexico.hour,
+            "minute": scraping_time_mexico.minute,
+            "description": "Hora en la que se ejecutó el scraping"
+        },
+        "data_source_updated_time": {
+            "timestamp_iso": data_updated_time.isoformat(),
+            "day": data_updated_time.day,
+            "month": data_updated_time.month,
+            "year": data_updated_time.year,
+            "hour": data_updated_time.hour,
+            "minute": data_updated_time.minute,
+            "minutes_ago": first_trend_minutes,
+            "description": "Hora en la que la fuente actualizó los datos por última vez"
+        },
+        "country": "México",
+        "platform": "Twitter/X",
+        "source": "twitter-trending.com",
+        "total_trends": len(trends_list),
+        "trends": trends_list,
+        "status": "success"
+    }
+    
+    log.info("✓✓✓ SCRAPING EXITOSO")
+    log.info(f"Scraping realizado: {scraping_time_mexico.strftime('%H:%M:%S')}")
+    log.info(f"Datos actualizados: {data_updated_time.strftime('%H:%M:%S')} ({first_trend_minutes} min atrás)")
+    return result
+
+async def scrape_twitter_trending_browser(url=URL, worker=None, block_rules=TWITTER_TRENDING_RULES, metrics=None):
+    """
+    Ruta pesada: Playwright para bypassear protección Cloudflare.
+    Si se pasa un BrowserWorker, reutiliza su Chromium en lugar de lanzar uno.
+    Imágenes, fuentes, CSS y trackers se bloquean según block_rules.
+    Cada etapa (arranque, goto, espera, evaluate) se mide en metrics.
+    """
+    metrics = metrics or RunMetrics(SOURCE_TWITTER_TRENDING)
+    start = time.perf_counter()
+    try:
+        async with browser_session(worker) as session, session.new_page(
+            user_agent=USER_AGENT,
+            viewport={'width': 1920, 'height': 1080},
+            locale='es-MX',
+            timezone_id='America/Mexico_City',
             # Inyectar scripts para evadir detección
-            await context.add_init_script("""
+            init_script="""
                 Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
                 window.chrome = {runtime: {}};
-            """)
+            """
+        ) as page:
             
-            page = await context.new_page()
+            # Incluye el arranque de Chromium si el worker estaba frío
+            metrics.add('new_page', (time.perf_counter() - start) * 1000)
+            blocker = await ResourceBlocker(block_rules).install(page)
             
-            print("[v0] Navegando a twitter-trending.com...", file=sys.stderr)
+            log.info("Navegando a twitter-trending.com...")
             
-            delay_before_nav = random.uniform(2, 4)
-            await asyncio.sleep(delay_before_nav)
+            with metrics.span('delay'):
+                await politeness_delay()
             
-            response = await page.goto(url, wait_until='domcontentloaded', timeout=40000)
+            with metrics.span('goto') as span:
+                response = await page.goto(url, wait_until='domcontentloaded', timeout=40000)
+                span['status'] = response.status
             
-            print(f"[v0] Status code: {response.status}", file=sys.stderr)
+            log.info(f"Status code: {response.status}")
             
             if response.status == 403:
-                print("[v0] ⚠ Status 403 - Esperando a que Cloudflare resuelva...", file=sys.stderr)
-                await asyncio.sleep(5)
+                log.warning("⚠ Status 403 - Esperando a que Cloudflare resuelva...")
             
-            # Esperar a que JavaScript renderice
-            print("[v0] Esperando a que la página cargue completamente...", file=sys.stderr)
-            await asyncio.sleep(random.uniform(3, 6))
+            # Esperar a que aparezca el JSON-LD (tras el desafío, si lo hubo)
+            log.info("Esperando a que la página cargue completamente...")
+            with metrics.span('render_wait') as span:
+                span['ready'] = await wait_for_json_ld(page, 25000 if response.status == 403 else 10000)
             
             # Verificar si hay JSON-LD
-            print("[v0] Buscando JSON-LD...", file=sys.stderr)
-            html = await page.content()
+            log.info("Buscando JSON-LD...")
+            with metrics.span('content') as span:
+                html = await page.content()
+                span['chars'] = len(html)
             
             if len(html) < 2000:
-                print(f"[v0] ERROR: HTML demasiado corto ({len(html)} chars)", file=sys.stderr)
-                await browser.close()
+                log.error(f"ERROR: HTML demasiado corto ({len(html)} chars)")
                 return generate_example_data()
             
-            print(f"[v0] HTML recibido: {len(html)} caracteres", file=sys.stderr)
+            log.info(f"HTML recibido: {len(html)} caracteres")
             
             # Extraer JSON-LD usando JavaScript
-            json_ld_data = await page.evaluate("""
-                () => {
-                    const script = document.querySelector('script[type="application/ld+json"]');
-                    if (!script) return null;
-                    try {
-                        return JSON.parse(script.textContent);
-                    } catch (e) {
-                        return null;
-                    }
-                }
-            """)
-            
-            if not json_ld_data:
-                print("[v0] ERROR: No se encontró JSON-LD", file=sys.stderr)
-                
-                # Guardar HTML para debug
-                with open('/tmp/debug_html.html', 'w', encoding='utf-8') as f:
-                    f.write(html[:5000])
-                print("[v0] HTML guardado en /tmp/debug_html.html", file=sys.stderr)
-                
-                await browser.close()
-                return generate_example_data()
-            
-            print(f"[v0] ✓ JSON-LD encontrado. Tipo: {json_ld_data.get('@type')}", file=sys.stderr)
-            
-            if json_ld_data.get('@type') != 'ItemList':
-                print(f"[v0] ERROR: Tipo incorrecto: {json_ld_data.get('@type')}", file=sys.stderr)
-                await browser.close()
-                return generate_example_data()
-            
-            items = json_ld_data.get('itemListElement', [])
-            print(f"[v0] Total de tendencias en JSON-LD: {len(items)}", file=sys.stderr)
+            with metrics.span('evaluate_json_ld') as span:
+                json_ld_blocks = await page.evaluate("""
+                    () => Array.from(document.querySelectorAll('script[type="application/ld+json"]'), script => {
+                        try {
+                            return JSON.parse(script.textContent);
+                        } catch (e) {
+                            return null;
+                        }
+                    })
+                """)
+                json_ld_data = find_item_list(json_ld_blocks or [])
+                span['dom_nodes'] = await page.evaluate("() => document.getElementsByTagName('*').length")
             
+            items = get_json_ld_items(json_ld_data)
             if not items:
-                print("[v0] ERROR: itemListElement vacío", file=sys.stderr)
-                await browser.close()
+                if not json_ld_data:
+                    # Guardar HTML para debug
+                    with open('/tmp/debug_html.html', 'w', encoding='utf-8') as f:
+                        f.write(html[:5000])
+                    log.info("HTML guardado en /tmp/debug_html.html")
                 return generate_example_data()
             
             # Ahora extraer información de tiempos desde el HTML visible
-            print("[v0] Extrayendo información de tiempos...", file=sys.stderr)
-            time_info = await page.evaluate("""
-                () => {
-                    const timeElements = Array.from(document.querySelectorAll('*'))
-                        .filter(el => {
-                            const text = el.textContent || '';
-                            return text.includes('ago') || text.includes('minutes') || text.includes('hours');
-                        })
-                        .map(el => el.textContent.trim())
-                        .filter(text => text.length < 50);
-                    return timeElements;
-                }
-            """)
+            log.info("Extrayendo información de tiempos...")
+            trend_names = [item.get('name', '').strip() for item in items[:40] if item.get('name')]
+            with metrics.span('evaluate_times') as span:
+                time_info = await page.evaluate(TREND_TIMES_JS, trend_names)
+                span['pairs'] = len(time_info)
+            time_by_name = {entry['name']: entry['time'] for entry in time_info}
             
-            print(f"[v0] Elementos de tiempo encontrados: {len(time_info)}", file=sys.stderr)
+            log.info(f"Tiempos emparejados con tendencias: {len(time_by_name)}")
             if time_info:
-                print(f"[v0] Ejemplos: {time_info[:3]}", file=sys.stderr)
-            
-            # Procesar tendencias
-            trends_list = []
-            scraping_time_mexico = datetime.now(pytz.timezone('America/Mexico_City'))
-            oldest_trend_minutes = None
-            
-            for idx, item in enumerate(items[:40]):
-                if item.get('@type') != 'ListItem':
-                    continue
-                    
-                position = item.get('position', idx + 1)
-                name = item.get('name', '').strip()
-                tweet_count = item.get('Tweet Count', 0)
-                url_trend = item.get('url', '')
-                date_created = item.get('dateCreated', '')
-                
-                if not name:
-                    continue
-                
-                # Convertir volumen exacto de 1000 a -1
-                if tweet_count == 1000:
-                    tweet_count = -1
-                
-                # Calcular minutos desde creación
-                minutes_since_creation = extract_minutes_from_datetime(date_created)
-                
-                # También intentar extraer de time_info si disponible
-                if idx < len(time_info):
-                    minutes_from_html = extract_minutes_ago(time_info[idx])
-                    if minutes_from_html is not None:
-                        minutes_since_creation = minutes_from_html
-                
-                # Guardar el mayor número de minutos (tendencia más antigua)
-                if minutes_since_creation is not None:
-                    if oldest_trend_minutes is None or minutes_since_creation > oldest_trend_minutes:
-                        oldest_trend_minutes = minutes_since_creation
-                
-                trend_time = get_trend_time_from_creation(date_created) if date_created else {
-                    "timestamp_iso": scraping_time_mexico.isoformat(),
-                    "day": scraping_time_mexico.day,
-                    "month": scraping_time_mexico.month,
-                    "year": scraping_time_mexico.year,
-                    "hour": scraping_time_mexico.hour,
-                    "minute": scraping_time_mexico.minute,
-                }
-                
-                trend_data = {
-                    "rank": position,
-                    "term": name,
-                    "tweet_volume": tweet_count,
-                    "minutes_since_creation": minutes_since_creation,
-                    "trend_time_mexico": trend_time,
-                    "url": url_trend
-                }
-                
-                trends_list.append(trend_data)
-                
-                if idx < 5:
-                    print(f"[v0] #{position}: {name} ({tweet_count} tweets, {minutes_since_creation} min)", file=sys.stderr)
+                log.info(f"Ejemplos: {time_info[:3]}")
             
-            await browser.close()
-            
-            print(f"\n[v0] ✓ {len(trends_list)} tendencias extraídas correctamente", file=sys.stderr)
-            
-            if len(trends_list) == 0:
-                print("[v0] ERROR: No se extrajo ninguna tendencia", file=sys.stderr)
-                return generate_example_data()
+            blocker.log_summary("twitter-trending.com")
+            metrics.set(
+                requests=blocker.requests_allowed,
+                requests_blocked=blocker.requests_blocked,
+                bytes=blocker.bytes_downloaded
+            )
             
-            # Calcular cuándo se actualizaron los datos por última vez
-            first_trend_minutes = trends_list[0]['minutes_since_creation'] if trends_list and trends_list[0].get('minutes_since_creation') is not None else None
+        with metrics.span('build') as span:
+            result = build_trending_result(items, time_by_name) or generate_example_data()
+            span['trends'] = result['total_trends']
+        result["network"] = blocker.summary()
+        return result
             
-            if first_trend_minutes is not None:
-                data_updated_time = scraping_time_mexico - timedelta(minutes=first_trend_minutes)
+    except Exception as e:
+        log.error(f"ERROR GENERAL: {type(e).__name__}: {str(e)[:200]}", exc_info=True)
+        return generate_example_data()
+
+async def scrape_twitter_trending_mexico(worker=None, http_first=True, conditional=True, http_session=None):
+    """
+    Extrae tendencias de https://www.twitter-trending.com/mexico/en
+    Primero intenta una descarga HTTP simple y lee el JSON-LD; solo si la
+    respuesta es 403 o no trae JSON-LD escala al navegador (Playwright).
+    El resultado indica en "fetch_mode" qué ruta se usó.
+    Con conditional=True la descarga HTTP envía el ETag/Last-Modified de la
+    última publicación y un 304 retorna un resultado "unchanged".
+    Los procesos de larga duración pasan http_session para no reabrir conexiones.
+    El resultado lleva en "timing" la duración de cada etapa.
+    """
+    metrics = RunMetrics(SOURCE_TWITTER_TRENDING)
+    result = metrics.attach(await run_twitter_trending_scrape(metrics, worker, http_first, conditional, http_session))
+    finish_run(log, [result['status']], "twitter-trending.com")
+    return result
+
+async def run_twitter_trending_scrape(metrics, worker=None, http_first=True, conditional=True, http_session=None):
+    """
+    Cuerpo de scrape_twitter_trending_mexico(), con cada etapa medida en metrics.
+    """
+    url = URL
+    
+    log.info("========== INICIANDO SCRAPING TWITTER-TRENDING.COM ==========")
+    log.info(f"URL: {url}")
+    
+    escalation_reason = None
+    if http_first:
+        validators = conditional_headers(SOURCE_TWITTER_TRENDING, 'MX') if conditional else {}
+        try:
+            status_code, items, time_by_name, http = await asyncio.to_thread(
+                fetch_trending_http, url, validators, http_session, metrics
+            )
+            if status_code == 304:
+                result = build_unchanged_result("twitter-trending.com", http)
+                result["fetch_mode"] = "http"
+                return result
+            if status_code == 403:
+                escalation_reason = "http_403"
+            elif status_code != 200:
+                escalation_reason = f"http_{status_code}"
+            elif not items:
+                escalation_reason = "json_ld_missing"
             else:
-                data_updated_time = scraping_time_mexico
-            
-            result = {
-                "scraping_time": {
-                    "timestamp_iso": scraping_time_mexico.isoformat(),
-                    "day": scraping_time_mexico.day,
-                    "month": scraping_time_mexico.month,
-                    "year": scraping_time_mexico.year,
-                    "hour": scraping_time_mexico.hour,
-                    "minute": scraping_time_mexico.minute,
-                    "description": "Hora en la que se ejecutó el scraping"
-                },
-                "data_source_updated_time": {
-                    "timestamp_iso": data_updated_time.isoformat(),
-                    "day": data_updated_time.day,
-                    "month": data_updated_time.month,
-                    "year": data_updated_time.year,
-                    "hour": data_updated_time.hour,
-                    "minute": data_updated_time.minute,
-                    "minutes_ago": first_trend_minutes,
-                    "description": "Hora en la que la fuente actualizó los datos por última vez"
-                },
-                "country": "México",
-                "platform": "Twitter/X",
-                "source": "twitter-trending.com",
-                "total_trends": len(trends_list),
-                "trends": trends_list,
-                "status": "success"
-            }
-            
-            print(f"[v0] ✓✓✓ SCRAPING EXITOSO", file=sys.stderr)
-            print(f"[v0] Scraping realizado: {scraping_time_mexico.strftime('%H:%M:%S')}", file=sys.stderr)
-            print(f"[v0] Datos actualizados: {data_updated_time.strftime('%H:%M:%S')} ({first_trend_minutes} min atrás)", file=sys.stderr)
-            return result
-            
+                with metrics.span('build') as span:
+                    result = build_trending_result(items, time_by_name)
+                    span['trends'] = result['total_trends'] if result else 0
+                if result:
+                    result["fetch_mode"] = "http"
+                    result["http"] = http
+                    return result
+                escalation_reason = "json_ld_empty"
+        except requests.exceptions.RequestException as e:
+            log.warning(f"⚠ Descarga HTTP falló: {type(e).__name__}: {e}")
+            escalation_reason = "http_error"
         except Exception as e:
-            print(f"[v0] ERROR GENERAL: {type(e).__name__}: {str(e)[:200]}", file=sys.stderr)
-            import traceback
-            traceback.print_exc(file=sys.stderr)
-            if 'browser' in locals():
-                await browser.close()
-            return generate_example_data()
+            # Un JSON-LD con una forma inesperada no debe tumbar la corrida
+            log.warning(f"⚠ No se pudo interpretar la página: {type(e).__name__}: {e}")
+            escalation_reason = "parse_error"
+        
+        log.warning(f"⚠ Escalando a navegador ({escalation_reason})")
+        flush_debug(f"twitter-trending.com escala a navegador: {escalation_reason}", log)
+    
+    result = await scrape_twitter_trending_browser(url, worker, metrics=metrics)
+    result["fetch_mode"] = "browser"
+    if escalation_reason:
+        result["fetch_escalation_reason"] = escalation_reason
+    return result
+
 
 def generate_example_data():
     """
     Genera datos de ejemplo cuando falla el scraping.
     """
-    print("[v0] ⚠⚠⚠ Usando datos de ejemplo como fallback...", file=sys.stderr)
+    log.warning("⚠⚠⚠ Usando datos de ejemplo como fallback...")
     
     mexico_tz = pytz.timezone('America/Mexico_City')
     now = datetime.now(mexico_tz)
@@ -417,19 +700,19 @@ def generate_example_data():
     }
 
 if __name__ == "__main__":
-    print("[v0] Iniciando scraper de twitter-trending.com...\n", file=sys.stderr)
+    log.info("Iniciando scraper de twitter-trending.com...")
     data = asyncio.run(scrape_twitter_trending_mexico())
     
-    output_file = 'twitter_trending_com_data.json'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    print(f"\n[v0] ✓ Datos guardados en {output_file}", file=sys.stderr)
+    output_file = OUTPUT_FILE
+    if publish_snapshot(data, output_file, SOURCE_TWITTER_TRENDING, 'MX'):
+        log.info(f"✓ Datos guardados en {output_file}")
     
-    print(f"\n[v0] ========== SCRAPING COMPLETADO ==========", file=sys.stderr)
-    print(f"[v0] Status: {data['status']}", file=sys.stderr)
-    print(f"[v0] Tendencias encontradas: {data['total_trends']}", file=sys.stderr)
+    log.info("========== SCRAPING COMPLETADO ==========")
+    log.info(f"Status: {data['status']}")
+    log.info(f"Ruta usada: {data.get('fetch_mode', 'N/A')}")
+    log.info(f"Tendencias encontradas: {data['total_trends']}")
     if data['trends'][:3]:
-        print("[v0] Top 3:", file=sys.stderr)
+        log.info("Top 3:")
         for t in data['trends'][:3]:
             minutes = t.get('minutes_since_creation', 'N/A')
-            print(f"  #{t['rank']}: {t['term']} ({t['tweet_volume']} tweets, {minutes} min)", file=sys.stderr)
\ No newline at end of file
+            log.info(f"  #{t['rank']}: {t['term']} ({t['tweet_volume']} tweets, {minutes} min)")
\ No newline at end of file
@@ -1,68 +1,92 @@
+import asyncio
 import requests
-from bs4 import BeautifulSoup
-import json
+from bs4 import BeautifulSoup, SoupStrainer
+import codecs
+from contextlib import nullcontext
+from html.parser import HTMLParser
 from datetime import datetime, timedelta
 import re
 import pytz
 import random
 import time
+from fixture_replay import http_client, fixtures_mode
+from page_waits import politeness_delay, politeness_delay_range
+from snapshot_output import publish_snapshot, conditional_headers, response_validators, build_unchanged_result
+from run_metrics import RunMetrics
+from scrape_log import get_logger, finish_run
+from trend_store import SOURCE_XTRENDS
+from volume_parser import tweet_count, xtrends_volume
+
+# Backend de parseo más rápido disponible: selectolax > lxml > html.parser
+try:
+    try:
+        from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+    except ImportError:
+        from selectolax.parser import HTMLParser as SelectolaxParser
+    PARSER_BACKEND = "selectolax"
+except ImportError:
+    SelectolaxParser = None
+    try:
+        import lxml  # noqa: F401
+        PARSER_BACKEND = "lxml"
+    except ImportError:
+        PARSER_BACKEND = "html.parser"
+
+# Cliente HTTP async para correr junto a los scrapers con navegador
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+log = get_logger(__name__)
+
+MINUTES_AGO_PATTERN = re.compile(r'(\d+)\s+minutes?\s+ago', re.IGNORECASE)
+
+URL = 'https://xtrends.iamrohit.in/mexico'
+OUTPUT_FILE = 'twitter_trends_data.json'
+
+# Headers realistas
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'es-MX,es;q=0.9,en;q=0.8',
+    'Cache-Control': 'no-cache',
+}
 
 def normalize_tweet_count(count_str):
     """
     Convierte strings de volumen a números normalizados.
     Ejemplos: "443.6k" -> 443600, "Under 10k" -> 5000
+    (volume_parser.tweet_count(), con caché por texto).
     """
-    if not count_str:
-        return 0
-    
-    count_str = count_str.strip().lower()
-    print(f"[v0] Normalizando: '{count_str}'")
-    
-    # Si dice "Under 10k"
-    if "under 10k" in count_str:
-        return 5000
+    return tweet_count(count_str)
+
+def extract_minutes_ago_from_text(row_text):
+    """
+    Extrae 'X minutes ago' del texto ya extraído de una fila.
+    Retorna el número de minutos, o None si es antiguo (horas/días).
+    """
+    match = MINUTES_AGO_PATTERN.search(row_text)
+    if match:
+        minutes = int(match.group(1))
+        log.debug("Minutos desde actualización: %d", minutes)
+        return minutes
     
-    # Si tiene "k" (miles)
-    if "k" in count_str:
-        try:
-            # Extraer número: "443.6k" -> 443.6
-            match = re.search(r'([\d.]+)\s*k', count_str)
-            if match:
-                number = float(match.group(1))
-                return int(number * 1000)
-        except:
-            pass
-    
-    # Si tiene números sin letra
-    try:
-        match = re.search(r'([\d.]+)', count_str)
-        if match:
-            return int(float(match.group(1)))
-    except:
-        pass
+    # Si contiene 'hour' o 'day', es antiguo
+    lowered = row_text.lower()
+    if 'hour' in lowered or 'day' in lowered:
+        log.debug("Tendencia antigua (horas/días)")
+        return None
     
-    return 0
+    return None
 
 def extract_minutes_ago_from_row(row):
     """
-    Extrae 'X minutes ago' del HTML de la fila.
+    Extrae 'X minutes ago' del HTML de la fila (Tag de BeautifulSoup).
     Retorna el número de minutos, o None si es antiguo (horas/días).
     """
     try:
-        # Buscar texto que contenga 'minutes ago'
-        row_text = row.get_text(separator=' ')
-        match = re.search(r'(\d+)\s+minutes?\s+ago', row_text, re.IGNORECASE)
-        if match:
-            minutes = int(match.group(1))
-            print(f"[v0] Minutos desde actualización: {minutes}")
-            return minutes
-        
-        # Si contiene 'hour' o 'day', es antiguo
-        if 'hour' in row_text.lower() or 'day' in row_text.lower():
-            print(f"[v0] Tendencia antigua (horas/días)")
-            return None
-        
-        return None
+        return extract_minutes_ago_from_text(row.get_text(separator=' '))
     except:
         return None
 
@@ -71,11 +95,11 @@ def should_update_based_on_freshness(trends_data, max_minutes=20):
     Verifica si los datos son lo suficientemente recientes para sobreescribir JSON.
     Solo retorna True si hay al menos una tendencia actualizada hace menos de 20 minutos.
     """
-    print(f"\n[v0] Verificando frescura de datos (máximo: {max_minutes} minutos)...")
+    log.info(f"Verificando frescura de datos (máximo: {max_minutes} minutos)...")
     
     # Si no hay tendencias, no actualizar
     if not trends_data.get('trends') or len(trends_data['trends']) == 0:
-        print("[v0] ✗ No hay tendencias, no se actualizará el JSON")
+        log.info("✗ No hay tendencias, no se actualizará el JSON")
         return False
     
     # Buscar al menos una tendencia reciente
@@ -83,10 +107,10 @@ def should_update_based_on_freshness(trends_data, max_minutes=20):
         if trend.get('minutes_since_update') is not None:
             minutes = trend.get('minutes_since_update')
             if minutes < max_minutes:
-                print(f"[v0] ✓ Datos suficientemente frescos ({minutes} < {max_minutes} minutos)")
+                log.info(f"✓ Datos suficientemente frescos ({minutes} < {max_minutes} minutos)")
                 return True
     
-    print(f"[v0] ✗ Datos no son lo suficientemente frescos (≥ {max_minutes} minutos)")
+    log.info(f"✗ Datos no son lo suficientemente frescos (≥ {max_minutes} minutos)")
     return False
 
 def get_trend_time_in_mexico(minutes_ago=None):
@@ -113,342 +137,634 @@ def get_trend_time_in_mexico(minutes_ago=None):
         "minute": trend_time.minute
     }
 
-def scrape_twitter_trends_mexico():
+def extract_trend_rows(html, backend=None, limit=40):
     """
-    Extrae top 40 tendencias de Twitter para México desde xtrends.iamrohit.in
+    Un solo recorrido por tbody#copyData. Retorna (filas, total_filas, error),
+    donde cada fila es (es_anuncio, link, texto_fila) y link es un dict con los
+    atributos de a.tweet (o None si la fila no tiene link). Deja de leer filas
+    en cuanto junta `limit` links con nombre.
     """
-    url = 'https://xtrends.iamrohit.in/mexico'
+    backend = backend or PARSER_BACKEND
     
-    print("[v0] ========== INICIANDO SCRAPING TWITTER TRENDS ==========")
-    print(f"[v0] URL: {url}")
+    if backend == "selectolax":
+        tree = SelectolaxParser(html)
+        table = tree.css_first('table#twitter-trends')
+        if table is None:
+            return None, 0, "Tabla de tendencias no encontrada"
+        tbody = table.css_first('tbody#copyData')
+        if tbody is None:
+            return None, 0, "tbody no encontrado"
+        
+        all_rows = tbody.css('tr')
+        rows = []
+        found = 0
+        for row in all_rows:
+            if found >= limit:
+                break
+            if row.css_first('ins.adsbygoogle') is not None:
+                rows.append((True, None, ''))
+                continue
+            tweet_link = row.css_first('a.tweet')
+            if tweet_link is None:
+                rows.append((False, None, ''))
+                continue
+            attrs = tweet_link.attributes
+            link = {
+                "rank": attrs.get('rank'),
+                "text": tweet_link.text(),
+                "tweetcount": attrs.get('tweetcount', attrs.get('tweetc', '0')),
+                "href": attrs.get('href') or '',
+            }
+            rows.append((False, link, row.text(separator=' ')))
+            if link["text"].strip():
+                found += 1
+        return rows, len(all_rows), None
     
-    delay_before_request = random.uniform(1, 4)
-    print(f"[v0] Esperando {delay_before_request:.1f}s antes de solicitar...")
-    time.sleep(delay_before_request)
+    # BeautifulSoup: solo se construye el árbol de la tabla de tendencias
+    soup = BeautifulSoup(html, backend, parse_only=SoupStrainer('table', id='twitter-trends'))
+    trends_table = soup.find('table', {'id': 'twitter-trends'})
+    if not trends_table:
+        return None, 0, "Tabla de tendencias no encontrada"
+    tbody = trends_table.find('tbody', {'id': 'copyData'})
+    if not tbody:
+        return None, 0, "tbody no encontrado"
     
-    try:
-        # Headers realistas
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'es-MX,es;q=0.9,en;q=0.8',
-            'Cache-Control': 'no-cache',
+    all_rows = tbody.find_all('tr')
+    rows = []
+    found = 0
+    for row in all_rows:
+        if found >= limit:
+            break
+        if row.find('ins', {'class': 'adsbygoogle'}):
+            rows.append((True, None, ''))
+            continue
+        tweet_link = row.find('a', {'class': 'tweet'})
+        if not tweet_link:
+            rows.append((False, None, ''))
+            continue
+        link = {
+            "rank": tweet_link.get('rank'),
+            "text": tweet_link.text,
+            "tweetcount": tweet_link.get('tweetcount', tweet_link.get('tweetc', '0')),
+            "href": tweet_link.get('href', ''),
         }
+        rows.append((False, link, row.get_text(separator=' ')))
+        if link["text"].strip():
+            found += 1
+    return rows, len(all_rows), None
+
+def iter_trends_from_rows(rows, limit=40, stats=None):
+    """
+    Convierte las filas extraídas en tendencias (una por una), saltando
+    anuncios. Acepta cualquier iterable de filas, incluso uno que se va
+    llenando mientras llega la respuesta. Si se pasa `stats`, deja ahí
+    'rows_processed' y 'ads_skipped'.
+    """
+    stats = stats if stats is not None else {}
+    stats['rows_processed'] = 0
+    stats['ads_skipped'] = 0
+    valid_count = 0
+    
+    for idx, (is_ad, tweet_link, row_text) in enumerate(rows):
+        stats['rows_processed'] = idx + 1
+        # Ignorar filas de anuncios (que tienen ads)
+        if is_ad:
+            stats['ads_skipped'] += 1
+            log.debug("Fila %d: Saltando anuncio", idx)
+            continue
         
-        print("[v0] Realizando solicitud HTTP...")
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        
-        print(f"[v0] Status code: {response.status_code}")
-        print(f"[v0] Tamaño del HTML: {len(response.text)} caracteres")
-        
-        delay_after_response = random.uniform(0.5, 2)
-        time.sleep(delay_after_response)
-        
-        print("[v0] Parseando HTML...")
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        
-        print("[v0] Buscando tabla con id='twitter-trends'...")
-        trends_table = soup.find('table', {'id': 'twitter-trends'})
-        
-        if not trends_table:
-            print("[v0] ERROR: Tabla no encontrada")
-            mexico_tz = pytz.timezone('America/Mexico_City')
-            scraping_time = datetime.now(mexico_tz)
-            return {
-                "scraping_time": {
-                    "timestamp_iso": scraping_time.isoformat(),
-                    "day": scraping_time.day,
-                    "month": scraping_time.month,
-                    "year": scraping_time.year,
-                    "hour": scraping_time.hour,
-                    "minute": scraping_time.minute,
-                    "description": "Hora en la que se ejecutó el scraping"
-                },
-                "data_source_updated_time": {
-                    "timestamp_iso": scraping_time.isoformat(),
-                    "day": scraping_time.day,
-                    "month": scraping_time.month,
-                    "year": scraping_time.year,
-                    "hour": scraping_time.hour,
-                    "minute": scraping_time.minute,
-                    "minutes_ago": 0,
-                    "description": "Hora en la que la fuente actualizó los datos por última vez"
-                },
-                "country": "México",
-                "platform": "Twitter/X",
-                "total_trends": 0,
-                "trends": [],
-                "source": "xtrends.iamrohit.in",
-                "status": "error",
-                "error": "Tabla de tendencias no encontrada"
-            }
-        
-        print("[v0] Tabla encontrada. Extrayendo filas...")
-        
-        tbody = trends_table.find('tbody', {'id': 'copyData'})
-        if not tbody:
-            print("[v0] ERROR: tbody no encontrado")
-            mexico_tz = pytz.timezone('America/Mexico_City')
-            scraping_time = datetime.now(mexico_tz)
-            return {
-                "scraping_time": {
-                    "timestamp_iso": scraping_time.isoformat(),
-                    "day": scraping_time.day,
-                    "month": scraping_time.month,
-                    "year": scraping_time.year,
-                    "hour": scraping_time.hour,
-                    "minute": scraping_time.minute,
-                    "description": "Hora en la que se ejecutó el scraping"
-                },
-                "data_source_updated_time": {
-                    "timestamp_iso": scraping_time.isoformat(),
-                    "day": scraping_time.day,
-                    "month": scraping_time.month,
-                    "year": scraping_time.year,
-                    "hour": scraping_time.hour,
-                    "minute": scraping_time.minute,
-                    "minutes_ago": 0,
-                    "description": "Hora en la que la fuente actualizó los datos por última vez"
-                },
-                "country": "México",
-                "platform": "Twitter/X",
-                "total_trends": 0,
-                "trends": [],
-                "source": "xtrends.iamrohit.in",
-                "status": "error",
-                "error": "tbody no encontrado"
-            }
-        
-        rows = tbody.find_all('tr')
-        print(f"[v0] Total de filas encontradas: {len(rows)}")
-        
-        trends = []
-        valid_count = 0
-        ad_count = 0
-        
-        for idx, row in enumerate(rows):
-            if idx % 5 == 0 and idx > 0:
-                delay_between_rows = random.uniform(0.1, 0.5)
-                time.sleep(delay_between_rows)
-            
-            # Ignorar filas de anuncios (que tienen ads)
-            if row.find('ins', {'class': 'adsbygoogle'}):
-                ad_count += 1
-                print(f"[v0] Fila {idx}: Saltando anuncio")
+        try:
+            if not tweet_link:
+                log.debug("Fila %d: No contiene link .tweet", idx)
                 continue
             
-            try:
-                
-                tweet_link = row.find('a', {'class': 'tweet'})
-                
-                if not tweet_link:
-                    print(f"[v0] Fila {idx}: No contiene link .tweet")
-                    continue
-                
-                rank = tweet_link.get('rank', str(valid_count + 1))
-                trend_name = tweet_link.text.strip()
-                tweet_count_str = tweet_link.get('tweetcount', tweet_link.get('tweetc', '0'))
-                
-                if not trend_name or len(trend_name) < 1:
-                    print(f"[v0] Fila {idx}: Nombre vacío")
-                    continue
-                
-                tweet_volume = normalize_tweet_count(tweet_count_str)
-                
-                if tweet_volume == 1000:
-                    print(f"[v0] Volumen exacto 1000 detectado, cambiando a -1")
-                    tweet_volume = -1
-                
-                minutes_ago = extract_minutes_ago_from_row(row)
-                
-                trend_time = get_trend_time_in_mexico(minutes_ago)
-                
-                trend_obj = {
-                    "rank": int(rank),
-                    "term": trend_name,
-                    "tweet_volume": tweet_volume,
-                    "tweet_volume_text": tweet_count_str,
-                    "minutes_since_update": minutes_ago,
-                    "trend_time_mexico": trend_time,
-                    "url": tweet_link.get('href', '')
-                }
-                
-                trends.append(trend_obj)
-                valid_count += 1
-                
-                print(f"[v0] ✓ Trend {valid_count}: '{trend_name}' - {tweet_count_str}")
-                
-                if valid_count >= 40:
-                    break
+            rank = tweet_link['rank'] or str(valid_count + 1)
+            trend_name = tweet_link['text'].strip()
+            tweet_count_str = tweet_link['tweetcount']
             
-            except Exception as e:
-                print(f"[v0] ERROR en fila {idx}: {type(e).__name__}: {e}")
+            if not trend_name or len(trend_name) < 1:
+                log.debug("Fila %d: Nombre vacío", idx)
                 continue
+            
+            # 1000 exacto es el relleno de xtrends: queda en -1
+            tweet_volume = xtrends_volume(tweet_count_str)
+            
+            minutes_ago = extract_minutes_ago_from_text(row_text)
+            
+            trend_time = get_trend_time_in_mexico(minutes_ago)
+            
+            trend_obj = {
+                "rank": int(rank),
+                "term": trend_name,
+                "tweet_volume": tweet_volume,
+                "tweet_volume_text": tweet_count_str,
+                "minutes_since_update": minutes_ago,
+                "trend_time_mexico": trend_time,
+                "url": tweet_link['href']
+            }
+            
+            valid_count += 1
+            
+            log.debug("✓ Trend %d: '%s' - %s", valid_count, trend_name, tweet_count_str)
+            
+            yield trend_obj
+            
+            if valid_count >= limit:
+                break
         
-        print(f"[v0] Tendencias extraídas: {valid_count}")
-        print(f"[v0] Filas de anuncios saltadas: {ad_count}")
+        except Exception as e:
+            log.warning(f"Fila {idx} descartada: {type(e).__name__}: {e}")
+            continue
+
+def build_trends_from_rows(rows, limit=40):
+    """
+    Convierte las filas extraídas en tendencias, saltando anuncios.
+    Retorna (tendencias, anuncios_saltados).
+    """
+    stats = {}
+    trends = list(iter_trends_from_rows(rows, limit, stats))
+    return trends, stats['ads_skipped']
+
+class XtrendsStreamParser(HTMLParser):
+    """
+    Parser incremental de tbody#copyData: se alimenta con feed() a medida que
+    llegan los chunks y va dejando en `rows` cada fila completa, con el mismo
+    formato que extract_trend_rows().
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.table_found = False
+        self.tbody_found = False
+        self.done = False
+        self.rows = []
+        self._in_table = False
+        self._in_tbody = False
+        self._in_link = False
+        self._row = None
+        # Un nodo de texto puede llegar partido entre dos chunks
+        self._text_open = False
+
+    def pop_rows(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def _finish_row(self):
+        row = self._row
+        if row is None:
+            return
+        self._row = None
+        self._in_link = False
+        if row["is_ad"]:
+            self.rows.append((True, None, ''))
+        elif row["link"] is None:
+            self.rows.append((False, None, ''))
+        else:
+            link = row["link"]
+            link["text"] = ''.join(row["link_text"])
+            self.rows.append((False, link, ' '.join(row["text"])))
+
+    def handle_starttag(self, tag, attrs):
+        self._text_open = False
+        if self.done:
+            return
+        if tag == 'table' and not self._in_table:
+            if dict(attrs).get('id') == 'twitter-trends':
+                self.table_found = True
+                self._in_table = True
+            return
+        if not self._in_table:
+            return
+        if tag == 'tbody' and not self._in_tbody:
+            if dict(attrs).get('id') == 'copyData':
+                self.tbody_found = True
+                self._in_tbody = True
+            return
+        if not self._in_tbody:
+            return
+
+        if tag == 'tr':
+            self._finish_row()
+            self._row = {"is_ad": False, "link": None, "link_text": [], "text": []}
+        elif self._row is not None:
+            classes = (dict(attrs).get('class') or '').split()
+            if tag == 'ins' and 'adsbygoogle' in classes:
+                self._row["is_ad"] = True
+            elif tag == 'a' and 'tweet' in classes and self._row["link"] is None:
+                attributes = {name: (value or '') for name, value in attrs}
+                self._row["link"] = {
+                    "rank": attributes.get('rank'),
+                    "text": '',
+                    "tweetcount": attributes.get('tweetcount', attributes.get('tweetc', '0')),
+                    "href": attributes.get('href', ''),
+                }
+                self._in_link = True
+
+    def handle_endtag(self, tag):
+        self._text_open = False
+        if not self._in_tbody or self.done:
+            if tag == 'table' and self._in_table and not self._in_tbody:
+                self._in_table = False
+            return
+        if tag == 'a' and self._in_link:
+            self._in_link = False
+        elif tag == 'tr':
+            self._finish_row()
+        elif tag == 'tbody':
+            self._finish_row()
+            self._in_tbody = False
+            self._in_table = False
+            self.done = True
+
+    def handle_data(self, data):
+        if self._row is None:
+            return
+        if self._text_open:
+            self._row["text"][-1] += data
+        else:
+            self._row["text"].append(data)
+            self._text_open = True
+        if self._in_link:
+            self._row["link_text"].append(data)
+
+def stream_twitter_trends(url=URL, limit=40, chunk_size=8192, stats=None, extra_headers=None):
+    """
+    Descarga xtrends en modo streaming y entrega cada tendencia en cuanto su
+    fila termina de llegar. Al juntar `limit` tendencias (o al cerrar
+    tbody#copyData) corta la conexión sin descargar el resto de la página.
+    En `stats` deja filas, anuncios, bytes leídos, si se encontró la tabla y
+    los validadores HTTP (un 304 no entrega ninguna tendencia).
+    """
+    stats = stats if stats is not None else {}
+    stats['bytes_read'] = 0
+    parser = XtrendsStreamParser()
+    
+    response = http_client().get(url, headers={**HEADERS, **(extra_headers or {})}, timeout=15, stream=True)
+    stats['http'] = response_validators(response)
+    try:
+        if response.status_code == 304:
+            log.info("Status code: 304 (sin cambios)")
+            return
+        response.raise_for_status()
+        log.info(f"Status code: {response.status_code} (streaming)")
+        decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
         
-        if valid_count > 0:
-            print(f"[v0] Top 5 tendencias:")
-            for t in trends[:5]:
-                print(f"  {t['rank']}. {t['term']} ({t['tweet_volume_text']})")
+        def rows():
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                stats['bytes_read'] += len(chunk)
+                parser.feed(decoder.decode(chunk))
+                yield from parser.pop_rows()
+                if parser.done:
+                    return
+            parser.feed(decoder.decode(b'', final=True))
+            parser.close()
+            parser._finish_row()
+            yield from parser.pop_rows()
         
-        # Calcular tiempos
-        mexico_tz = pytz.timezone('America/Mexico_City')
-        scraping_time = datetime.now(mexico_tz)
-        first_trend_minutes = trends[0]['minutes_since_update'] if trends and trends[0].get('minutes_since_update') is not None else None
+        yield from iter_trends_from_rows(rows(), limit, stats)
+    finally:
+        stats['table_found'] = parser.table_found
+        stats['tbody_found'] = parser.tbody_found
+        response.close()
+
+def build_error_result(error):
+    """
+    Resultado vacío con status "error" y la hora actual de México.
+    """
+    mexico_tz = pytz.timezone('America/Mexico_City')
+    scraping_time = datetime.now(mexico_tz)
+    return {
+        "scraping_time": {
+            "timestamp_iso": scraping_time.isoformat(),
+            "day": scraping_time.day,
+            "month": scraping_time.month,
+            "year": scraping_time.year,
+            "hour": scraping_time.hour,
+            "minute": scraping_time.minute,
+            "description": "Hora en la que se ejecutó el scraping"
+        },
+        "data_source_updated_time": {
+            "timestamp_iso": scraping_time.isoformat(),
+            "day": scraping_time.day,
+            "month": scraping_time.month,
+            "year": scraping_time.year,
+            "hour": scraping_time.hour,
+            "minute": scraping_time.minute,
+            "minutes_ago": 0,
+            "description": "Hora en la que la fuente actualizó los datos por última vez"
+        },
+        "country": "México",
+        "platform": "Twitter/X",
+        "total_trends": 0,
+        "trends": [],
+        "source": "xtrends.iamrohit.in",
+        "status": "error",
+        "error": error
+    }
+
+def build_success_result(trends, rows_processed, ad_count, http=None):
+    """
+    Arma el resultado final a partir de las tendencias extraídas.
+    `http` (status/ETag/Last-Modified) se guarda para la próxima petición condicional.
+    """
+    valid_count = len(trends)
+    
+    # Calcular tiempos
+    mexico_tz = pytz.timezone('America/Mexico_City')
+    scraping_time = datetime.now(mexico_tz)
+    first_trend_minutes = trends[0]['minutes_since_update'] if trends and trends[0].get('minutes_since_update') is not None else None
+    
+    if first_trend_minutes is not None:
+        data_updated_time = scraping_time - timedelta(minutes=first_trend_minutes)
+    else:
+        data_updated_time = scraping_time
+    
+    return {
+        "scraping_time": {
+            "timestamp_iso": scraping_time.isoformat(),
+            "day": scraping_time.day,
+            "month": scraping_time.month,
+            "year": scraping_time.year,
+            "hour": scraping_time.hour,
+            "minute": scraping_time.minute,
+            "description": "Hora en la que se ejecutó el scraping"
+        },
+        "data_source_updated_time": {
+            "timestamp_iso": data_updated_time.isoformat(),
+            "day": data_updated_time.day,
+            "month": data_updated_time.month,
+            "year": data_updated_time.year,
+            "hour": data_updated_time.hour,
+            "minute": data_updated_time.minute,
+            "minutes_ago": first_trend_minutes if first_trend_minutes is not None else 0,
+            "description": "Hora en la que la fuente actualizó los datos por última vez"
+        },
+        "country": "México",
+        "platform": "Twitter/X",
+        "total_trends": valid_count,
+        "trends": trends,
+        "source": "xtrends.iamrohit.in",
+        "status": "success" if valid_count > 0 else "error",
+        "debug": {
+            "rows_processed": rows_processed,
+            "ads_skipped": ad_count
+        },
+        "http": http or {}
+    }
+
+def parse_twitter_trends_html(html, limit=40, backend=None, http=None):
+    """
+    Parsea el HTML de xtrends ya descargado y retorna el resultado completo.
+    """
+    backend = backend or PARSER_BACKEND
+    log.info(f"Parseando HTML (backend: {backend})...")
+    
+    rows, row_count, error = extract_trend_rows(html, backend, limit)
+    if error:
+        log.error(f"ERROR: {error}")
+        return build_error_result(error)
+    
+    log.info(f"Total de filas encontradas: {row_count}")
+    
+    trends, ad_count = build_trends_from_rows(rows, limit)
+    
+    log.info(f"Tendencias extraídas: {len(trends)}")
+    log.info(f"Filas de anuncios saltadas: {ad_count}")
+    
+    if trends:
+        log.info("Top 5 tendencias:")
+        for t in trends[:5]:
+            log.info(f"  {t['rank']}. {t['term']} ({t['tweet_volume_text']})")
+    
+    return build_success_result(trends, row_count, ad_count, http)
+
+def scrape_twitter_trends_streaming(url=URL, limit=40, extra_headers=None, metrics=None):
+    """
+    Igual que scrape_twitter_trends_mexico() pero parseando la respuesta a
+    medida que llega y cerrando la conexión al llegar al top `limit`.
+    Descarga y parseo se miden juntos como la etapa "stream".
+    """
+    stats = {}
+    start = time.perf_counter()
+    trends = []
+    with metrics.span('stream', requests=1) if metrics else nullcontext({}) as span:
+        for trend in stream_twitter_trends(url, limit, stats=stats, extra_headers=extra_headers):
+            if not trends:
+                span['first_trend_ms'] = round((time.perf_counter() - start) * 1000, 1)
+                log.info(f"Primera tendencia a los {span['first_trend_ms']:.0f} ms")
+            trends.append(trend)
+        span['status'] = stats['http']['status_code']
+        span['bytes'] = stats['bytes_read']
+        span['trends'] = len(trends)
+    
+    if stats['http']['status_code'] == 304:
+        return build_unchanged_result("xtrends.iamrohit.in", stats['http'])
+    
+    log.info(f"Bytes leídos: {stats['bytes_read']} (conexión cerrada tras {len(trends)} tendencias)")
+    
+    if not stats['table_found']:
+        log.error("ERROR: Tabla de tendencias no encontrada")
+        return build_error_result("Tabla de tendencias no encontrada")
+    if not stats['tbody_found']:
+        log.error("ERROR: tbody no encontrado")
+        return build_error_result("tbody no encontrado")
+    
+    log.info(f"Tendencias extraídas: {len(trends)}")
+    log.info(f"Filas de anuncios saltadas: {stats['ads_skipped']}")
+    
+    return build_success_result(trends, stats['rows_processed'], stats['ads_skipped'], stats['http'])
+
+def scrape_twitter_trends_mexico(stream=False, conditional=True):
+    """
+    Extrae top 40 tendencias de Twitter para México desde xtrends.iamrohit.in
+    Con stream=True parsea la respuesta por chunks y corta al llegar al top 40.
+    Con conditional=True envía el ETag/Last-Modified de la última publicación;
+    si la fuente responde 304 retorna un resultado "unchanged" sin parsear nada.
+    El resultado lleva en "timing" la duración de cada etapa.
+    """
+    metrics = RunMetrics(SOURCE_XTRENDS)
+    result = metrics.attach(run_twitter_trends_scrape(metrics, stream, conditional))
+    finish_run(log, [result['status']], "xtrends")
+    return result
+
+def run_twitter_trends_scrape(metrics, stream=False, conditional=True):
+    """
+    Cuerpo de scrape_twitter_trends_mexico(), con cada etapa medida en metrics.
+    """
+    url = URL
+    
+    log.info("========== INICIANDO SCRAPING TWITTER TRENDS ==========")
+    log.info(f"URL: {url}")
+    
+    # Pausa de cortesía opcional (SCRAPER_POLITENESS_DELAY), como en los otros scrapers
+    low, high = politeness_delay_range()
+    if high > 0:
+        with metrics.span('delay'):
+            time.sleep(random.uniform(low, high))
+    
+    validators = conditional_headers(SOURCE_XTRENDS, 'MX') if conditional else {}
+    if validators:
+        log.info(f"Petición condicional: {', '.join(validators)}")
+    
+    try:
+        log.info("Realizando solicitud HTTP...")
+        if stream:
+            return scrape_twitter_trends_streaming(url, extra_headers=validators, metrics=metrics)
         
-        if first_trend_minutes is not None:
-            data_updated_time = scraping_time - timedelta(minutes=first_trend_minutes)
-        else:
-            data_updated_time = scraping_time
+        with metrics.span('fetch', requests=1) as span:
+            response = http_client().get(url, headers={**HEADERS, **validators}, timeout=15)
+            span['status'] = response.status_code
+            span['bytes'] = len(response.content)
+        if response.status_code == 304:
+            log.info("Status code: 304 (sin cambios, no se parsea)")
+            return build_unchanged_result("xtrends.iamrohit.in", response_validators(response))
+        response.raise_for_status()
         
-        result = {
-            "scraping_time": {
-                "timestamp_iso": scraping_time.isoformat(),
-                "day": scraping_time.day,
-                "month": scraping_time.month,
-                "year": scraping_time.year,
-                "hour": scraping_time.hour,
-                "minute": scraping_time.minute,
-                "description": "Hora en la que se ejecutó el scraping"
-            },
-            "data_source_updated_time": {
-                "timestamp_iso": data_updated_time.isoformat(),
-                "day": data_updated_time.day,
-                "month": data_updated_time.month,
-                "year": data_updated_time.year,
-                "hour": data_updated_time.hour,
-                "minute": data_updated_time.minute,
-                "minutes_ago": first_trend_minutes if first_trend_minutes is not None else 0,
-                "description": "Hora en la que la fuente actualizó los datos por última vez"
-            },
-            "country": "México",
-            "platform": "Twitter/X",
-            "total_trends": valid_count,
-            "trends": trends,
-            "source": "xtrends.iamrohit.in",
-            "status": "success" if valid_count > 0 else "error",
-            "debug": {
-                "rows_processed": len(rows),
-                "ads_skipped": ad_count
-            }
-        }
+        log.info(f"Status code: {response.status_code}")
+        log.info(f"Tamaño del HTML: {len(response.text)} caracteres")
         
+        with metrics.span('parse', backend=PARSER_BACKEND) as span:
+            result = parse_twitter_trends_html(response.text, http=response_validators(response))
+            span['rows'] = result.get('debug', {}).get('rows_processed')
+            span['trends'] = result['total_trends']
         return result
     
     except requests.exceptions.Timeout:
-        print("[v0] ERROR: Timeout - La solicitud tardó demasiado")
-        mexico_tz = pytz.timezone('America/Mexico_City')
-        scraping_time = datetime.now(mexico_tz)
-        return {
-            "scraping_time": {
-                "timestamp_iso": scraping_time.isoformat(),
-                "day": scraping_time.day,
-                "month": scraping_time.month,
-                "year": scraping_time.year,
-                "hour": scraping_time.hour,
-                "minute": scraping_time.minute,
-                "description": "Hora en la que se ejecutó el scraping"
-            },
-            "data_source_updated_time": {
-                "timestamp_iso": scraping_time.isoformat(),
-                "day": scraping_time.day,
-                "month": scraping_time.month,
-                "year": scraping_time.year,
-                "hour": scraping_time.hour,
-                "minute": scraping_time.minute,
-                "minutes_ago": 0,
-                "description": "Hora en la que la fuente actualizó los datos por última vez"
-            },
-            "country": "México",
-            "platform": "Twitter/X",
-            "total_trends": 0,
-            "trends": [],
-            "source": "xtrends.iamrohit.in",
-            "status": "error",
-            "error": "Timeout en la solicitud HTTP"
-        }
+        log.error("ERROR: Timeout - La solicitud tardó demasiado")
+        return build_error_result("Timeout en la solicitud HTTP")
     
     except requests.exceptions.ConnectionError as e:
-        print(f"[v0] ERROR: Conexión rechazada - {e}")
-        mexico_tz = pytz.timezone('America/Mexico_City')
-        scraping_time = datetime.now(mexico_tz)
-        return {
-            "scraping_time": {
-                "timestamp_iso": scraping_time.isoformat(),
-                "day": scraping_time.day,
-                "month": scraping_time.month,
-                "year": scraping_time.year,
-                "hour": scraping_time.hour,
-                "minute": scraping_time.minute,
-                "description": "Hora en la que se ejecutó el scraping"
-            },
-            "data_source_updated_time": {
-                "timestamp_iso": scraping_time.isoformat(),
-                "day": scraping_time.day,
-                "month": scraping_time.month,
-                "year": scraping_time.year,
-                "hour": scraping_time.hour,
-                "minute": scraping_time.minute,
-                "minutes_ago": 0,
-                "description": "Hora en la que la fuente actualizó los datos por última vez"
-            },
-            "country": "México",
-            "platform": "Twitter/X",
-            "total_trends": 0,
-            "trends": [],
-            "source": "xtrends.iamrohit.in",
-            "status": "error",
-            "error": f"Error de conexión: {str(e)}"
-        }
+        log.error(f"ERROR: Conexión rechazada - {e}")
+        return build_error_result(f"Error de conexión: {str(e)}")
     
     except Exception as e:
-        print(f"[v0] ERROR GENERAL: {type(e).__name__}: {e}")
-        mexico_tz = pytz.timezone('America/Mexico_City')
-        scraping_time = datetime.now(mexico_tz)
-        return {
-            "scraping_time": {
-                "timestamp_iso": scraping_time.isoformat(),
-                "day": scraping_time.day,
-                "month": scraping_time.month,
-                "year": scraping_time.year,
-                "hour": scraping_time.hour,
-                "minute": scraping_time.minute,
-                "description": "Hora en la que se ejecutó el scraping"
-            },
-            "data_source_updated_time": {
-                "timestamp_iso": scraping_time.isoformat(),
-                "day": scraping_time.day,
-                "month": scraping_time.month,
-                "year": scraping_time.year,
-                "hour": scraping_time.hour,
-                "minute": scraping_time.minute,
-                "minutes_ago": 0,
-                "description": "Hora en la que la fuente actualizó los datos por última vez"
-            },
-            "country": "México",
-            "platform": "Twitter/X",
-            "total_trends": 0,
-            "trends": [],
-            "source": "xtrends.iamrohit.in",
-            "status": "error",
-            "error": str(e)
-        }
+        log.error(f"ERROR GENERAL: {type(e).__name__}: {e}")
+        return build_error_result(str(e))
+
+async def scrape_twitter_trends_mexico_async(session=None, stream=True, conditional=True, limit=40, chunk_size=8192):
+    """
+    Versión async de scrape_twitter_trends_mexico() con aiohttp, para correr
+    en el mismo event loop que los scrapers con navegador (run_all.py).
+    Comparte el parseo con la versión síncrona; con stream=True deja de leer
+    en cuanto junta `limit` tendencias. Sin aiohttp instalado, corre la
+    versión síncrona en un hilo (también con fixtures activos, que se
+    sirven por requests).
+    """
+    if aiohttp is None or fixtures_mode():
+        return await asyncio.to_thread(scrape_twitter_trends_mexico, stream, conditional)
+    
+    metrics = RunMetrics(SOURCE_XTRENDS)
+    result = metrics.attach(await run_twitter_trends_scrape_async(metrics, session, stream, conditional, limit, chunk_size))
+    finish_run(log, [result['status']], "xtrends")
+    return result
+
+async def run_twitter_trends_scrape_async(metrics, session, stream, conditional, limit, chunk_size):
+    """
+    Cuerpo de scrape_twitter_trends_mexico_async(), con cada etapa medida en metrics.
+    """
+    url = URL
+    
+    log.info("========== INICIANDO SCRAPING TWITTER TRENDS (async) ==========")
+    log.info(f"URL: {url}")
+    
+    with metrics.span('delay'):
+        await politeness_delay()
+    
+    validators = await asyncio.to_thread(conditional_headers, SOURCE_XTRENDS, 'MX') if conditional else {}
+    if validators:
+        log.info(f"Petición condicional: {', '.join(validators)}")
+    
+    own_session = session is None
+    if own_session:
+        session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=15))
+    
+    try:
+        log.info("Realizando solicitud HTTP...")
+        async with session.get(url, headers={**HEADERS, **validators}) as response:
+            http = response_validators(response)
+            if response.status == 304:
+                log.info("Status code: 304 (sin cambios, no se parsea)")
+                return build_unchanged_result("xtrends.iamrohit.in", http)
+            response.raise_for_status()
+            log.info(f"Status code: {response.status}")
+            
+            if not stream:
+                with metrics.span('fetch', requests=1, status=response.status) as span:
+                    html = await response.text()
+                    span['bytes'] = len(html.encode('utf-8'))
+                with metrics.span('parse', backend=PARSER_BACKEND) as span:
+                    result = parse_twitter_trends_html(html, limit, http=http)
+                    span['trends'] = result['total_trends']
+                return result
+            
+            # Mismo corte temprano que stream_twitter_trends(): al salir del
+            # bloque sin leer el resto, aiohttp cierra la conexión
+            parser = XtrendsStreamParser()
+            decoder = codecs.getincrementaldecoder(response.charset or 'utf-8')(errors='replace')
+            rows = []
+            named = 0
+            bytes_read = 0
+            with metrics.span('stream', requests=1, status=response.status) as span:
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    bytes_read += len(chunk)
+                    parser.feed(decoder.decode(chunk))
+                    for row in parser.pop_rows():
+                        rows.append(row)
+                        if row[1] and row[1]['text'].strip():
+                            named += 1
+                    if parser.done or named >= limit:
+                        break
+                else:
+                    parser.feed(decoder.decode(b'', final=True))
+                    parser.close()
+                    parser._finish_row()
+                    rows.extend(parser.pop_rows())
+                span['bytes'] = bytes_read
+                span['rows'] = len(rows)
+        
+        log.info(f"Bytes leídos: {bytes_read}")
+        
+        if not parser.table_found:
+            log.error("ERROR: Tabla de tendencias no encontrada")
+            return build_error_result("Tabla de tendencias no encontrada")
+        if not parser.tbody_found:
+            log.error("ERROR: tbody no encontrado")
+            return build_error_result("tbody no encontrado")
+        
+        stats = {}
+        with metrics.span('build_trends') as span:
+            trends = list(iter_trends_from_rows(rows, limit, stats))
+            span['trends'] = len(trends)
+        log.info(f"Tendencias extraídas: {len(trends)}")
+        log.info(f"Filas de anuncios saltadas: {stats['ads_skipped']}")
+        
+        return build_success_result(trends, stats['rows_processed'], stats['ads_skipped'], http)
+    
+    except asyncio.TimeoutError:
+        log.error("ERROR: Timeout - La solicitud tardó demasiado")
+        return build_error_result("Timeout en la solicitud HTTP")
+    
+    except aiohttp.ClientConnectionError as e:
+        log.error(f"ERROR: Conexión rechazada - {e}")
+        return build_error_result(f"Error de conexión: {str(e)}")
+    
+    except Exception as e:
+        log.error(f"ERROR GENERAL: {type(e).__name__}: {e}")
+        return build_error_result(str(e))
+    
+    finally:
+        if own_session:
+            await session.close()
 
 if __name__ == "__main__":
-    print("[v0] Iniciando scraper de Twitter Trends...")
+    log.info("Iniciando scraper de Twitter Trends...")
     data = scrape_twitter_trends_mexico()
     
-    output_file = 'twitter_trends_data.json'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    print(f"\n[v0] ✓ Datos guardados en {output_file}")
+    output_file = OUTPUT_FILE
+    if publish_snapshot(data, output_file, SOURCE_XTRENDS, 'MX'):
+        log.info(f"✓ Datos guardados en {output_file}")
     
-    print(f"\n[v0] ========== SCRAPING COMPLETADO ==========")
-    print(f"[v0] Status: {data['status']}")
-    print(f"[v0] Antigüedad de datos: {data.get('data_source_updated_time', {}).get('minutes_ago', 'N/A')} minutos")
-    print(f"[v0] Tendencias extraídas: {data['total_trends']}")
-    print("\n" + json.dumps(data, ensure_ascii=False, indent=2))
\ No newline at end of file
+    log.info("========== SCRAPING COMPLETADO ==========")
+    log.info(f"Status: {data['status']}")
+    log.info(f"Antigüedad de datos: {data.get('data_source_updated_time', {}).get('minutes_ago', 'N/A')} minutos")
+    log.info(f"Tendencias extraídas: {data['total_trends']}")
\ No newline at end of file
@@ -0,0 +1,209 @@
+import os
+from datetime import datetime, timezone
+from delta_feed import write_delta_feed
+from fixture_replay import fixtures_mode, MODE_RECORD
+from json_codec import write_published
+from output_schema import dump_snapshot
+from rolling_stats import record_rolling
+from run_metrics import RunMetrics, export_run
+from scrape_log import get_logger
+from term_similarity import TermIndex
+from trend_store import TrendStore, snapshot_times, trends_content_hash
+
+log = get_logger(__name__)
+
+STATUS_UNCHANGED = 'unchanged'
+
+def store_disabled():
+    return os.environ.get('TRENDS_DB_DISABLED', '').strip() in ('1', 'true', 'yes')
+
+def conditional_headers(source, geo='MX', timeframe='', store_path=None):
+    """
+    If-None-Match / If-Modified-Since con los validadores de la última
+    respuesta publicada. Vacío si no hay histórico, y al grabar fixtures
+    (un 304 grabado no serviría para el replay).
+    """
+    if store_disabled() or fixtures_mode() == MODE_RECORD:
+        return {}
+    try:
+        with TrendStore(store_path) as store:
+            state = store.source_state(source, geo, timeframe)
+    except Exception as e:
+        log.warning(f"⚠ No se pudo leer el estado de {source}: {type(e).__name__}: {e}")
+        return {}
+    headers = {}
+    if state and state.get('etag'):
+        headers['If-None-Match'] = state['etag']
+    if state and state.get('last_modified'):
+        headers['If-Modified-Since'] = state['last_modified']
+    return headers
+
+def response_validators(response):
+    """
+    Lo que se guarda de una respuesta HTTP para la siguiente petición
+    condicional. Acepta respuestas de requests (status_code) y aiohttp (status).
+    """
+    return {
+        "status_code": getattr(response, 'status_code', getattr(response, 'status', None)),
+        "etag": response.headers.get('ETag'),
+        "last_modified": response.headers.get('Last-Modified'),
+    }
+
+def build_unchanged_result(source_name, http=None):
+    """
+    Resultado de una revisión sin cambios (p.ej. un 304): no trae tendencias
+    y publish_snapshot() no lo escribe, solo registra el latido.
+    """
+    now = datetime.now(timezone.utc).astimezone()
+    result = {
+        "scraping_time": {"timestamp_iso": now.isoformat()},
+        "source": source_name,
+        "total_trends": 0,
+        "trends": [],
+        "status": STATUS_UNCHANGED,
+    }
+    if http:
+        result["http"] = http
+    return result
+
+def write_json(data, output_file):
+    """
+    Escribe el JSON del dashboard en la versión de SCRAPER_OUTPUT_SCHEMA
+    (v1 por defecto), de forma atómica y con sus hermanos .gz/.br
+    (SCRAPER_PRECOMPRESS). Retorna los bytes del JSON.
+    """
+    return write_published(output_file, dump_snapshot(data))[output_file]
+
+def publish_snapshot(data, output_file, source, geo='MX', timeframe='', store_path=None):
+    """
+    Punto único de salida de los scrapers: escribe el JSON del dashboard y
+    agrega el snapshot al histórico SQLite (TRENDS_DB_PATH).
+    Si la fuente respondió 304 o la lista de tendencias es idéntica a la
+    última publicada, no reescribe el JSON (data_source_updated_time no
+    avanza) y solo registra un latido "unchanged". Retorna True si escribió.
+    El histórico es la referencia: los artefactos de corridas anteriores ya
+    tienen esa lista. TRENDS_DB_DISABLED=1 omite el histórico (y con él la
+    detección de cambios), lo que fuerza una escritura completa.
+    Con histórico, cada JSON escrito lleva "feed_seq" y se actualiza su feed
+    de deltas (delta_feed.py) respecto del último snapshot "success", cada
+    snapshot o latido se agrega a las ventanas de rolling_stats.py y los
+    términos nuevos entran al índice de variantes de term_similarity.py.
+    Al terminar exporta las métricas de la corrida (data["timing"] más las
+    etapas write/delta/store/rolling/terms de aquí) a NDJSON/Prometheus.
+    """
+    metrics = RunMetrics.resume(data.get('timing'), source, geo, timeframe)
+    written = False
+    try:
+        written = write_snapshot(data, output_file, source, geo, timeframe, store_path, metrics)
+        return written
+    finally:
+        timing = data.get('timing') or metrics.summary()
+        export_run(
+            {**timing, "stages": timing.get('stages', []) + metrics.spans, "published": written},
+            source, geo, timeframe, data.get('status', ''), data.get('total_trends', 0)
+        )
+
+def write_snapshot(data, output_file, source, geo, timeframe, store_path, metrics):
+    """
+    Cuerpo de publish_snapshot(): escritura del JSON + feed de deltas +
+    histórico + ventanas móviles + índice de términos, medidos como spans
+    "write", "delta", "store", "rolling" y "terms".
+    """
+    if store_disabled():
+        with metrics.span('write') as span:
+            span['written_bytes'] = write_json(data, output_file)
+        return True
+
+    try:
+        store = TrendStore(store_path)
+    except Exception as e:
+        # El histórico nunca debe impedir que se publique el JSON
+        log.warning(f"⚠ No se pudo abrir el histórico: {type(e).__name__}: {e}")
+        if data.get('status') == STATUS_UNCHANGED:
+            return False
+        with metrics.span('write') as span:
+            span['written_bytes'] = write_json(data, output_file)
+        return True
+
+    with store:
+        status = data.get('status')
+        content_hash = trends_content_hash(data.get('trends', [])) if status == 'success' else None
+        unchanged = status == STATUS_UNCHANGED
+        if content_hash:
+            try:
+                state = store.source_state(source, geo, timeframe)
+            except Exception:
+                state = None
+            unchanged = bool(state) and state.get('content_hash') == content_hash
+
+        if not unchanged and status != STATUS_UNCHANGED:
+            # El snapshot anterior se lee antes de agregar este al histórico
+            previous = None
+            if status == 'success':
+                try:
+                    previous = store.latest_snapshot(source, geo, timeframe)
+                except Exception:
+                    previous = None
+            data['feed_seq'] = snapshot_times(data)[0]
+            with metrics.span('write') as span:
+                span['written_bytes'] = write_json(data, output_file)
+            # El feed va después del JSON: un cliente nunca ve un delta hacia
+            # un documento que todavía no se publicó
+            try:
+                with metrics.span('delta') as span:
+                    span['written_bytes'] = write_delta_feed(data, output_file, source, geo, timeframe, previous, data['feed_seq'])
+            except Exception as e:
+                log.warning(f"⚠ No se pudo escribir el feed de deltas: {type(e).__name__}: {e}")
+
+        try:
+            with metrics.span('store', unchanged=unchanged):
+                written = record_in_store(store, data, output_file, source, geo, timeframe, status, content_hash, unchanged)
+        except Exception as e:
+            log.warning(f"⚠ No se pudo guardar en el histórico: {type(e).__name__}: {e}")
+            return not unchanged
+
+        if unchanged or status == 'success':
+            try:
+                with metrics.span('rolling') as span:
+                    trends = None if unchanged else data.get('trends', [])
+                    span['terms'] = record_rolling(store, source, geo, timeframe, snapshot_times(data)[0], trends)
+            except Exception as e:
+                log.warning(f"⚠ No se pudieron actualizar las ventanas móviles: {type(e).__name__}: {e}")
+        if status == 'success' and not unchanged:
+            try:
+                with metrics.span('terms') as span:
+                    span['indexed'] = TermIndex(store).sync()
+            except Exception as e:
+                log.warning(f"⚠ No se pudo actualizar el índice de términos: {type(e).__name__}: {e}")
+        return written
+
+def record_in_store(store, data, output_file, source, geo, timeframe, status, content_hash, unchanged):
+    """
+    Snapshot (o latido "unchanged") + estado de la fuente. Retorna True si
+    el JSON se publicó.
+    """
+    scraped_at, _ = snapshot_times(data)
+    http = data.get('http') or {}
+    if unchanged:
+        snapshot_id = store.record_snapshot({**data, "status": STATUS_UNCHANGED, "trends": []}, source, geo, timeframe)
+        validators = {} if status == STATUS_UNCHANGED else {"etag": http.get('etag'), "last_modified": http.get('last_modified')}
+        store.update_source_state(source, geo, timeframe, checked_at=scraped_at, **validators)
+        log.info(f"Sin cambios en {source}/{geo}: {output_file} no se reescribe (latido #{snapshot_id})")
+        return False
+
+    snapshot_id = store.record_snapshot(data, source, geo, timeframe)
+    if content_hash:
+        store.update_source_state(
+            source, geo, timeframe, checked_at=scraped_at, changed=True, content_hash=content_hash,
+            etag=http.get('etag'), last_modified=http.get('last_modified')
+        )
+    else:
+        # Se publicó un error/fallback/ejemplo: el hash y los validadores de
+        # la última lista buena ya no describen lo publicado, y si la fuente
+        # vuelve con esa misma lista hay que reescribir el JSON
+        store.update_source_state(
+            source, geo, timeframe, checked_at=scraped_at, changed=True, content_hash=None,
+            etag=None, last_modified=None
+        )
+    log.info(f"Snapshot #{snapshot_id} agregado al histórico ({store.path})")
+    return True
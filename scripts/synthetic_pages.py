@@ -0,0 +1,159 @@
+"""
+Páginas sintéticas con la misma estructura que las fuentes reales, para
+benchmarks reproducibles sin red. El número de tendencias es configurable
+para medir cómo escala cada extractor.
+"""
+
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote_plus
+
+WORDS = [
+    "américa", "león", "tigres", "monterrey", "claudia", "manzo", "méxico",
+    "cdmx", "toluca", "atlas", "pumas", "cruz", "azul", "chivas", "elecciones",
+    "lluvia", "sismo", "metro", "peso", "dólar", "netflix", "final", "clásico",
+]
+
+def trend_names(count, seed=0):
+    """
+    Nombres de tendencias únicos y deterministas.
+    """
+    rng = random.Random(seed)
+    names = []
+    seen = set()
+    while len(names) < count:
+        words = rng.sample(WORDS, rng.randint(1, 3))
+        name = " ".join(words).title()
+        if rng.random() < 0.3:
+            name = "#" + name.replace(" ", "")
+        if name in seen:
+            name = f"{name} {len(names)}"
+        seen.add(name)
+        names.append(name)
+    return names
+
+def relative_time(index):
+    if index % 7 == 0:
+        return f"{1 + index % 3} hours ago"
+    return f"{1 + index % 59} minutes ago"
+
+def twitter_trending_page(count=40, seed=0, filler_blocks=200):
+    """
+    Imita twitter-trending.com: JSON-LD ItemList + filas visibles con link de
+    búsqueda, volumen y tiempo relativo, dentro de varios contenedores
+    anidados y con bloques de relleno (menús, artículos, pie de página).
+    """
+    names = trend_names(count, seed)
+    now = datetime.now(timezone.utc)
+    items = []
+    rows = []
+    for i, name in enumerate(names):
+        url = f"https://twitter.com/search?q={quote_plus(name)}"
+        items.append({
+            "@type": "ListItem",
+            "position": i + 1,
+            "name": name,
+            "url": url,
+            "Tweet Count": 1000 if i % 5 == 0 else 10000 + i * 731,
+            "dateCreated": (now - timedelta(minutes=1 + i % 59)).isoformat(),
+        })
+        rows.append(
+            f'<div class="trend-row"><div class="trend-inner">'
+            f'<span class="rank">{i + 1}</span>'
+            f'<div class="name"><a href="{url}">{name}</a></div>'
+            f'<div class="meta"><span class="count">{10 + i}K tweets</span>'
+            f'<span class="time">{relative_time(i)}</span></div>'
+            f'</div></div>'
+        )
+
+    filler = "".join(
+        f'<section class="block"><div><div><p>Bloque {i} con texto de relleno, '
+        f'enlaces y <span>contenido</span> que no es una tendencia.</p>'
+        f'<ul><li>uno</li><li>dos</li><li>tres</li></ul></div></div></section>'
+        for i in range(filler_blocks)
+    )
+    json_ld = json.dumps({"@context": "https://schema.org", "@type": "ItemList", "itemListElement": items}, ensure_ascii=False)
+
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Twitter trends Mexico</title>"
+        f'<script type="application/ld+json">{json_ld}</script></head><body>'
+        f'<nav>{filler[:len(filler) // 4]}</nav>'
+        f'<main><div class="container"><div class="col"><div class="trend-list">{"".join(rows)}</div></div></div></main>'
+        f'<footer>{filler}</footer></body></html>'
+    )
+
+GOOGLE_VOLUMES = ["200K+", "100K+", "50K+", "20K+", "10K+", "5K+", "2K+", "1K+"]
+
+def google_trends_page(count=25, seed=0, filler_blocks=200):
+    """
+    Imita trends.google.com/trending ya renderizado: una fila por tendencia
+    con div.mZ3RIc (nombre) y div.qNpYPd (volumen), dentro de una tabla con
+    columnas extra (gráfica, hora, términos relacionados).
+    """
+    names = trend_names(count, seed)
+    rows = []
+    for i, name in enumerate(names):
+        related = "".join(f'<span class="k36WW">{word.lower()}</span>' for word in name.split()[:3])
+        rows.append(
+            f'<tr class="enOdEe-wZVHld-xMbwt"><td class="jvkLtd"><div class="mZ3RIc">{name.lower()}</div>'
+            f'<div class="Rz403"><div class="qNpYPd">{GOOGLE_VOLUMES[i % len(GOOGLE_VOLUMES)]}</div>'
+            f'<div class="vdw3Ld">{1 + i % 23} hours ago</div></div></td>'
+            f'<td><svg width="100" height="30"><path d="M0 30 L50 {i % 30} L100 0"></path></svg></td>'
+            f'<td><div class="lqv0Cb">{related}</div></td></tr>'
+        )
+    filler = "".join(
+        f'<div class="gb_Ic"><a href="/explore?q={i}">Explorar {i}</a><p>Texto de relleno.</p></div>'
+        for i in range(filler_blocks)
+    )
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Trending now</title></head><body>"
+        f'<header>{filler[:len(filler) // 4]}</header>'
+        f'<main><table class="enOdEe-wZVHld-zg7Cn"><tbody>{"".join(rows)}</tbody></table></main>'
+        f'<footer>{filler}</footer></body></html>'
+    )
+
+def xtrends_volume_text(index):
+    if index % 9 == 0:
+        return "Under 10k"
+    if index % 11 == 0:
+        return "1k"
+    return f"{(index * 37) % 900 + 10}.{index % 10}k"
+
+def xtrends_page(count=40, seed=0, ad_every=8, filler_blocks=200):
+    """
+    Imita xtrends.iamrohit.in: table#twitter-trends > tbody#copyData con una
+    fila por tendencia (a.tweet con atributos rank/tweetcount) y filas de
+    anuncios (ins.adsbygoogle) intercaladas.
+    """
+    names = trend_names(count, seed)
+    rows = []
+    for i, name in enumerate(names):
+        if ad_every and i > 0 and i % ad_every == 0:
+            rows.append(
+                '<tr><td colspan="4"><ins class="adsbygoogle" style="display:block" '
+                'data-ad-client="ca-pub-0000" data-ad-slot="1"></ins></td></tr>'
+            )
+        volume = xtrends_volume_text(i)
+        url = f"https://twitter.com/search?q={quote_plus(name)}"
+        rows.append(
+            f'<tr><td class="rank">{i + 1}</td>'
+            f'<td><a class="tweet" href="{url}" target="_blank" rank="{i + 1}" tweetcount="{volume}">{name}</a></td>'
+            f'<td class="count">{volume} tweets</td>'
+            f'<td class="time"><small>{relative_time(i)}</small></td></tr>'
+        )
+
+    filler = "".join(
+        f'<div class="card"><h3>Sección {i}</h3><p>Texto de relleno para la página '
+        f'con <a href="/country/{i}">enlaces</a> a otros países.</p></div>'
+        for i in range(filler_blocks)
+    )
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Mexico Twitter Trends</title>"
+        "<script>window.dataLayer = [];</script></head><body>"
+        f'<header>{filler[:len(filler) // 4]}</header>'
+        '<div class="container"><table id="twitter-trends" class="table">'
+        '<thead><tr><th>#</th><th>Trend</th><th>Tweets</th><th>Updated</th></tr></thead>'
+        f'<tbody id="copyData">{"".join(rows)}</tbody></table></div>'
+        f'<footer>{filler}</footer></body></html>'
+    )
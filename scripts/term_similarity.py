@@ -0,0 +1,310 @@
+"""
+Índice de términos casi iguales entre fuentes y snapshots (MinHash + LSH).
+
+Google Trends publica "américa - león" y las fuentes de Twitter publican
+"América", "#AméricaLeón" o "Club América": normalize_term_key() de
+trend_merge.py no los junta. Aquí cada término se reduce a sus trigramas de
+caracteres (sin acentos, mayúsculas, '#', espacios ni puntuación; los
+hashtags en camelCase se separan antes) y a una firma MinHash de
+NUM_PERM valores. La firma se corta en BANDS bandas de ROWS valores y cada
+banda se guarda como una clave entera indexada en el histórico SQLite:
+
+    term_bands      (band_key, term_id)     una fila por banda del término
+    term_clusters   (term_id, cluster_id)   grupo de variantes del término
+
+Buscar un término son BANDS consultas por índice y una verificación exacta
+(Jaccard de trigramas >= SIMILARITY) de los pocos candidatos que comparten
+al menos MIN_BAND_HITS bandas: nunca se compara contra todos. Con ROWS=3,
+BANDS=32 y dos bandas en común, dos términos con Jaccard 0.5 quedan como
+candidatos con probabilidad ~0.92, dos con 0.2 ~0.03 y dos con 0.1 casi nunca.
+
+Los grupos son un union-find: cada término nuevo se une con todos los
+términos ya indexados que se le parecen, y si esos estaban en grupos
+distintos los grupos se fusionan. Así un grupo es la componente conexa de
+"se parece a" y no depende del orden en que llegaron los términos ("Club
+América" queda con "América" aunque llegue antes que el puente). Cada fila
+de term_clusters apunta directo a la raíz de su grupo; al fusionar se
+reetiquetan los grupos chicos con el cluster_id del más grande (unión por
+tamaño), así que un término cambia de grupo O(log n) veces como mucho.
+sync() indexa los términos nuevos de `terms` (los ids solo crecen), así que
+cada publicación agrega solo los que llegaron.
+
+Uso:
+    python scripts/term_similarity.py --sync
+    python scripts/term_similarity.py "#AméricaLeón" "monterrey - tigres"
+    python scripts/term_similarity.py --clusters --min-size 3
+
+    with TrendStore() as store:
+        index = TermIndex(store)
+        index.sync()
+        index.similar('Club América')     # [{"term", "term_id", "similarity"}]
+"""
+
+import argparse
+import random
+import re
+import sys
+import zlib
+from functools import lru_cache
+try:
+    import numpy as np
+except ImportError:
+    np = None
+from trend_merge import normalize_term_key
+from trend_store import TrendStore
+
+NUM_PERM = 96
+ROWS = 3
+BANDS = NUM_PERM // ROWS
+SHINGLE = 3
+SIMILARITY = 0.5
+# Bandas en común para considerar un candidato
+MIN_BAND_HITS = 2
+# Términos por lote de firmas en sync()
+SYNC_BATCH = 1000
+
+# Hash multiply-shift ((a*x + b) mod 2^64) >> 32 con (a, b) fijos: las
+# bandas guardadas deben seguir siendo válidas en la siguiente corrida, con
+# o sin NumPy
+MASK64 = (1 << 64) - 1
+_rng = random.Random(20251102)
+PERMUTATIONS = [(_rng.getrandbits(64) | 1, _rng.getrandbits(64)) for _ in range(NUM_PERM)]
+if np is not None:
+    PERM_A = np.array([a for a, _ in PERMUTATIONS], dtype=np.uint64)[:, None]
+    PERM_B = np.array([b for _, b in PERMUTATIONS], dtype=np.uint64)[:, None]
+
+BAND_MASK = (1 << 58) - 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS term_bands (
+    band_key INTEGER NOT NULL,
+    term_id INTEGER NOT NULL REFERENCES terms (id),
+    PRIMARY KEY (band_key, term_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS term_clusters (
+    term_id INTEGER PRIMARY KEY REFERENCES terms (id),
+    cluster_id INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_term_clusters_cluster
+    ON term_clusters (cluster_id);
+"""
+
+CAMEL_CASE = re.compile(r'(?<=[a-záéíóúüñ0-9])(?=[A-ZÁÉÍÓÚÜÑ])')
+
+@lru_cache(maxsize=65536)
+def shingles(term):
+    """
+    'Club América' -> {'clu', 'lub', 'uba', 'bam', 'ame', ...}. Vacío si el
+    término no tiene letras ni números.
+    """
+    key = normalize_term_key(CAMEL_CASE.sub(' ', term or ''))
+    compact = ''.join(ch for ch in key if ch.isalnum())
+    if len(compact) <= SHINGLE:
+        return frozenset([compact] if compact else [])
+    return frozenset(compact[i:i + SHINGLE] for i in range(len(compact) - SHINGLE + 1))
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def signatures(gram_sets):
+    """
+    Firmas MinHash (listas de NUM_PERM enteros de 32 bits) de varios
+    conjuntos de trigramas no vacíos. Con NumPy se calculan todas juntas.
+    """
+    hashes = [[zlib.crc32(g.encode('utf-8')) for g in grams] for grams in gram_sets]
+    if np is None:
+        return [[min((a * x + b) & MASK64 for x in xs) >> 32 for a, b in PERMUTATIONS] for xs in hashes]
+    if not hashes:
+        return []
+    flat = np.fromiter((x for xs in hashes for x in xs), dtype=np.uint64)
+    offsets = np.cumsum([0] + [len(xs) for xs in hashes[:-1]])
+    with np.errstate(over='ignore'):
+        permuted = (PERM_A * flat + PERM_B) >> np.uint64(32)
+    return np.minimum.reduceat(permuted, offsets, axis=1).T.tolist()
+
+def band_keys(sig):
+    """
+    Una clave entera (cabe en un INTEGER de SQLite) por banda: el número de
+    banda en los bits altos y los ROWS valores mezclados en el resto.
+    """
+    keys = []
+    for band in range(BANDS):
+        mixed = 0
+        for value in sig[band * ROWS:(band + 1) * ROWS]:
+            mixed = ((mixed * 0x100000001B3) ^ value) & BAND_MASK
+        keys.append((band << 58) | mixed)
+    return keys
+
+class TermIndex:
+    """
+    Índice LSH sobre la tabla `terms` de un TrendStore.
+    """
+
+    def __init__(self, store, threshold=SIMILARITY):
+        self.store = store
+        self.conn = store.conn
+        self.threshold = threshold
+        self.conn.executescript(SCHEMA)
+
+    def candidates(self, keys):
+        """
+        {term_id: término} que comparten al menos MIN_BAND_HITS de las
+        bandas keys.
+        """
+        placeholders = ','.join('?' * len(keys))
+        rows = self.conn.execute(
+            f'SELECT t.id, t.term FROM (SELECT term_id FROM term_bands WHERE band_key IN ({placeholders}) '
+            'GROUP BY term_id HAVING COUNT(*) >= ?) b JOIN terms t ON t.id = b.term_id',
+            (*keys, MIN_BAND_HITS)
+        )
+        return {row[0]: row[1] for row in rows}
+
+    def similar(self, term, threshold=None):
+        """
+        Términos indexados con Jaccard de trigramas >= threshold, del más
+        parecido al menos (incluye al propio término si ya está indexado).
+        """
+        threshold = self.threshold if threshold is None else threshold
+        grams = shingles(term)
+        if not grams:
+            return []
+        matches = []
+        keys = band_keys(signatures([grams])[0])
+        for term_id, other in self.candidates(keys).items():
+            score = jaccard(grams, shingles(other))
+            if score >= threshold:
+                matches.append({"term": other, "term_id": term_id, "similarity": round(score, 3)})
+        matches.sort(key=lambda m: (-m['similarity'], m['term_id']))
+        return matches
+
+    def add(self, term_id, term, grams=None, sig=None):
+        """
+        Indexa un término de `terms` y fusiona en un solo grupo el suyo y los
+        de todos los términos indexados que se le parecen (o le abre uno
+        propio). Retorna su cluster_id. Llamar dentro de una transacción.
+        """
+        grams = shingles(term) if grams is None else grams
+        if not grams:
+            self.conn.execute('INSERT OR IGNORE INTO term_clusters (term_id, cluster_id) VALUES (?, ?)', (term_id, term_id))
+            return term_id
+
+        keys = band_keys(signatures([grams])[0] if sig is None else sig)
+        matches = [
+            other_id for other_id, other in self.candidates(keys).items()
+            if other_id != term_id and jaccard(grams, shingles(other)) >= self.threshold
+        ]
+        cluster_id = self.union(term_id, matches)
+
+        self.conn.executemany(
+            'INSERT OR IGNORE INTO term_bands (band_key, term_id) VALUES (?, ?)',
+            [(key, term_id) for key in keys]
+        )
+        self.conn.execute(
+            'INSERT INTO term_clusters (term_id, cluster_id) VALUES (?, ?) '
+            'ON CONFLICT (term_id) DO UPDATE SET cluster_id = excluded.cluster_id',
+            (term_id, cluster_id)
+        )
+        return cluster_id
+
+    def union(self, term_id, matches):
+        """
+        Fusiona los grupos de matches en el más grande (en un empate, el de
+        menor cluster_id) y retorna ese cluster_id; term_id si no hay
+        ninguno.
+        """
+        if not matches:
+            return term_id
+        placeholders = ','.join('?' * len(matches))
+        roots = [row[0] for row in self.conn.execute(
+            f'SELECT DISTINCT cluster_id FROM term_clusters WHERE term_id IN ({placeholders})', matches
+        )]
+        if not roots:
+            return term_id
+        if len(roots) == 1:
+            return roots[0]
+        placeholders = ','.join('?' * len(roots))
+        sizes = dict(self.conn.execute(
+            f'SELECT cluster_id, COUNT(*) FROM term_clusters WHERE cluster_id IN ({placeholders}) GROUP BY cluster_id', roots
+        ).fetchall())
+        root = min(roots, key=lambda r: (-sizes.get(r, 0), r))
+        others = [r for r in roots if r != root]
+        self.conn.execute(
+            f'UPDATE term_clusters SET cluster_id = ? WHERE cluster_id IN ({",".join("?" * len(others))})',
+            (root, *others)
+        )
+        return root
+
+    def sync(self):
+        """
+        Indexa los términos de `terms` que llegaron desde el último sync.
+        Retorna cuántos se agregaron.
+        """
+        last = self.conn.execute('SELECT MAX(term_id) FROM term_clusters').fetchone()[0] or 0
+        pending = self.conn.execute('SELECT id, term FROM terms WHERE id > ? ORDER BY id', (last,)).fetchall()
+        with self.conn:
+            for start in range(0, len(pending), SYNC_BATCH):
+                batch = [(term_id, term, shingles(term)) for term_id, term in pending[start:start + SYNC_BATCH]]
+                sigs = iter(signatures([grams for _, _, grams in batch if grams]))
+                for term_id, term, grams in batch:
+                    self.add(term_id, term, grams, next(sigs) if grams else None)
+        return len(pending)
+
+    def cluster_of(self, term):
+        """
+        Variantes agrupadas con term (incluido), o [] si no está indexado.
+        """
+        term_id = self.store.term_id(term)
+        if term_id is None:
+            return []
+        rows = self.conn.execute(
+            'SELECT t.term FROM term_clusters c JOIN term_clusters m ON m.cluster_id = c.cluster_id '
+            'JOIN terms t ON t.id = m.term_id WHERE c.term_id = ? ORDER BY m.term_id',
+            (term_id,)
+        )
+        return [row[0] for row in rows]
+
+    def clusters(self, min_size=2, limit=None):
+        """
+        [{"cluster_id", "size", "terms"}] de los grupos con al menos min_size
+        términos, de los más grandes a los más chicos.
+        """
+        rows = self.conn.execute(
+            'SELECT cluster_id, COUNT(*) AS size FROM term_clusters GROUP BY cluster_id HAVING size >= ? '
+            'ORDER BY size DESC, cluster_id LIMIT ?',
+            (min_size, -1 if limit is None else limit)
+        ).fetchall()
+        result = []
+        for cluster_id, size in rows:
+            terms = [row[0] for row in self.conn.execute(
+                'SELECT t.term FROM term_clusters c JOIN terms t ON t.id = c.term_id WHERE c.cluster_id = ? ORDER BY c.term_id',
+                (cluster_id,)
+            )]
+            result.append({"cluster_id": cluster_id, "size": size, "terms": terms})
+        return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('terms', nargs='*', help="Términos a buscar")
+    parser.add_argument('--db', default=None, help="Histórico (por defecto TRENDS_DB_PATH o trends_history.db)")
+    parser.add_argument('--sync', action='store_true', help="Indexar los términos nuevos del histórico")
+    parser.add_argument('--threshold', type=float, default=SIMILARITY, help="Jaccard mínimo de trigramas")
+    parser.add_argument('--clusters', action='store_true', help="Listar los grupos de variantes")
+    parser.add_argument('--min-size', type=int, default=2)
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    with TrendStore(args.db) as store:
+        index = TermIndex(store, args.threshold)
+        if args.sync:
+            print(f"[v0] {index.sync()} términos nuevos indexados", file=sys.stderr)
+        for term in args.terms:
+            print(f"[v0] {term}:", file=sys.stderr)
+            for match in index.similar(term)[:args.top]:
+                print(f"[v0]   {match['similarity']:.3f}  {match['term']}", file=sys.stderr)
+        if args.clusters:
+            for cluster in index.clusters(args.min_size, args.top):
+                print(f"[v0] {cluster['size']:4d}  {' | '.join(cluster['terms'][:8])}", file=sys.stderr)
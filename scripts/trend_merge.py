@@ -0,0 +1,170 @@
+"""
+Unión de las listas de varias fuentes en un ranking por país.
+
+twitter-trending.com y xtrends publican top-40 que se superponen, con
+convenciones de volumen distintas (tweet_volume -1 = desconocido en la
+primera; normalize_tweet_count() en la segunda, donde 0 es desconocido).
+Aquí cada término se indexa en un dict por normalize_term_key() (sin
+acentos, casefold, sin '#', espacios colapsados): "#Morelia" y "morelia"
+son el mismo término, "Día de  Muertos" y "dia de muertos" también.
+
+Por término se guardan el rank y el volumen de cada fuente y un puntaje de
+consenso en [0, 1]: el promedio, sobre todas las fuentes de ese país, de
+(n - rank + 1) / n (1.0 para el #1 de una lista de n; 0 si la fuente no lo
+tiene). El ranking unificado ordena por consenso, luego mejor rank y
+luego volumen. Todo es un recorrido por tendencia: lineal en el total de
+tendencias, para los países que haya en la corrida.
+
+Uso:
+    python scripts/trend_merge.py                    # los dos JSON de Twitter -> merged_trends.json
+    python scripts/trend_merge.py twitter_trends_data.json trends_data_US_24h.json -o /tmp/merged.json
+
+    merged = merge_geos([(SOURCE_XTRENDS, 'MX', data), ...])   # {geo: ranking}
+"""
+
+import argparse
+import re
+import unicodedata
+from datetime import datetime, timezone
+from functools import lru_cache
+from json_codec import dumps, write_published
+from output_schema import load_snapshot
+from trend_store import snapshot_key, trend_row, SOURCE_TWITTER_TRENDING, SOURCE_XTRENDS
+
+DEFAULT_OUTPUT = 'merged_trends.json'
+DEFAULT_INPUTS = ['twitter_trending_com_data.json', 'twitter_trends_data.json']
+
+# En un empate de consenso y rank, qué fuente da el término que se muestra
+SOURCE_PRIORITY = [SOURCE_XTRENDS, SOURCE_TWITTER_TRENDING]
+
+WHITESPACE = re.compile(r'\s+')
+
+@lru_cache(maxsize=8192)
+def normalize_term_key(term):
+    """
+    Clave de comparación de un término: 'Día  del #Muertos' -> 'dia del muertos'.
+    """
+    decomposed = unicodedata.normalize('NFKD', term or '')
+    folded = ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+    return WHITESPACE.sub(' ', folded.replace('#', ' ')).strip()
+
+def known_volume(volume):
+    """
+    Volumen comparable entre fuentes: None si la fuente no lo sabe (-1 en
+    twitter-trending.com, 0 en xtrends).
+    """
+    if isinstance(volume, (int, float)) and volume > 0:
+        return volume
+    return None
+
+def merge_trends(lists):
+    """
+    {fuente: [tendencias]} de un mismo país -> ranking unificado.
+    """
+    index = {}
+    sizes = {}
+    for source, trends in lists.items():
+        sizes[source] = len(trends)
+        for position, trend in enumerate(trends, 1):
+            rank, term, volume, _, _ = trend_row(trend)
+            key = normalize_term_key(term)
+            if not key:
+                continue
+            entry = index.get(key)
+            if entry is None:
+                entry = index[key] = {"key": key, "ranks": {}, "volumes": {}, "terms": {}}
+            if source in entry['ranks']:
+                # La misma clave dos veces en una fuente: cuenta la mejor
+                continue
+            entry['ranks'][source] = rank if isinstance(rank, int) else position
+            entry['volumes'][source] = known_volume(volume)
+            entry['terms'][source] = term
+
+    total_sources = len(lists) or 1
+    priority = {source: i for i, source in enumerate(SOURCE_PRIORITY)}
+    merged = []
+    for entry in index.values():
+        ranks = entry['ranks']
+        score = sum(
+            max(0.0, (sizes[source] - rank + 1) / sizes[source])
+            for source, rank in ranks.items() if sizes[source]
+        ) / total_sources
+        best_source = min(ranks, key=lambda source: (ranks[source], priority.get(source, len(priority))))
+        volumes = [v for v in entry['volumes'].values() if v is not None]
+        merged.append({
+            "term": entry['terms'][best_source],
+            "key": entry['key'],
+            "consensus": round(score, 4),
+            "sources_count": len(ranks),
+            "best_rank": ranks[best_source],
+            "volume": max(volumes) if volumes else None,
+            "ranks": ranks,
+            "volumes": entry['volumes'],
+        })
+
+    merged.sort(key=lambda t: (-t['consensus'], t['best_rank'], -(t['volume'] or 0), t['key']))
+    for rank, trend in enumerate(merged, 1):
+        trend['rank'] = rank
+    return merged
+
+def merge_geos(documents):
+    """
+    [(fuente, país, documento)] -> {país: {"sources", "total_trends", "trends"}}.
+    Los documentos que no son "success" (fallback, datos de ejemplo) no entran.
+    """
+    by_geo = {}
+    for source, geo, data in documents:
+        if not data or data.get('status', 'success') != 'success':
+            continue
+        by_geo.setdefault(geo, {})[source] = data.get('trends') or []
+
+    result = {}
+    for geo, lists in by_geo.items():
+        trends = merge_trends(lists)
+        result[geo] = {
+            "sources": sorted(lists),
+            "total_trends": len(trends),
+            "trends": trends,
+        }
+    return result
+
+def merged_document(documents):
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "geos": merge_geos(documents),
+    }
+
+def load_inputs(paths):
+    """
+    Archivos publicados -> [(fuente, país, documento)], reconociendo la
+    fuente y el país por el nombre (como trends_server.py).
+    """
+    documents = []
+    for path in paths:
+        key = snapshot_key(path.replace('\\', '/').rsplit('/', 1)[-1])
+        if key is None:
+            raise ValueError(f"No se reconoce la fuente de {path}")
+        source, geo, _ = key
+        documents.append((source, geo, load_snapshot(path)))
+    return documents
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('inputs', nargs='*', default=DEFAULT_INPUTS, help="JSON publicados por los scrapers")
+    parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--top', type=int, default=10, help="Cuántas filas mostrar por país")
+    args = parser.parse_args()
+
+    try:
+        documents = load_inputs(args.inputs)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    doc = merged_document(documents)
+    write_published(args.output, dumps(doc, indent=True))
+    for geo, merged in doc['geos'].items():
+        print(f"[v0] {geo}: {merged['total_trends']} términos de {', '.join(merged['sources'])}")
+        for trend in merged['trends'][:args.top]:
+            ranks = ' '.join(f"{source}=#{rank}" for source, rank in trend['ranks'].items())
+            print(f"[v0]   #{trend['rank']:<3} {trend['term']:<30} {trend['consensus']:.3f}  {ranks}")
+    print(f"[v0] ✓ {args.output}")
@@ -0,0 +1,383 @@
+"""
+Almacén histórico de snapshots de tendencias en SQLite (modo WAL).
+
+Cada corrida de un scraper agrega una fila a `snapshots` y una fila por
+tendencia a `observations`. Los términos se guardan una sola vez en `terms`
+y las observaciones solo guardan su id. Los tiempos son epoch en segundos
+(UTC), así que los índices (source, geo, scraped_at) y (term_id,
+observed_at) responden en milisegundos aunque haya semanas de snapshots
+cada 5 minutos.
+
+Solo los snapshots con status "success" generan observaciones: los datos de
+ejemplo/fallback quedan registrados como corrida, pero no como tendencias.
+
+`source_state` guarda por fuente/país/ventana el último ETag/Last-Modified y
+un hash de la lista de tendencias, para pedir solo cuando algo cambió y
+registrar un latido "unchanged" (snapshot sin observaciones) cuando no.
+
+La versión de los datos va en PRAGMA user_version: al abrir un histórico
+de una versión anterior, migrate() lo pone al día una sola vez.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime, timezone
+
+DEFAULT_DB_PATH = 'trends_history.db'
+
+# PRAGMA user_version de los datos. 1: el volumen de Google Trends es la
+# cota inferior de su texto ("200K+" -> 200000), ya no un bucket 0-100
+SCHEMA_VERSION = 1
+
+SOURCE_GOOGLE_TRENDS = 'google_trends'
+SOURCE_TWITTER_TRENDING = 'twitter_trending_com'
+SOURCE_XTRENDS = 'xtrends'
+
+# Archivos de los scrapers -> (fuente, país, ventana)
+FIXED_OUTPUTS = {
+    'twitter_trends_data.json': (SOURCE_XTRENDS, 'MX', ''),
+    'twitter_trending_com_data.json': (SOURCE_TWITTER_TRENDING, 'MX', ''),
+    'trends_data.json': (SOURCE_GOOGLE_TRENDS, 'MX', '24h'),
+}
+# scrape_gt_trends.output_path() para el resto de países/ventanas
+GT_OUTPUT = re.compile(r'^trends_data_([A-Z-]+)_(\w+)\.json$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    term TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    geo TEXT NOT NULL,
+    timeframe TEXT NOT NULL DEFAULT '',
+    scraped_at INTEGER NOT NULL,
+    source_updated_at INTEGER,
+    status TEXT NOT NULL,
+    total_trends INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_snapshots_source_geo_time
+    ON snapshots (source, geo, scraped_at);
+
+CREATE TABLE IF NOT EXISTS observations (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id),
+    term_id INTEGER NOT NULL REFERENCES terms (id),
+    observed_at INTEGER NOT NULL,
+    rank INTEGER,
+    volume INTEGER,
+    volume_text TEXT,
+    minutes_ago INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS idx_observations_term_time
+    ON observations (term_id, observed_at);
+
+CREATE INDEX IF NOT EXISTS idx_observations_snapshot
+    ON observations (snapshot_id);
+
+CREATE TABLE IF NOT EXISTS source_state (
+    source TEXT NOT NULL,
+    geo TEXT NOT NULL,
+    timeframe TEXT NOT NULL DEFAULT '',
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT,
+    changed_at INTEGER,
+    checked_at INTEGER,
+    PRIMARY KEY (source, geo, timeframe)
+);
+"""
+
+def iso_to_epoch(value):
+    """
+    '2025-11-02T15:34:36.27-06:00' -> epoch en segundos. None si no se puede.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.astimezone()
+    return int(parsed.timestamp())
+
+def epoch_to_iso(value):
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value, timezone.utc).isoformat()
+
+def snapshot_times(data):
+    """
+    (scraped_at, source_updated_at) en epoch, para los formatos de los tres
+    scrapers (Google Trends usa timestamp/timestamp_mexico; Twitter usa
+    scraping_time/data_source_updated_time).
+    """
+    scraped = (
+        (data.get('scraping_time') or {}).get('timestamp_iso')
+        or (data.get('timestamp_mexico') or {}).get('timestamp_iso')
+        or data.get('timestamp')
+    )
+    updated = (data.get('data_source_updated_time') or {}).get('timestamp_iso')
+    scraped_at = iso_to_epoch(scraped)
+    if scraped_at is None:
+        scraped_at = int(datetime.now(timezone.utc).timestamp())
+    return scraped_at, iso_to_epoch(updated)
+
+def snapshot_key(name):
+    """
+    (fuente, país, ventana) de un JSON publicado, o None si no es uno.
+    """
+    if name in FIXED_OUTPUTS:
+        return FIXED_OUTPUTS[name]
+    match = GT_OUTPUT.match(name)
+    if match:
+        return SOURCE_GOOGLE_TRENDS, match.group(1), match.group(2)
+    return None
+
+def trend_row(trend):
+    """
+    (rank, término, volumen, texto de volumen, minutos) de una tendencia,
+    sin importar de qué scraper venga.
+    """
+    volume = trend.get('tweet_volume', trend.get('volume'))
+    volume_text = trend.get('tweet_volume_text', trend.get('volume_text'))
+    minutes = trend.get('minutes_since_update', trend.get('minutes_since_creation'))
+    return trend.get('rank'), (trend.get('term') or '').strip(), volume, volume_text, minutes
+
+def trends_content_hash(trends):
+    """
+    Hash de la lista normalizada (orden, término, volumen). Los minutos y
+    las horas calculadas no entran: cambian en cada corrida aunque la lista
+    sea la misma.
+    """
+    normalized = []
+    for trend in trends:
+        _, term, volume, volume_text, _ = trend_row(trend)
+        normalized.append([term, volume_text if volume_text is not None else volume])
+    payload = json.dumps(normalized, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+class TrendStore:
+    """
+    Uso:
+        with TrendStore() as store:
+            store.record_snapshot(data, SOURCE_XTRENDS, 'MX')
+            store.first_seen('#FueClaudia')
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get('TRENDS_DB_PATH', DEFAULT_DB_PATH)
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self._term_ids = {}
+        self.migrate()
+
+    def migrate(self):
+        """
+        Pone al día los datos guardados con una versión anterior. Los pasos
+        son idempotentes: si dos procesos abren a la vez un histórico viejo,
+        repetirlos no cambia nada.
+        """
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        if version < 1:
+            # Aquí y no arriba: volume_parser importa este módulo
+            from volume_parser import renormalize_store
+            renormalize_store(self, SOURCE_GOOGLE_TRENDS)
+        self.conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def intern_terms(self, terms):
+        """
+        Retorna {término: id}, creando los que no existan.
+        """
+        missing = [t for t in set(terms) if t not in self._term_ids]
+        if missing:
+            self.conn.executemany('INSERT OR IGNORE INTO terms (term) VALUES (?)', [(t,) for t in missing])
+            # SQLite limita los parámetros por consulta; se pide en bloques
+            for start in range(0, len(missing), 500):
+                chunk = missing[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                for row in self.conn.execute(f'SELECT id, term FROM terms WHERE term IN ({placeholders})', chunk):
+                    self._term_ids[row['term']] = row['id']
+        return {t: self._term_ids[t] for t in terms}
+
+    def term_id(self, term):
+        if term in self._term_ids:
+            return self._term_ids[term]
+        row = self.conn.execute('SELECT id FROM terms WHERE term = ?', (term,)).fetchone()
+        if row is None:
+            return None
+        self._term_ids[term] = row['id']
+        return row['id']
+
+    def record_snapshot(self, data, source, geo='MX', timeframe=''):
+        """
+        Agrega un snapshot (el dict que produce un scraper). Retorna su id.
+        """
+        scraped_at, source_updated_at = snapshot_times(data)
+        status = data.get('status', 'unknown')
+        rows = [trend_row(t) for t in data.get('trends', [])] if status == 'success' else []
+        rows = [r for r in rows if r[1]]
+
+        with self.conn:
+            cursor = self.conn.execute(
+                'INSERT INTO snapshots (source, geo, timeframe, scraped_at, source_updated_at, status, total_trends) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (source, geo, timeframe or '', scraped_at, source_updated_at, status, len(rows))
+            )
+            snapshot_id = cursor.lastrowid
+            ids = self.intern_terms([r[1] for r in rows])
+            self.conn.executemany(
+                'INSERT INTO observations (snapshot_id, term_id, observed_at, rank, volume, volume_text, minutes_ago) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(snapshot_id, ids[term], scraped_at, rank, volume, volume_text, minutes)
+                 for rank, term, volume, volume_text, minutes in rows]
+            )
+        return snapshot_id
+
+    def source_state(self, source, geo='MX', timeframe=''):
+        """
+        Último estado conocido de la fuente (validadores HTTP y hash), o None.
+        """
+        row = self.conn.execute(
+            'SELECT * FROM source_state WHERE source = ? AND geo = ? AND timeframe = ?',
+            (source, geo, timeframe or '')
+        ).fetchone()
+        return dict(row) if row else None
+
+    def update_source_state(self, source, geo='MX', timeframe='', checked_at=None, changed=False,
+                            content_hash=None, etag=None, last_modified=None):
+        """
+        Registra una revisión de la fuente. Con changed=True reemplaza hash y
+        validadores; si no, actualiza checked_at y los validadores recibidos.
+        """
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR IGNORE INTO source_state (source, geo, timeframe) VALUES (?, ?, ?)',
+                (source, geo, timeframe or '')
+            )
+            if changed:
+                self.conn.execute(
+                    'UPDATE source_state SET content_hash = ?, etag = ?, last_modified = ?, '
+                    'changed_at = ?, checked_at = ? WHERE source = ? AND geo = ? AND timeframe = ?',
+                    (content_hash, etag, last_modified, checked_at, checked_at, source, geo, timeframe or '')
+                )
+            elif etag or last_modified:
+                # Misma lista con validadores nuevos (200 sin cambios reales)
+                self.conn.execute(
+                    'UPDATE source_state SET etag = ?, last_modified = ?, checked_at = ? '
+                    'WHERE source = ? AND geo = ? AND timeframe = ?',
+                    (etag, last_modified, checked_at, source, geo, timeframe or '')
+                )
+            else:
+                self.conn.execute(
+                    'UPDATE source_state SET checked_at = ? WHERE source = ? AND geo = ? AND timeframe = ?',
+                    (checked_at, source, geo, timeframe or '')
+                )
+
+    def first_seen(self, term, source=None, geo=None):
+        """
+        Primera vez (epoch) que el término apareció, opcionalmente por fuente/país.
+        """
+        term_id = self.term_id(term)
+        if term_id is None:
+            return None
+        query = 'SELECT MIN(o.observed_at) AS first FROM observations o'
+        where, params = ['o.term_id = ?'], [term_id]
+        if source or geo:
+            query += ' JOIN snapshots s ON s.id = o.snapshot_id'
+            if source:
+                where.append('s.source = ?')
+                params.append(source)
+            if geo:
+                where.append('s.geo = ?')
+                params.append(geo)
+        row = self.conn.execute(f'{query} WHERE {" AND ".join(where)}', params).fetchone()
+        return row['first']
+
+    def term_history(self, term, source=None, geo=None, since=None, until=None):
+        """
+        Observaciones de un término ordenadas por tiempo.
+        """
+        term_id = self.term_id(term)
+        if term_id is None:
+            return []
+        where, params = ['o.term_id = ?'], [term_id]
+        if since is not None:
+            where.append('o.observed_at >= ?')
+            params.append(since)
+        if until is not None:
+            where.append('o.observed_at < ?')
+            params.append(until)
+        if source:
+            where.append('s.source = ?')
+            params.append(source)
+        if geo:
+            where.append('s.geo = ?')
+            params.append(geo)
+        rows = self.conn.execute(
+            'SELECT o.observed_at, s.source, s.geo, s.timeframe, o.rank, o.volume, o.volume_text, o.minutes_ago '
+            'FROM observations o JOIN snapshots s ON s.id = o.snapshot_id '
+            f'WHERE {" AND ".join(where)} ORDER BY o.observed_at',
+            params
+        )
+        return [dict(row) for row in rows]
+
+    def snapshots(self, source, geo='MX', since=None, until=None, timeframe=None):
+        """
+        Snapshots (sin tendencias) de una fuente/país en un rango de tiempo.
+        """
+        where, params = ['source = ?', 'geo = ?'], [source, geo]
+        if timeframe is not None:
+            where.append('timeframe = ?')
+            params.append(timeframe)
+        if since is not None:
+            where.append('scraped_at >= ?')
+            params.append(since)
+        if until is not None:
+            where.append('scraped_at < ?')
+            params.append(until)
+        rows = self.conn.execute(
+            f'SELECT * FROM snapshots WHERE {" AND ".join(where)} ORDER BY scraped_at', params
+        )
+        return [dict(row) for row in rows]
+
+    def latest_snapshot(self, source, geo='MX', timeframe='', status='success'):
+        """
+        Último snapshot de una fuente/país con sus tendencias ordenadas por rank.
+        """
+        row = self.conn.execute(
+            'SELECT * FROM snapshots WHERE source = ? AND geo = ? AND timeframe = ? AND status = ? '
+            'ORDER BY scraped_at DESC, id DESC LIMIT 1',
+            (source, geo, timeframe or '', status)
+        ).fetchone()
+        if row is None:
+            return None
+        snapshot = dict(row)
+        snapshot['trends'] = [dict(r) for r in self.conn.execute(
+            'SELECT o.rank, t.term, o.volume, o.volume_text, o.minutes_ago '
+            'FROM observations o JOIN terms t ON t.id = o.term_id '
+            'WHERE o.snapshot_id = ? ORDER BY o.rank',
+            (snapshot['id'],)
+        )]
+        return snapshot
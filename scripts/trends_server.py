@@ -0,0 +1,508 @@
+"""
+Servidor HTTP local para los dashboards: sirve el último snapshot de cada
+fuente/país con ETag fuerte (304 si no cambió) y avisa por SSE (server-sent
+events) en cuanto un scraper publica, con el delta si el feed lo tiene.
+
+Solo asyncio de la librería estándar: no hace falta nada más que los JSON
+que escriben los scrapers (run_all.py, scheduler.py o cada script). Los
+archivos se reemplazan de forma atómica (json_codec.write_atomic), así que
+el servidor los revisa con un stat() cada --poll segundos y nunca lee uno a
+medias.
+
+Rutas (GET/HEAD):
+    /api/snapshots                      fuente, país, ventana, seq y ETag de cada JSON publicado
+    /api/latest?source=xtrends&geo=MX   último snapshot (Google Trends: &timeframe=24h por defecto)
+    /api/events[?source=&geo=&path=]    stream SSE: un evento "snapshot" por publicación
+    /twitter_trends_data.json, /trends_data.json, ... y sus .delta.json
+    /trends.html, /twitter_trends.html  los dashboards de public/
+
+Cada evento lleva {"source", "geo", "timeframe", "path", "seq", "etag",
+"delta"}; delta es el del feed (delta_feed.py) cuando lleva exactamente al
+snapshot nuevo, o null y el cliente pide el JSON (que le llega con 304 si ya
+lo tenía). Con Last-Event-ID, al reconectar se reenvía lo que se perdió.
+
+Uso:
+    python scripts/trends_server.py
+    python scripts/trends_server.py --port 8765 --dir . --poll 0.25
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import time
+from urllib.parse import parse_qs, urlsplit
+import json_codec
+from json_codec import compress, decompress, dumps, loads
+from delta_feed import delta_path
+from scrape_log import get_logger
+from trend_store import snapshot_key
+
+log = get_logger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_POLL = 0.25
+DEFAULT_PUBLIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'public')
+
+# Comentario SSE cada tantos segundos para que proxies y navegadores no
+# den la conexión por muerta
+HEARTBEAT_SECONDS = 15
+# Milisegundos que espera EventSource antes de reconectar
+RETRY_MS = 5000
+# Cuánto se espera el feed de deltas (se escribe después del JSON) antes
+# de avisar sin delta
+FEED_GRACE_SECONDS = 2.0
+# Eventos pendientes por cliente; uno que no lee se desconecta
+SUBSCRIBER_QUEUE = 16
+MAX_HEADER_BYTES = 16 * 1024
+KEEPALIVE_SECONDS = 60
+
+CONTENT_TYPES = {
+    '.json': 'application/json; charset=utf-8',
+    '.html': 'text/html; charset=utf-8',
+}
+
+REASONS = {
+    200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+}
+
+def content_etag(payload):
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+def etag_matches(if_none_match, etag):
+    """
+    If-None-Match (lista separada por comas, con W/ o *) contra un ETag.
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or candidate.removeprefix('W/') == etag:
+            return True
+    return False
+
+def accepted_encodings(accept_encoding):
+    """
+    Codificaciones aceptadas (sin las que vienen con q=0), en nuestro orden
+    de preferencia: br, gz.
+    """
+    accepted = set()
+    for token in (accept_encoding or '').split(','):
+        name, _, params = token.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(name.strip().lower())
+    formats = []
+    if 'br' in accepted and json_codec.brotli is not None:
+        formats.append('br')
+    if 'gzip' in accepted:
+        formats.append('gz')
+    return formats
+
+class PublishedFile:
+    """
+    Un archivo servido: sus bytes, ETag y versiones comprimidas, releídos
+    solo cuando cambia (inode/mtime/tamaño).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.signature = None
+        self.payload = None
+        self.etag = None
+        self.encoded = {}
+
+    def refresh(self):
+        """
+        Relee el archivo si cambió. Retorna True si su contenido es otro.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            changed = self.payload is not None
+            self.signature, self.payload, self.etag, self.encoded = None, None, None, {}
+            return changed
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if signature == self.signature:
+            return False
+        with open(self.path, 'rb') as f:
+            payload = f.read()
+        self.signature = signature
+        if payload == self.payload:
+            return False
+        self.payload = payload
+        self.etag = content_etag(payload)
+        self.encoded = {}
+        return True
+
+    def encoding(self, fmt):
+        """
+        Bytes comprimidos en fmt: el hermano .gz/.br de write_published() si
+        corresponde a este contenido, o comprimidos aquí (una vez por versión).
+        """
+        if fmt not in self.encoded:
+            self.encoded[fmt] = self.read_sibling(fmt) or compress(self.payload, fmt)
+        return self.encoded[fmt]
+
+    def read_sibling(self, fmt):
+        try:
+            with open(f"{self.path}.{fmt}", 'rb') as f:
+                encoded = f.read()
+            return encoded if decompress(encoded, fmt) == self.payload else None
+        except Exception:
+            return None
+
+class Snapshot:
+    """
+    Un JSON publicado (fuente/país/ventana) y su feed de deltas.
+    """
+
+    def __init__(self, directory, name, key):
+        self.name = name
+        self.url = f"/{name}"
+        self.source, self.geo, self.timeframe = key
+        self.file = PublishedFile(os.path.join(directory, name))
+        self.feed = PublishedFile(os.path.join(directory, delta_path(name)))
+        self.seq = None
+        self.feed_seq = None
+        self.pending_since = None
+
+    def reload(self):
+        """
+        Relee JSON y feed. Retorna True si el JSON cambió.
+        """
+        changed = self.file.refresh()
+        if changed:
+            self.seq = read_field(self.file.payload, 'feed_seq')
+        if self.feed.refresh():
+            self.feed_seq = read_field(self.feed.payload, 'seq')
+        return changed
+
+    def feed_ready(self):
+        # Sin feed_seq (histórico desactivado) no habrá delta que esperar
+        return self.seq is None or self.feed_seq == self.seq
+
+    def delta(self):
+        """
+        El último delta del feed si lleva exactamente a este snapshot.
+        """
+        if self.seq is None or self.feed_seq != self.seq:
+            return None
+        deltas = read_field(self.feed.payload, 'deltas') or []
+        if deltas and deltas[-1].get('seq') == self.seq:
+            return deltas[-1]
+        return None
+
+    def matches(self, filters):
+        return all(
+            not wanted or wanted == value
+            for wanted, value in [
+                (filters.get('source'), self.source), (filters.get('geo'), self.geo),
+                (filters.get('timeframe'), self.timeframe), (filters.get('path'), self.url),
+            ]
+        )
+
+    def describe(self):
+        return {
+            "source": self.source, "geo": self.geo, "timeframe": self.timeframe,
+            "path": self.url, "seq": self.seq, "etag": self.file.etag,
+        }
+
+    def event(self, with_delta=True):
+        return {**self.describe(), "delta": self.delta() if with_delta else None}
+
+def read_field(payload, key):
+    try:
+        doc = loads(payload)
+    except Exception:
+        return None
+    return doc.get(key) if isinstance(doc, dict) else None
+
+class TrendsServer:
+    """
+    Estado del servidor: los snapshots del directorio, los clientes SSE y
+    el loop que detecta publicaciones nuevas.
+    """
+
+    def __init__(self, directory='.', public_dir=DEFAULT_PUBLIC_DIR, poll=DEFAULT_POLL):
+        self.directory = directory
+        self.public_dir = public_dir
+        self.poll = poll
+        self.snapshots = {}
+        self.pages = {}
+        # cola de eventos -> filtros del cliente SSE
+        self.subscribers = {}
+
+    def scan(self, announce=True):
+        """
+        Una vuelta del watcher: descubre JSON nuevos, relee los que
+        cambiaron y avisa por SSE los que ya tienen su feed (o se cansaron
+        de esperarlo). announce=False solo carga (al arrancar).
+        """
+        try:
+            names = [entry.name for entry in os.scandir(self.directory) if entry.is_file()]
+        except OSError as e:
+            log.warning(f"⚠ No se pudo listar {self.directory}: {e}")
+            names = []
+        for name in names:
+            key = snapshot_key(name)
+            if key and name not in self.snapshots:
+                self.snapshots[name] = Snapshot(self.directory, name, key)
+
+        now = time.monotonic()
+        for snapshot in self.snapshots.values():
+            if snapshot.reload() and snapshot.file.payload is not None and announce:
+                snapshot.pending_since = now
+            if snapshot.pending_since is None:
+                continue
+            if snapshot.feed_ready() or now - snapshot.pending_since >= FEED_GRACE_SECONDS:
+                snapshot.pending_since = None
+                self.broadcast(snapshot)
+
+    def broadcast(self, snapshot):
+        event = snapshot.event()
+        log.info(f"Publicado {snapshot.url} (seq {snapshot.seq}, delta: {'sí' if event['delta'] else 'no'})")
+        for queue, filters in list(self.subscribers.items()):
+            if not snapshot.matches(filters):
+                continue
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Cliente que no lee: se le cierra el stream y al reconectar
+                # recupera con Last-Event-ID
+                self.subscribers.pop(queue, None)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def watch(self):
+        while True:
+            self.scan()
+            await asyncio.sleep(self.poll)
+
+    def find_latest(self, query):
+        source = query.get('source')
+        geo = (query.get('geo') or 'MX').upper()
+        candidates = [s for s in self.snapshots.values() if s.source == source and s.geo == geo and s.file.payload is not None]
+        if 'timeframe' in query:
+            candidates = [s for s in candidates if s.timeframe == query['timeframe']]
+        elif len(candidates) > 1:
+            candidates = [s for s in candidates if s.timeframe in ('', '24h')]
+        return candidates[0] if candidates else None
+
+    def find_file(self, path):
+        """
+        PublishedFile para una ruta estática: un JSON publicado, su feed o
+        una página de public/. Nada fuera de eso (ni rutas con '/').
+        """
+        name = path.lstrip('/')
+        if not name or '/' in name or name.startswith('.'):
+            return None
+        if name in self.snapshots:
+            return self.snapshots[name].file
+        for snapshot in self.snapshots.values():
+            if name == os.path.basename(snapshot.feed.path):
+                # El watcher lo mantiene al día (y con él feed_seq)
+                return snapshot.feed
+        if name.endswith('.html'):
+            page = self.pages.setdefault(name, PublishedFile(os.path.join(self.public_dir, name)))
+            page.refresh()
+            return page
+        return None
+
+    async def handle(self, reader, writer):
+        """
+        Una conexión HTTP/1.1 (keep-alive): peticiones hasta que el cliente
+        cierre, pida Connection: close o abra un stream SSE.
+        """
+        try:
+            while True:
+                request = await asyncio.wait_for(read_request(reader), KEEPALIVE_SECONDS)
+                if request is None:
+                    break
+                method, target, headers = request
+                if not await self.dispatch(writer, method, target, headers):
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        except ValueError:
+            await send(writer, 400, {}, b'', close=True)
+        finally:
+            writer.close()
+
+    async def dispatch(self, writer, method, target, headers):
+        """
+        Atiende una petición. Retorna False si la conexión debe cerrarse.
+        """
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        close = headers.get('connection', '').lower() == 'close'
+        log.debug("%s %s", method, target)
+
+        if method not in ('GET', 'HEAD'):
+            await send_json(writer, 405, {"error": "Solo GET y HEAD"}, {'Allow': 'GET, HEAD'}, close=close)
+            return not close
+        if url.path == '/api/events':
+            await self.stream_events(writer, query, headers.get('last-event-id'))
+            return False
+        if url.path in ('/', '/api/snapshots'):
+            index = [s.describe() for s in sorted(self.snapshots.values(), key=lambda s: s.name) if s.file.payload is not None]
+            await send_json(writer, 200, index, headers=None, close=close, request_headers=headers, head=method == 'HEAD')
+            return not close
+
+        if url.path == '/api/latest':
+            snapshot = self.find_latest(query)
+            published = snapshot.file if snapshot else None
+        else:
+            published = self.find_file(url.path)
+        if published is None or published.payload is None:
+            await send_json(writer, 404, {"error": f"No existe {url.path}"}, close=close)
+            return not close
+        await send_file(writer, published, headers, head=method == 'HEAD', close=close)
+        return not close
+
+    async def stream_events(self, writer, filters, last_event_id):
+        queue = asyncio.Queue(SUBSCRIBER_QUEUE)
+        writer.write(
+            b'HTTP/1.1 200 OK\r\n'
+            b'Content-Type: text/event-stream; charset=utf-8\r\n'
+            b'Cache-Control: no-cache\r\n'
+            b'Connection: keep-alive\r\n'
+            b'Access-Control-Allow-Origin: *\r\n'
+            b'\r\n'
+            + f"retry: {RETRY_MS}\n\n".encode()
+        )
+
+        # Reconexión: lo publicado después del último evento recibido
+        try:
+            last_seq = int(last_event_id) if last_event_id else None
+        except ValueError:
+            last_seq = None
+        if last_seq is not None:
+            for snapshot in self.snapshots.values():
+                if snapshot.matches(filters) and snapshot.seq is not None and snapshot.seq > last_seq:
+                    event = snapshot.event()
+                    if event['delta'] and event['delta'].get('prev_seq') != last_seq:
+                        event['delta'] = None
+                    queue.put_nowait(event)
+
+        self.subscribers[queue] = filters
+        log.debug("Cliente SSE conectado (%d en total)", len(self.subscribers))
+        try:
+            while True:
+                await writer.drain()
+                try:
+                    event = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    writer.write(b': ping\n\n')
+                    continue
+                if event is None:
+                    break
+                writer.write(format_event(event))
+        except ConnectionError:
+            pass
+        finally:
+            self.subscribers.pop(queue, None)
+            log.debug("Cliente SSE desconectado (%d en total)", len(self.subscribers))
+
+def format_event(event):
+    lines = ["event: snapshot"]
+    if event.get('seq') is not None:
+        lines.append(f"id: {event['seq']}")
+    lines.append(f"data: {dumps(event).decode('utf-8')}")
+    return ("\n".join(lines) + "\n\n").encode('utf-8')
+
+async def read_request(reader):
+    """
+    (método, target, headers en minúsculas) de la siguiente petición, o
+    None si el cliente cerró la conexión.
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    parts = line.decode('latin-1').split()
+    if len(parts) != 3 or not parts[2].startswith('HTTP/'):
+        raise ValueError(f"Petición inválida: {line[:80]!r}")
+    headers = {}
+    size = len(line)
+    while True:
+        line = await reader.readline()
+        size += len(line)
+        if size > MAX_HEADER_BYTES:
+            raise ValueError("Encabezados demasiado largos")
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    if parts[2] == 'HTTP/1.0' and headers.get('connection', '').lower() != 'keep-alive':
+        headers['connection'] = 'close'
+    return parts[0].upper(), parts[1], headers
+
+async def send(writer, status, headers, body, head=False, close=False):
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}"]
+    headers = {'Content-Length': str(len(body)), 'Access-Control-Allow-Origin': '*', **headers}
+    if close:
+        headers['Connection'] = 'close'
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1'))
+    if body and not head and status != 304:
+        writer.write(body)
+    await writer.drain()
+
+async def send_json(writer, status, obj, headers=None, close=False, request_headers=None, head=False):
+    body = dumps(obj)
+    headers = {'Content-Type': CONTENT_TYPES['.json'], 'Cache-Control': 'no-cache', **(headers or {})}
+    if status == 200 and request_headers is not None:
+        etag = f'"{content_etag(body)}"'
+        headers['ETag'] = etag
+        if etag_matches(request_headers.get('if-none-match'), etag):
+            status, body = 304, b''
+    await send(writer, status, headers, body, head=head, close=close)
+
+async def send_file(writer, published, request_headers, head=False, close=False):
+    """
+    Responde con el archivo (o su versión .br/.gz si el cliente la acepta).
+    Cada representación tiene su propio ETag fuerte; si coincide con
+    If-None-Match la respuesta es un 304 sin cuerpo.
+    """
+    formats = accepted_encodings(request_headers.get('accept-encoding'))
+    fmt = formats[0] if formats else None
+    body = published.encoding(fmt) if fmt else published.payload
+    etag = f'"{published.etag}-{fmt}"' if fmt else f'"{published.etag}"'
+    headers = {
+        'Content-Type': CONTENT_TYPES.get(os.path.splitext(published.path)[1], 'application/octet-stream'),
+        'Cache-Control': 'no-cache',
+        'ETag': etag,
+        'Vary': 'Accept-Encoding',
+    }
+    if fmt:
+        headers['Content-Encoding'] = {'gz': 'gzip', 'br': 'br'}[fmt]
+    status = 304 if etag_matches(request_headers.get('if-none-match'), etag) else 200
+    await send(writer, status, headers, body, head=head, close=close)
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, directory='.', public_dir=DEFAULT_PUBLIC_DIR, poll=DEFAULT_POLL):
+    server_state = TrendsServer(directory, public_dir, poll)
+    server_state.scan(announce=False)
+    server = await asyncio.start_server(server_state.handle, host, port, limit=MAX_HEADER_BYTES)
+    log.info(f"Sirviendo {os.path.abspath(directory)} en http://{host}:{port}/ ({len(server_state.snapshots)} snapshots)")
+    watcher = asyncio.create_task(server_state.watch())
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--dir', default='.', help="Directorio donde escriben los scrapers")
+    parser.add_argument('--public', default=DEFAULT_PUBLIC_DIR, help="Directorio de los dashboards")
+    parser.add_argument('--poll', type=float, default=DEFAULT_POLL, help="Segundos entre revisiones de los archivos")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.dir, args.public, args.poll))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,213 @@
+"""
+Parser único de los textos de volumen de Google Trends y xtrends.
+
+Google Trends muestra "200K+", "2M+", "200 mil+", "1 M+", "2 Mio.+"...;
+xtrends muestra "443.6k", "Under 10k" o "1k". parse_volume() los convierte
+en cotas enteras exactas (con Decimal: "443.6k" es 443600, no 443599):
+
+    "200K+"        -> (200000, None)        al menos 200000, sin tope
+    "2M+"          -> (2000000, None)
+    "443.6k"       -> (443600, 443600)      valor puntual
+    "1,5 mil"      -> (1500, 1500)
+    "1.500+"       -> (1500, None)          separador de miles
+    "Under 10k"    -> (0, 10000)            "menos de", "less than", "<"...
+    "Más de 50 mil"-> (50000, None)         "over", "more than", "mais de"...
+    "—", "", None  -> None
+
+Los mismos textos se repiten en cada corrida y en cada país, así que
+parse_volume() guarda en un lru_cache acotado (VOLUME_CACHE_SIZE) los
+resultados por texto. volume_lower_bound() es lo que publican los
+scrapers (Google Trends en "volume"), tweet_count() es la convención de
+xtrends ("Under 10k" -> 5000, 0 = desconocido) y renormalize_trends() /
+renormalize_store() vuelven a calcular los volúmenes de snapshots ya
+guardados a partir de su texto.
+
+Uso:
+    python scripts/volume_parser.py "200K+" "Under 10k" "1,5 mil"
+    python scripts/volume_parser.py --files trends_data.json trends_data_US_24h.json
+    python scripts/volume_parser.py --db trends_history.db --source google_trends
+"""
+
+import argparse
+import re
+import sys
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from json_codec import write_published
+from output_schema import dump_snapshot, load_snapshot
+from rolling_stats import refresh_peak_volumes
+from trend_store import TrendStore, snapshot_key, SOURCE_GOOGLE_TRENDS, SOURCE_XTRENDS
+
+VOLUME_CACHE_SIZE = 4096
+
+# Sufijos (ya en minúsculas) -> multiplicador. Los más largos primero: "mil
+# millones" antes que "millones" antes que "mil" antes que "mi"/"m".
+MULTIPLIERS = [
+    ('mil millones', 10 ** 9), ('milliards', 10 ** 9), ('milliard', 10 ** 9),
+    ('millones', 10 ** 6), ('millón', 10 ** 6), ('millon', 10 ** 6), ('milhões', 10 ** 6), ('milhão', 10 ** 6),
+    ('million', 10 ** 6), ('mill.', 10 ** 6), ('mill', 10 ** 6), ('mio.', 10 ** 6), ('mio', 10 ** 6),
+    ('mrd.', 10 ** 9), ('mrd', 10 ** 9), ('mln', 10 ** 6), ('mn', 10 ** 6), ('md', 10 ** 9),
+    ('bn', 10 ** 9), ('bi', 10 ** 9), ('tsd.', 10 ** 3), ('tsd', 10 ** 3), ('mil', 10 ** 3),
+    ('mi', 10 ** 6), ('k', 10 ** 3), ('m', 10 ** 6), ('b', 10 ** 9),
+]
+
+# "1,500" / "1.500" / "1 500" (miles agrupados) o "443.6" / "1,5" (decimal)
+NUMBER = r'(\d{1,3}(?:[.,\u00a0\u202f ]\d{3})+(?!\d)|\d+(?:[.,]\d+)?)'
+UNIT = '|'.join(re.escape(suffix) for suffix, _ in MULTIPLIERS)
+VOLUME_PATTERN = re.compile(NUMBER + r'\s*(' + UNIT + r')?(?![a-záéíóúñãõç])')
+
+UPPER_BOUND_WORDS = re.compile(r'^(?:under|less than|fewer than|below|menos de|moins de|unter|abaixo de|<)\s*')
+LOWER_BOUND_WORDS = re.compile(r'^(?:over|more than|above|más de|mas de|mais de|plus de|über|>)\s*')
+
+def to_number(digits, grouped):
+    if grouped:
+        return Decimal(re.sub(r'[.,\u00a0\u202f ]', '', digits))
+    return Decimal(digits.replace(',', '.'))
+
+@lru_cache(maxsize=VOLUME_CACHE_SIZE)
+def parse_volume(text):
+    """
+    Texto de volumen -> (cota inferior, cota superior o None) en enteros, o
+    None si no hay un número.
+    """
+    if not text:
+        return None
+    value = str(text).strip().casefold().replace('\u00a0', ' ')
+    upper_only = UPPER_BOUND_WORDS.match(value)
+    lower_only = LOWER_BOUND_WORDS.match(value)
+    if upper_only or lower_only:
+        value = value[(upper_only or lower_only).end():]
+
+    match = VOLUME_PATTERN.search(value)
+    if not match:
+        return None
+    digits, unit = match.group(1), match.group(2)
+    grouped = bool(re.fullmatch(r'\d{1,3}(?:[.,\u00a0\u202f ]\d{3})+', digits))
+    if grouped and unit:
+        # Con sufijo, un solo separador es decimal ("1,500k" = 1500, como "1,5 mil")
+        grouped = digits.count(',') + digits.count('.') > 1
+    try:
+        number = to_number(digits, grouped)
+    except InvalidOperation:
+        return None
+    if unit:
+        number *= dict(MULTIPLIERS)[unit]
+    amount = int(number)
+
+    if upper_only:
+        return (0, amount)
+    if lower_only or value[match.end():].lstrip().startswith('+'):
+        return (amount, None)
+    return (amount, amount)
+
+def volume_lower_bound(text, default=None):
+    """
+    '200K+' -> 200000, 'Under 10k' -> 0. default si el texto no trae número.
+    """
+    bounds = parse_volume(text)
+    return default if bounds is None else bounds[0]
+
+def tweet_count(text):
+    """
+    Convención de xtrends para tweet_volume: 0 = desconocido y "Under 10k"
+    a la mitad de la cota (5000), como publicaba normalize_tweet_count().
+    """
+    bounds = parse_volume(text)
+    if bounds is None:
+        return 0
+    lower, upper = bounds
+    if not lower and upper:
+        return upper // 2
+    return lower
+
+def parse_volumes(texts):
+    """
+    Versión por lotes: [texto] -> [(cota inferior, cota superior) o None].
+    """
+    return [parse_volume(text) for text in texts]
+
+def xtrends_volume(text):
+    """
+    tweet_volume tal como lo publica scrape_tw_trends_2.py (1000 exacto es
+    el valor de relleno de xtrends: -1).
+    """
+    count = tweet_count(text)
+    return -1 if count == 1000 else count
+
+# Por fuente: (campo de texto, campo numérico, conversión)
+SOURCE_FIELDS = {
+    SOURCE_GOOGLE_TRENDS: ('volume_text', 'volume', volume_lower_bound),
+    SOURCE_XTRENDS: ('tweet_volume_text', 'tweet_volume', xtrends_volume),
+}
+
+def renormalize_trends(trends, source=SOURCE_GOOGLE_TRENDS):
+    """
+    Recalcula en el lugar el volumen numérico de cada tendencia desde su
+    texto (p.ej. snapshots de Google Trends con la escala 0-100 anterior).
+    Las tendencias sin texto o con un texto sin número no se tocan.
+    Retorna cuántas cambiaron.
+    """
+    text_key, value_key, convert = SOURCE_FIELDS[source]
+    changed = 0
+    for trend in trends:
+        text = trend.get(text_key)
+        value = convert(text) if text else None
+        if value is None or trend.get(value_key) == value:
+            continue
+        trend[value_key] = value
+        changed += 1
+    return changed
+
+def renormalize_store(store, source=SOURCE_GOOGLE_TRENDS):
+    """
+    Lo mismo sobre las observaciones del histórico: un parseo por texto
+    distinto y un UPDATE por texto. Si alguna cambió, también los volúmenes
+    pico de rolling_stats, para que no mezclen las dos escalas. Retorna
+    cuántas filas cambiaron. TrendStore lo corre solo una vez al abrir un
+    histórico anterior a la escala absoluta (SCHEMA_VERSION 1).
+    """
+    _, _, convert = SOURCE_FIELDS[source]
+    texts = [row[0] for row in store.conn.execute(
+        'SELECT DISTINCT o.volume_text FROM observations o JOIN snapshots s ON s.id = o.snapshot_id '
+        'WHERE s.source = ? AND o.volume_text IS NOT NULL',
+        (source,)
+    )]
+    changed = 0
+    with store.conn:
+        for text in texts:
+            value = convert(text)
+            if value is None:
+                continue
+            cursor = store.conn.execute(
+                'UPDATE observations SET volume = ? WHERE volume_text = ? AND (volume IS NULL OR volume != ?) '
+                'AND snapshot_id IN (SELECT id FROM snapshots WHERE source = ?)',
+                (value, text, value, source)
+            )
+            changed += cursor.rowcount
+    if changed:
+        refresh_peak_volumes(store, source)
+    return changed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('texts', nargs='*', help="Textos de volumen a parsear")
+    parser.add_argument('--files', nargs='+', default=[], help="JSON publicados a renormalizar")
+    parser.add_argument('--db', default=None, help="Histórico a renormalizar")
+    parser.add_argument('--source', default=SOURCE_GOOGLE_TRENDS, choices=sorted(SOURCE_FIELDS))
+    args = parser.parse_args()
+
+    for text in args.texts:
+        print(f"[v0] {text!r:<16} -> {parse_volume(text)}")
+    for path in args.files:
+        key = snapshot_key(path.replace('\\', '/').rsplit('/', 1)[-1])
+        if key is None or key[0] not in SOURCE_FIELDS:
+            print(f"[v0] ⚠ {path}: fuente sin texto de volumen, se omite", file=sys.stderr)
+            continue
+        data = load_snapshot(path)
+        changed = renormalize_trends(data.get('trends', []), key[0])
+        if changed:
+            write_published(path, dump_snapshot(data))
+        print(f"[v0] {path}: {changed} tendencias renormalizadas", file=sys.stderr)
+    if args.db:
+        with TrendStore(args.db) as store:
+            print(f"[v0] {args.db}: {renormalize_store(store, args.source)} observaciones renormalizadas", file=sys.stderr)